@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 
 from ucca.ioutil import write_passage, get_passages_with_progress_bar
-from ucca.textutil import annotate_all, is_annotated
+from ucca.textutil import annotate_all, is_annotated, get_annotation_cache, print_load_times, N_PROCESS, \
+    BATCH_SIZE, ANNOTATION_CACHE_ENV_VAR
 
 desc = """Read UCCA standard format in XML or binary pickle, and write back with POS tags and dependency parse."""
 
 
 def main(args):
     for passage in annotate_all(get_passages_with_progress_bar(args.filenames, desc="Annotating"),
-                                replace=True, as_array=args.as_array, verbose=args.verbose):
+                                replace=True, as_array=args.as_array, verbose=args.verbose, n_process=args.n_process,
+                                batch_size=args.batch_size, cache=get_annotation_cache(args.cache)):
         assert is_annotated(passage, args.as_array), "Passage %s is not annotated" % passage.ID
         write_passage(passage, outdir=args.out_dir, verbose=args.verbose)
+    if args.verbose:
+        print_load_times()
 
 
 if __name__ == '__main__':
@@ -20,5 +25,11 @@ if __name__ == '__main__':
     argparser.add_argument("filenames", nargs="+", help="passage file names to annotate")
     argparser.add_argument("-o", "--out-dir", default=".", help="directory to write annotated files to")
     argparser.add_argument("-a", "--as-array", action="store_true", help="save annotations as array in passage level")
+    argparser.add_argument("-p", "--n-process", type=int, default=N_PROCESS, help="number of processes to annotate in")
+    argparser.add_argument("-b", "--batch-size", type=int, default=BATCH_SIZE,
+                           help="number of paragraphs to annotate at a time in each process")
+    argparser.add_argument("-c", "--cache", default=os.environ.get(ANNOTATION_CACHE_ENV_VAR),
+                           help="file to store annotations in, to skip annotating text seen before "
+                                "(default: given by the %s environment variable)" % ANNOTATION_CACHE_ENV_VAR)
     argparser.add_argument("-v", "--verbose", action="store_true", help="print tagged text for each passage")
     main(argparser.parse_args())
@@ -0,0 +1,37 @@
+import argparse
+import json
+import os
+
+from ucca.diffutil import diff_dirs, diff_files, write_report
+
+
+def main(args):
+    if os.path.isdir(args.true) and os.path.isdir(args.pred):
+        diffs = diff_dirs(args.true, args.pred, workers=args.workers)
+        if args.out_file:
+            summary = write_report(diffs, args.out_file)
+            print(json.dumps(summary, indent=2))
+            print("Wrote '%s'" % args.out_file)
+        else:
+            for true_file, pred_file, passage_id, changes in diffs:
+                print_changes(passage_id or true_file or pred_file, changes)
+    else:
+        for passage_id, changes in diff_files(args.true, args.pred):
+            print_changes(passage_id, changes)
+
+
+def print_changes(passage_id, changes):
+    if changes is None:
+        print("%s: missing" % passage_id)
+    for change in changes or ():
+        print("%s: %s" % (passage_id, json.dumps(change.to_dict())))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Find differences between UCCA passages: nodes and edges added, "
+                                                    "removed or retagged")
+    argparser.add_argument("true", help="passage file, or directory of passage files, to compare from")
+    argparser.add_argument("pred", help="passage file, or directory of passage files (matched by name), to compare to")
+    argparser.add_argument("-o", "--out-file", help="file to write a JSON report to, if given directories")
+    argparser.add_argument("--workers", type=int, default=1, help="number of processes to compare files in")
+    main(argparser.parse_args())
@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
 """The evaluation script for UCCA layer 1."""
+import os
+import shutil
+import sys
+import tempfile
 from argparse import ArgumentParser
 from itertools import repeat
 
@@ -7,30 +11,67 @@ from ucca import evaluation, constructions, ioutil
 
 
 def main(args):
-    guessed, ref, ref_yield_tags = [None if x is None else ioutil.read_files_and_dirs((x,))
+    guessed, ref, ref_yield_tags = [None if x is None else read_passages(x)
                                     for x in (args.guessed, args.ref, args.ref_yield_tags)]
     if args.match_by_id:
         guessed = match_by_id(guessed, ref)
         ref_yield_tags = match_by_id(ref_yield_tags, ref)
-    results = []
+    reference_index = None
+    if args.ref_index and not ref_yield_tags and constructions.CATEGORIES_NAME not in args.constructions:
+        reference_index = get_reference_index(args, ref)
+    accumulator = evaluation.ScoresAccumulator()
     eval_type = evaluation.UNLABELED if args.unlabeled else evaluation.LABELED
     verbose = args.verbose or len(guessed) == 1
-    for g, r, ryt in zip(guessed, ref, ref_yield_tags or repeat(None)):
-        if len(guessed) > 1:
-            print("Evaluating %s%s" % (g.ID, ":" if args.verbose else "..."), end="\r", flush=True)
-        if args.verbose:
-            print()
-        result = evaluation.evaluate(g, r, constructions=args.constructions, units=args.units, fscore=args.fscore,
-                                     errors=args.errors, verbose=verbose,
-                                     normalize=args.normalize, ref_yield_tags=ryt,
-                                     eval_type=evaluation.UNLABELED if args.unlabeled else None)
-        if verbose:
-            if args.errors:
-                result.print_confusion_matrix(as_table=args.as_table)
-            if not args.quiet:
-                print_f1(result, eval_type)
-        results.append(result)
-    summarize(args, results, eval_type=eval_type)
+    pairs = zip(guessed, ref, ref_yield_tags or repeat(None))
+
+    # Rows are written as results come, and copied to the out file after the titles, which depend on all results
+    rows = tempfile.TemporaryFile("w+", encoding="utf-8") if args.out_file else None
+    try:
+        for passage_id, result, output in evaluation.evaluate_corpus(
+                pairs, workers=args.workers, capture_output=True, constructions=args.constructions, units=args.units,
+                fscore=args.fscore, errors=args.errors, verbose=verbose, normalize=args.normalize,
+                eval_type=evaluation.UNLABELED if args.unlabeled else None, reference_index=reference_index):
+            if len(guessed) > 1:
+                print("Evaluating %s%s" % (passage_id, ":" if args.verbose else "..."), end="\r", flush=True)
+            if args.verbose:
+                print()
+            sys.stdout.write(output)
+            if verbose:
+                if args.errors:
+                    result.print_confusion_matrix(as_table=args.as_table)
+                if not args.quiet:
+                    print_f1(result, eval_type)
+            accumulator.add(result)
+            if rows:
+                print(*result.fields(eval_type=eval_type), sep=",", file=rows)
+        summarize(args, accumulator, eval_type=eval_type, rows=rows)
+    finally:
+        if rows:
+            rows.close()
+
+
+def get_reference_index(args, ref):
+    """Load the reference index file if it exists and matches the evaluation settings, otherwise create it"""
+    if os.path.exists(args.ref_index):
+        reference_index = evaluation.ReferenceIndex.load(args.ref_index)
+        if reference_index.supports(args.constructions, normalize=args.normalize):
+            return reference_index
+        print("Reference index '%s' was created with different settings, recreating" % args.ref_index)
+    reference_index = evaluation.ReferenceIndex(args.constructions, normalize=args.normalize)
+    for passage in ref:
+        if not args.quiet:
+            print("Indexing %s..." % passage.ID, end="\r", flush=True)
+        reference_index.add(passage)
+    reference_index.save(args.ref_index)
+    if not args.quiet:
+        print("Wrote '%s'" % args.ref_index)
+    return reference_index
+
+
+def read_passages(filename):
+    if filename.endswith(ioutil.ARCHIVE_SUFFIX):
+        return ioutil.PassageArchive(filename)
+    return ioutil.read_files_and_dirs((filename,))
 
 
 def match_by_id(guessed, ref):
@@ -38,6 +79,11 @@ def match_by_id(guessed, ref):
         return None
     if len(guessed) != len(ref):
         raise ValueError("Number of passages to compare does not match: %d != %d" % (len(guessed), len(ref)))
+    if isinstance(guessed, ioutil.PassageArchive):  # Random access by ID, no need to read all passages
+        try:
+            return guessed.select(ref.ids if isinstance(ref, ioutil.PassageArchive) else (p.ID for p in ref))
+        except KeyError as e:
+            raise ValueError("Passage IDs do not match") from e
     if len(guessed) > 1:
         guessed_by_id = {}
         for g in guessed:
@@ -55,9 +101,9 @@ def print_f1(result, eval_type):
     print("Average %s F1 score: %.3f" % (eval_type, result.average_f1(eval_type)))
 
 
-def summarize(args, results, eval_type):
-    summary = evaluation.Scores.aggregate(results)
-    if len(results) > 1:
+def summarize(args, accumulator, eval_type, rows=None):
+    summary = accumulator.summary()
+    if accumulator.count > 1:
         if args.verbose:
             print("Aggregated scores:")
         else:
@@ -72,8 +118,8 @@ def summarize(args, results, eval_type):
     if args.out_file:
         with open(args.out_file, "w", encoding="utf-8") as f:
             print(*summary.titles(eval_type=eval_type), sep=",", file=f)
-            for result in results:
-                print(*result.fields(eval_type=eval_type), sep=",", file=f)
+            rows.seek(0)
+            shutil.copyfileobj(rows, f)
         print("Wrote '%s'" % args.out_file)
     for filename, counts in ((args.summary_file, False), (args.counts_file, True)):
         if filename:
@@ -97,11 +143,14 @@ def check_args(args):
 
 if __name__ == "__main__":
     argparser = ArgumentParser(description="Compare two UCCA passages or two directories containing passage files.")
-    argparser.add_argument("guessed", help="xml/pickle file name for the guessed annotation, or directory of files")
-    argparser.add_argument("ref", help="xml/pickle file name for the reference annotation, or directory of files")
+    argparser.add_argument("guessed", help="xml/pickle file name for the guessed annotation, directory of files, "
+                                           "or passage archive file")
+    argparser.add_argument("ref", help="xml/pickle file name for the reference annotation, directory of files, "
+                                       "or passage archive file")
     argparser.add_argument("-r", "--ref-yield-tags", help="xml/pickle file name for reference used for extracting edge "
                                                           "categories for fine-grained annotation "
-                                                          "(--constructions categories), or directory of files")
+                                                          "(--constructions categories), directory of files, "
+                                                          "or passage archive file")
     argparser.add_argument("-u", "--units", action="store_true",
                            help="the units the annotations have in common, and those each has separately")
     argparser.add_argument("-f", "--fscore", action="store_true",
@@ -118,6 +167,10 @@ if __name__ == "__main__":
     argparser.add_argument("--summary-file", help="file to write aggregated scores to, in CSV format")
     argparser.add_argument("--counts-file", help="file to write aggregated counts to, in CSV format")
     argparser.add_argument("--errors-file", help="file to write aggregated confusion matrix to, in CSV format")
+    argparser.add_argument("--workers", type=int, default=1, help="number of processes to evaluate passages in")
+    argparser.add_argument("--ref-index", help="file to load precomputed reference evaluation data from, for faster "
+                                               "evaluation against the same reference (created if it does not exist; "
+                                               "not used with --ref-yield-tags or categories)")
     group = argparser.add_mutually_exclusive_group()
     group.add_argument("-v", "--verbose", action="store_true",
                        help="prints the results for every single pair (always true if there is only one pair)")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import tracemalloc
+
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the memory held by UCCA passages loaded into memory, in bytes per node"""
+
+
+def main(args):
+    gc.collect()
+    tracemalloc.start()
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = sum(len(passage.nodes) for passage in passages)
+    edges = sum(len(node) for passage in passages for node in passage.nodes.values())
+    print("Passages: %d" % len(passages))
+    print("Nodes: %d" % nodes)
+    print("Edges: %d" % edges)
+    print("Memory: %d bytes (peak %d)" % (size, peak))
+    print("Bytes per node: %.1f" % (size / max(nodes, 1)))
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names or directories to load")
+    main(argparser.parse_args())
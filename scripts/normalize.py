@@ -1,16 +1,45 @@
 import argparse
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from ucca.ioutil import get_passages_with_progress_bar, write_passage
+from tqdm import tqdm
+
+from ucca.ioutil import get_passages_with_progress_bar, write_passage, read_files_and_dirs, gen_files, \
+    resolve_patterns
 from ucca.normalization import normalize
 
 
 def main(args):
     if args.outdir:
         os.makedirs(args.outdir, exist_ok=True)
-    for p in get_passages_with_progress_bar(args.filenames, desc="Normalizing", converters={}):
-        normalize(p, extra=args.extra)
-        write_passage(p, outdir=args.outdir, prefix=args.prefix, binary=args.binary, verbose=False)
+    changes = Counter()
+    if args.workers > 1:  # each file is read, normalized and written in one of the processes
+        filenames = list(gen_files(resolve_patterns(args.filenames)))
+        with ProcessPoolExecutor(args.workers) as executor:
+            for file_changes in tqdm(executor.map(partial(normalize_file, args=args), filenames),
+                                     desc="Normalizing", unit=" files", total=len(filenames)):
+                changes.update(file_changes)
+    else:
+        for p in get_passages_with_progress_bar(args.filenames, desc="Normalizing", converters={}):
+            changes.update(normalize_passage(p, args))
+    if args.verbose:
+        for rule, count in changes.most_common():
+            print("%s: %d" % (rule, count))
+
+
+def normalize_file(filename, args):
+    changes = Counter()
+    for p in read_files_and_dirs((filename,), converters={}):
+        changes.update(normalize_passage(p, args))
+    return changes
+
+
+def normalize_passage(p, args):
+    changes = normalize(p, extra=args.extra)
+    write_passage(p, outdir=args.outdir, prefix=args.prefix, binary=args.binary, verbose=False)
+    return changes
 
 
 if __name__ == "__main__":
@@ -20,4 +49,7 @@ if __name__ == "__main__":
     argparser.add_argument("-p", "--prefix", default="", help="output filename prefix")
     argparser.add_argument("-b", "--binary", action="store_true", help="write in pickle binary format (.pickle)")
     argparser.add_argument("-e", "--extra", action="store_true", help="extra normalization rules")
+    argparser.add_argument("--workers", type=int, default=1, help="number of processes to normalize files in")
+    argparser.add_argument("-v", "--verbose", action="store_true",
+                           help="print the number of nodes changed by each normalization rule")
     main(argparser.parse_args())
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import argparse
+
+from ucca.ioutil import get_passages_with_progress_bar, write_archive, ARCHIVE_SUFFIX
+
+desc = """Packs UCCA passages from XML/pickle files into a single archive file with random access by passage ID."""
+
+
+def main(args):
+    filename = args.out if args.out.endswith(ARCHIVE_SUFFIX) else args.out + ARCHIVE_SUFFIX
+    n = write_archive(get_passages_with_progress_bar(args.filenames, desc="Packing"), filename)
+    print("Wrote %d passages to '%s'" % (n, filename))
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names or directories to pack")
+    argparser.add_argument("-o", "--out", required=True, help="output archive file name (suffix %s is added if "
+                                                              "missing)" % ARCHIVE_SUFFIX)
+    main(argparser.parse_args())
@@ -1,9 +1,12 @@
+import json
 import sys
-from multiprocessing import Pool
+from concurrent.futures import ProcessPoolExecutor
 
 import argparse
+from tqdm import tqdm
 
-from ucca.ioutil import get_passages_with_progress_bar, external_write_mode
+from ucca.ioutil import get_passages_with_progress_bar, external_write_mode, read_files_and_dirs, gen_files, \
+    resolve_patterns
 from ucca.normalization import normalize
 from ucca.validation import validate
 
@@ -31,14 +34,24 @@ class Validator:
             print_errors(passage_id, errors)
         return passage_id, errors
 
+    def validate_file(self, filename):
+        return [self.validate_passage(p) for p in read_files_and_dirs((filename,), converters={})]
+
 
 def main(args):
     validator = Validator(args.normalize, args.extra, linkage=args.linkage, multigraph=args.multigraph,
                           strict=args.strict)
-    with Pool(10) as pool:
-        errors = pool.map(validator.validate_passage,
-                          get_passages_with_progress_bar(args.filenames, desc="Validating", converters={}))
-    errors = dict((k, v) for k, v in errors if v)
+    errors = {}
+    out = open(args.out_file, "w", encoding="utf-8") if args.out_file else None
+    try:
+        for passage_id, passage_errors in validate_all(validator, args):
+            if passage_errors:
+                errors[passage_id] = passage_errors
+            if out:  # one JSON object per line, written as soon as the passage is validated
+                print(json.dumps({"passage": passage_id, "errors": passage_errors}), file=out, flush=True)
+    finally:
+        if out:
+            out.close()
     if errors:
         if not args.strict:
             id_len = max(map(len, errors))
@@ -49,6 +62,18 @@ def main(args):
         print("No errors found.")
 
 
+def validate_all(validator, args):
+    if args.workers > 1:  # each file is read and validated in one of the processes
+        filenames = list(gen_files(resolve_patterns(args.filenames)))
+        with ProcessPoolExecutor(args.workers) as executor:
+            for results in tqdm(executor.map(validator.validate_file, filenames),
+                                desc="Validating", unit=" files", total=len(filenames)):
+                yield from results
+    else:
+        for passage in get_passages_with_progress_bar(args.filenames, desc="Validating", converters={}):
+            yield validator.validate_passage(passage)
+
+
 def print_errors(passage_id, errors, id_len=None):
     for i, e in enumerate(errors):
         with external_write_mode():
@@ -69,4 +94,6 @@ if __name__ == "__main__":
     argparser.add_argument("-e", "--extra", action="store_true", help="extra normalization rules")
     argparser.add_argument("--no-linkage", dest="linkage", action="store_false", help="skip linkage validations")
     argparser.add_argument("--multigraph", action="store_true", help="allow multiple edges with the same parent+child")
+    argparser.add_argument("--workers", type=int, default=10, help="number of processes to validate files in")
+    argparser.add_argument("-o", "--out-file", help="file to write the errors of each passage to, in JSON Lines format")
     main(check_args(argparser, argparser.parse_args()))
@@ -31,6 +31,10 @@ class Construction:
         if self.criterion(candidate):
             yield self
 
+    def __reduce__(self):
+        # pickled by name, since the criterion may be a lambda
+        return _get_construction, (self.name, self.description)
+
     @property
     def is_punct(self):
         return self.name in (EdgeTags.Punctuation, layer0.NodeTags.Punct, "punct")
@@ -44,6 +48,9 @@ class Categories(Construction):
     def __init__(self):
         super().__init__(CATEGORIES_NAME, description=None, criterion=None)
 
+    def __reduce__(self):
+        return Categories, ()
+
     def __call__(self, candidate):
         try:
             tags = candidate.edge.tags
@@ -62,20 +69,40 @@ def positions(terminals):
 
 
 class Candidate:
-    def __init__(self, edge, reference=None, reference_yield_tags=None, verbose=False):
+    def __init__(self, edge, reference=None, reference_yield_tags=None, verbose=False, terminal_yields=None):
+        """
+        :param edge: Edge whose child is the candidate unit
+        :param reference: Passage object to take terminals from (for annotation)
+        :param reference_yield_tags: yield tags from reference passage for fine-grained evaluation
+        :param verbose: whether to print annotation progress
+        :param terminal_yields: dict of Node -> positions of its non-punctuation terminals, shared by the candidates of
+                                one passage so that each is calculated once
+        """
         self.edge = edge
         self.out_tags = {t for e in edge.child for t in e.tags}
         self.reference = reference
         self.reference_yield_tags = reference_yield_tags
         self.verbose = verbose
-        self.terminals = self.edge.child.get_terminals()
-        self._terminal_yield = positions(self.terminals)
-        self._terminal_yield_no_punct = positions((self.edge.parent if self.is_implicit() else self.edge.child).get_terminals(punct=False))
-        if self.reference is not None:
-            self.terminals = [self.reference.by_id(t.ID) for t in self.terminals]
+        self._terminals = self.edge.child.get_terminals()
+        self._terminal_yields = {} if terminal_yields is None else terminal_yields
+        self._terminal_yield = positions(self._terminals)
+        self._terminal_yield_no_punct = self._yield_no_punct(
+            self.edge.parent if self.is_implicit() else self.edge.child)
         self.extra = {}
         self.is_unary_child = self.edge.parent.incoming and (
-                self._terminal_yield_no_punct == positions(self.edge.parent.get_terminals(punct=False)))
+                self._terminal_yield_no_punct == self._yield_no_punct(self.edge.parent))
+
+    def _yield_no_punct(self, node):
+        terminal_yield = self._terminal_yields.get(node)
+        if terminal_yield is None:
+            terminal_yield = self._terminal_yields[node] = positions(node.get_terminals(punct=False))
+        return terminal_yield
+
+    @property
+    def terminals(self):
+        if self.reference is not None and self._terminals and self._terminals[0].root is not self.reference:
+            self._terminals = [self.reference.by_id(t.ID) for t in self._terminals]
+        return self._terminals
 
     def _annotate(self, attr=None):
         passage = self.edge.parent.root
@@ -85,9 +112,13 @@ class Candidate:
         if attr:
             ret = self.extra.get(attr)
             if ret is None:
-                ret = self.extra[attr] = {t.get_annotation(attr, as_array=True) for t in self.terminals}
+                ret = self.extra[attr] = textutil.terminal_annotations(self.terminals, attr)
             return ret
 
+    @property
+    def tags(self):
+        return self.edge.tags
+
     @property
     def remote(self):
         return self.edge.attrib.get("remote", False)
@@ -115,7 +146,7 @@ class Candidate:
         if ret is None:
             self._annotate()
             para_pos = {t.para_pos for t in self.terminals}
-            ret = self.extra[attr] = {t for t in self.terminals if int(t.tok[attr]) not in para_pos}
+            ret = self.extra[attr] = {t for t in self.terminals if int(t.tok[attr.value]) not in para_pos}
         return ret
 
     @property
@@ -163,6 +194,47 @@ class Candidate:
         return "[%s %s]" % (" ".join(self.edge.tags), self.edge.child)
 
 
+class CandidateRecord:
+    """
+    What evaluation uses of a Candidate (its tags, yields and constructions), without references to the passage,
+    so that it can be saved and used again instead of the Candidate.
+    """
+    __slots__ = ("tags", "excluded", "is_unary_child", "_terminal_yield", "_terminal_yield_no_punct", "_constructions")
+
+    def __init__(self, candidate, constructions=None):
+        """
+        :param candidate: Candidate object to record
+        :param constructions: list of constructions to record the candidate's membership in
+        """
+        self.tags = tuple(candidate.tags)
+        self.excluded = candidate.excluded
+        self.is_unary_child = bool(candidate.is_unary_child)
+        self._terminal_yield = candidate._terminal_yield
+        self._terminal_yield_no_punct = candidate._terminal_yield_no_punct
+        self._constructions = () if self.excluded else tuple(candidate.constructions(constructions))
+
+    def constructions(self, constructions=None):
+        """
+        :param constructions: ignored, the constructions given when recording are used
+        :return: the constructions the candidate was found to be an instance of
+        """
+        del constructions
+        return self._constructions
+
+    def terminal_yield(self, construction):
+        return self._terminal_yield if construction.is_punct else self._terminal_yield_no_punct
+
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in self.__slots__)
+
+    def __setstate__(self, state):
+        for attr, value in zip(self.__slots__, state):
+            setattr(self, attr, value)
+
+    def __str__(self):
+        return "[%s]" % " ".join(self.tags)
+
+
 EXCLUDED_EDGE_TAGS = {EdgeTags.LinkArgument, EdgeTags.LinkRelation, EdgeTags.Terminal}
 EXCLUDED_NODE_TAGS = {NodeTags.Linkage, layer0.NodeTags.Word, layer0.NodeTags.Punct}
 
@@ -202,6 +274,12 @@ def get_by_name(name):
     return name if isinstance(name, Construction) else CATEGORY_DESCRIPTIONS.get(name) or CONSTRUCTION_BY_NAME[name]
 
 
+def _get_construction(name, description):
+    """Finds a construction by name when unpickling, or creates a category construction if it is not predefined"""
+    construction = ALL_EDGES if name == ALL_EDGES.name else CONSTRUCTION_BY_NAME.get(name)
+    return Construction(name, description, criterion=None) if construction is None else construction
+
+
 def get_by_names(names=None):
     return list(map(get_by_name, names or ()))
 
@@ -223,7 +301,26 @@ def verify_terminals_match(passage, reference):
                           "\n".join(map(str, diff_terminals(passage, reference))))
 
 
-def extract_candidates(passage, constructions=None, reference=None, reference_yield_tags=None, verbose=False):
+def iter_candidates(passage, reference=None, reference_yield_tags=None, verbose=False, records=None):
+    """
+    Create a Candidate for each edge in UCCA passage (including excluded ones), in a fixed order.
+    :param passage: Passage object to find candidates in
+    :param reference: Passage object to get POS tags from (default: `passage')
+    :param reference_yield_tags: yield tags from reference passage for fine-grained evaluation
+    :param verbose: whether to print tagged text
+    :param records: dict of (parent ID, edge index) -> CandidateRecord to use for these edges instead of a new Candidate
+    :return: generator of Candidates (or CandidateRecords)
+    """
+    terminal_yields = {}
+    for node in passage.layer(layer1.LAYER_ID).all:
+        for i, edge in enumerate(node):
+            record = records.get((node.ID, i)) if records else None
+            yield Candidate(edge, reference or passage, reference_yield_tags, verbose=verbose,
+                            terminal_yields=terminal_yields) if record is None else record
+
+
+def extract_candidates(passage, constructions=None, reference=None, reference_yield_tags=None, verbose=False,
+                       candidates=None):
     """
     Find candidate edges by constructions in UCCA passage.
     :param passage: Passage object to find constructions in
@@ -233,6 +330,7 @@ def extract_candidates(passage, constructions=None, reference=None, reference_yi
                    dict: set of terminal indices (excluding punctuation) ->
                    list of edges of the Construction whose yield (excluding remotes and punctuation) is that set
     :param verbose: whether to print tagged text
+    :param candidates: iterable of Candidates (or CandidateRecords) to use instead of those of all edges in the passage
     :return: dict of Construction -> list of corresponding Candidates
     """
     constructions = get_by_names(constructions)
@@ -246,12 +344,12 @@ def extract_candidates(passage, constructions=None, reference=None, reference_yi
         else:
             keys.append(construction)
     extracted = OrderedDict((c, []) for c in keys)
-    for node in passage.layer(layer1.LAYER_ID).all:
-        for edge in node:
-            candidate = Candidate(edge, reference or passage, reference_yield_tags, verbose=verbose)
-            if not candidate.excluded:
-                for construction in candidate.constructions(constructions):
-                    extracted.setdefault(construction, []).append(candidate)
+    if candidates is None:
+        candidates = iter_candidates(passage, reference, reference_yield_tags, verbose=verbose)
+    for candidate in candidates:
+        if not candidate.excluded:
+            for construction in candidate.constructions(constructions):
+                extracted.setdefault(construction, []).append(candidate)
     return extracted
 
 
@@ -270,5 +368,5 @@ def create_passage_yields(p, *args, tags=True, **kwargs):
             terminal_yield = candidate.terminal_yield(construction)
             # if terminal_yield:
             construction_yield_candidates.setdefault(terminal_yield, []).extend(
-                candidate.edge.tags if tags else [candidate])
+                candidate.tags if tags else [candidate])
     return yield_candidates
@@ -7,6 +7,7 @@ conversions.
 The possible other formats are:
     site XML
     standard XML
+    compact binary (.ucca)
     conll (CoNLL-X dependency parsing shared task)
     sdp (SemEval 2015 semantic dependency parsing shared task)
 """
@@ -14,13 +15,19 @@ The possible other formats are:
 import os
 import pickle
 import re
+import struct
 import sys
 import xml.etree.ElementTree as ET
 import xml.sax.saxutils
+from array import array
 from collections import defaultdict
+from contextlib import ExitStack
+from functools import partial, lru_cache
 from itertools import repeat, groupby
 from operator import attrgetter, itemgetter
 
+import numpy as np
+
 from ucca import textutil, core, layer0, layer1
 from ucca.layer1 import EdgeTags
 from ucca.normalization import attach_punct, COORDINATED_MAIN_REL
@@ -592,6 +599,46 @@ def to_site(passage):
     return root
 
 
+def _json_default(obj):
+    """Converts NumPy arrays and scalars (e.g. annotation in layer0.extra["doc"]) to lists and numbers for JSON."""
+    try:
+        return obj.tolist()
+    except AttributeError as e:
+        raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__) from e
+
+
+def _json_dumps(value):
+    return json.dumps(value, default=_json_default)
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _dumps_value(value):
+    return str(value) if type(value) in (str, bool) else _json_dumps(value)
+
+
+# This utility stringifies the Unit's attributes for proper XML
+# we don't need to escape the character - the serializer of the XML element
+# will do it (e.g. tostring())
+def _dumps(dic):
+    return {str(k): _dumps_value(v) if _hashable(v) else _json_dumps(v) for k, v in dic.items()}
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _get_extra(obj):
+    """Returns the extra dict of a Passage element, without creating it where it is created on first access."""
+    try:
+        return obj._extra
+    except AttributeError:
+        return obj.extra
+
+
 def to_standard(passage):
     """Converts a Passage object to a standard XML root element.
 
@@ -603,15 +650,10 @@ def to_standard(passage):
     :return: the root element of the standard XML structure
     """
 
-    # This utility stringifies the Unit's attributes for proper XML
-    # we don't need to escape the character - the serializer of the XML element
-    # will do it (e.g. tostring())
-    def _dumps(dic):
-        return {str(k): str(v) if type(v) in (str, bool) else json.dumps(v) for k, v in dic.items()}
-
     # Utility to add an extra element if exists in the object
     def _add_extra(obj, elem):
-        return obj.extra and ET.SubElement(elem, 'extra', _dumps(obj.extra))
+        extra = _get_extra(obj)
+        return extra and ET.SubElement(elem, 'extra', _dumps(extra))
 
     # Adds attributes element (even if empty)
     def _add_attrib(obj, elem):
@@ -636,101 +678,573 @@ def to_standard(passage):
                 _add_attrib(edge, edge_elem)
                 _add_extra(edge, edge_elem)
                 for category in edge:
-                    attrs = {}
-                    if category.tag:
-                        attrs["tag"] = category.tag
-                    if category.slot:
-                        attrs["slot"] = str(category.slot)
-                    if category.layer:
-                        attrs["layer_name"] = category.layer
-                    if category.parent:
-                        attrs["parent_name"] = category.parent
-                    category_elem = ET.SubElement(edge_elem, "category", **attrs)
+                    category_elem = ET.SubElement(edge_elem, "category", **_category_attrib(category))
                     _add_extra(category, category_elem)
     return root
 
 
+def _category_attrib(category):
+    attrs = {}
+    if category.tag:
+        attrs["tag"] = category.tag
+    if category.slot:
+        attrs["slot"] = str(category.slot)
+    if category.layer:
+        attrs["layer_name"] = category.layer
+    if category.parent:
+        attrs["parent_name"] = category.parent
+    return attrs
+
+
+def _escape_attrib(text):
+    """Escapes an attribute value exactly like :mod:`xml.etree.ElementTree` serialization does."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _standard_attr(key, value):
+    """Returns the XML string of an attribute, where value is already a string."""
+    return ' %s="%s"' % (key, _escape_attrib(value))
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _standard_dumped_attr(key, value):
+    """Returns the XML string of an attribute, converting its value with :func:`_dumps`."""
+    return _standard_attr(str(key), _dumps_value(value))
+
+
+def _standard_attrs(dic, dumps=True):
+    return "".join((_standard_dumped_attr(k, v) if _hashable(v) else _standard_attr(str(k), _json_dumps(v)))
+                   if dumps else _standard_attr(k, v) for k, v in dic.items())
+
+
+def write_standard(passage, f, indent=True):
+    """Writes a Passage as standard XML to a text file object, without building an element tree.
+
+    The output is identical to serializing :func:`to_standard` with ``ET.tostring`` (so non-ASCII characters are
+    written as character references), followed by :func:`textutil.indent_xml` if `indent' is True.
+
+    :param passage: the passage to write
+    :param f: text file object to write to
+    :param indent: whether to put each element on its own indented line (otherwise all are written in one line)
+    """
+    def _write(depth, line):
+        line = line.encode("ascii", "xmlcharrefreplace").decode("ascii")
+        f.write("  " * depth + line + "\n" if indent else line)
+
+    def _write_element(depth, tag, attrs="", attrib=None, extra=None, children=()):
+        if attrib is None and not extra and not children:
+            _write(depth, "<%s%s />" % (tag, attrs))
+            return
+        _write(depth, "<%s%s>" % (tag, attrs))
+        if attrib is not None:
+            _write(depth + 1, "<attributes%s />" % _standard_attrs(attrib))
+        if extra:
+            _write(depth + 1, "<extra%s />" % _standard_attrs(extra))
+        for child in children:
+            child(depth + 1)
+        _write(depth, "</%s>" % tag)
+
+    def _category(category):
+        return lambda depth: _write_element(depth, "category", _standard_attrs(_category_attrib(category), dumps=False),
+                                            extra=_get_extra(category))
+
+    def _edge(edge):
+        return lambda depth: _write_element(
+            depth, "edge", _standard_attrs({"toID": edge.child.ID, "type": edge.tag}, dumps=False), edge.attrib,
+            _get_extra(edge), list(map(_category, edge)))
+
+    def _node(node):
+        return lambda depth: _write_element(
+            depth, "node", _standard_attrs({"ID": node.ID, "type": node.tag}, dumps=False), node.attrib,
+            _get_extra(node), list(map(_edge, node)))
+
+    def _layer(layer):
+        return lambda depth: _write_element(
+            depth, "layer", _standard_attrs({"layerID": layer.ID}, dumps=False), layer.attrib, _get_extra(layer),
+            map(_node, layer.all))
+
+    _write_element(0, "root", _standard_attrs({"passageID": str(passage.ID), "annotationID": "0"}, dumps=False),
+                   passage.attrib, _get_extra(passage), map(_layer, sorted(passage.layers, key=attrgetter('ID'))))
+
+
+def _str2bool(x):
+    return x == "True"
+
+
+_STANDARD_ATTRIBUTE_CONVERTERS = {
+    'paragraph': int,
+    'paragraph_position': int,
+    'remote': _str2bool,
+    'implicit': _str2bool,
+    'uncertain': _str2bool,
+    'suggest': _str2bool,
+    None: str,
+}
+
+_STANDARD_LAYERS = {layer0.LAYER_ID: layer0.Layer0,
+                    layer1.LAYER_ID: layer1.Layer1}
+
+_STANDARD_NODES = {layer0.NodeTags.Word: layer0.Terminal,
+                   layer0.NodeTags.Punct: layer0.Terminal,
+                   layer1.NodeTags.Foundational: layer1.FoundationalNode,
+                   layer1.NodeTags.Linkage: layer1.Linkage,
+                   layer1.NodeTags.Punctuation: layer1.PunctNode}
+
+
+def _loads(x):
+    try:
+        return False if x == "False" else x == "True" or json.loads(x)
+    except JSONDecodeError:
+        return x
+
+
+def _get_standard_attrib(elem):
+    try:
+        return {k: _STANDARD_ATTRIBUTE_CONVERTERS.get(k, str)(v)
+                for k, v in elem.find('attributes').items()}
+    except AttributeError as e:
+        raise core.UCCAError("Element %s has no attributes" % elem.get("ID")) from e
+
+
+def _add_standard_extra(obj, elem, extra_funcs=None):
+    extra_elem = elem.find('extra')
+    if extra_elem is not None:
+        for k, v in extra_elem.items():
+            obj.extra[k] = (extra_funcs or {}).get(k, _loads)(v)
+        if isinstance(obj, layer0.Layer0):
+            _to_doc_arrays(obj)
+
+
+def _to_doc_arrays(l0):
+    """Replaces the annotation lists in layer0.extra["doc"] by compact arrays, where possible."""
+    docs = l0.extra.get("doc")
+    if docs and isinstance(docs, list):
+        l0.extra["doc"] = [textutil.to_doc_array(doc) for doc in docs]
+
+
+def _get_standard_categories(edge_elem):
+    categories = [(c.get('tag'), c.get('slot'), c.get('layer_name'), c.get('parent_name'))
+                  for c in edge_elem.findall('category')]
+    if not categories:  # an old xml format
+        categories.append((edge_elem.get('type'), "", "", ""))
+    return categories
+
+
+def _from_standard_node(node_elem, layer, created_nodes, extra_funcs=None):
+    """Creates a :class:`core`.Node from its standard XML element, or updates it if it was created automatically.
+
+    :return: the Node
+    """
+    node_id = node_elem.get('ID')
+    tag = node_elem.get('type')
+    node = created_nodes.get(node_id)
+    if node is None:
+        node = _STANDARD_NODES[tag](root=layer.root, ID=node_id, tag=tag, attrib=_get_standard_attrib(node_elem))
+    else:
+        for key, value in _get_standard_attrib(node_elem).items():
+            node.attrib[key] = value
+    _add_standard_extra(node, node_elem, extra_funcs)
+    return node
+
+
+def _from_standard_edge(from_node, to_node, edge_elem, extra_funcs=None):
+    edge = from_node.add_multiple(_get_standard_categories(edge_elem), to_node,
+                                  edge_attrib=_get_standard_attrib(edge_elem))
+    _add_standard_extra(edge, edge_elem, extra_funcs)
+    return edge
+
+
 def from_standard(root, extra_funcs=None):
-    def _str2bool(x):
-        return x == "True"
-
-    attribute_converters = {
-        'paragraph': int,
-        'paragraph_position': int,
-        'remote': _str2bool,
-        'implicit': _str2bool,
-        'uncertain': _str2bool,
-        'suggest': _str2bool,
-        None: str,
-    }
-
-    def _loads(x):
-        try:
-            return False if x == "False" else x == "True" or json.loads(x)
-        except JSONDecodeError:
-            return x
+    passage = core.Passage(root.get('passageID'), attrib=_get_standard_attrib(root))
+    _add_standard_extra(passage, root, extra_funcs)
+    edge_elems = []
+    with passage.bulk_build():
+        for layer_elem in root.findall('layer'):
+            layer_id = layer_elem.get('layerID')
+            layer = _STANDARD_LAYERS[layer_id](passage, attrib=_get_standard_attrib(layer_elem))
+            _add_standard_extra(layer, layer_elem, extra_funcs)
+            # some nodes are created automatically, skip creating them when found
+            # in the XML (they should have 'constant' IDs) but take their edges
+            # and attributes/extra from the XML (may have changed from the default)
+            created_nodes = {x.ID: x for x in layer.all}
+            for node_elem in layer_elem.findall('node'):
+                node = _from_standard_node(node_elem, layer, created_nodes, extra_funcs)
+                edge_elems += [(node, x) for x in node_elem.findall('edge')]
+
+        # Adding edges (must have all nodes before doing so)
+        for from_node, edge_elem in edge_elems:
+            _from_standard_edge(from_node, passage.by_id(edge_elem.get('toID')), edge_elem, extra_funcs)
+
+    return passage
 
-    layer_objs = {layer0.LAYER_ID: layer0.Layer0,
-                  layer1.LAYER_ID: layer1.Layer1}
 
-    node_objs = {layer0.NodeTags.Word: layer0.Terminal,
-                 layer0.NodeTags.Punct: layer0.Terminal,
-                 layer1.NodeTags.Foundational: layer1.FoundationalNode,
-                 layer1.NodeTags.Linkage: layer1.Linkage,
-                 layer1.NodeTags.Punctuation: layer1.PunctNode}
+def iter_from_standard(source, extra_funcs=None):
+    """Reads standard XML incrementally, yielding a Passage for every <root> element as soon as it is complete.
 
-    def _get_attrib(elem):
+    Unlike :func:`from_standard`, the whole document is never held in memory: each node is created as soon as its
+    element is closed, and the element is then discarded. Edges are created once their child node exists.
+    A file may contain several passages by wrapping their <root> elements with any other top-level element.
+
+    :param source: file name or file object of the XML
+    :param extra_funcs: dict of functions to convert "extra" values by key (as in :func:`from_standard`)
+
+    :return: generator of Passage objects
+    """
+    passage = layer = layer_elem = None
+    created_nodes = {}
+    nodes = {}  # ID -> node, for all nodes of the current passage
+    pending_edges = defaultdict(list)  # child node ID -> list of (parent node, edge element) waiting for the child
+    stack = []  # open elements
+    with ExitStack() as bulk_build:  # exited when a passage is complete, or on error
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if elem.tag == 'layer' and passage is None:  # the root attributes and extra were already read
+                    passage = core.Passage(stack[-1].get('passageID'), attrib=_get_standard_attrib(stack[-1]))
+                    _add_standard_extra(passage, stack[-1], extra_funcs)
+                    bulk_build.enter_context(passage.bulk_build())
+                elif elem.tag == 'node' and layer is None:  # the layer attributes and extra were already read
+                    layer = _STANDARD_LAYERS[layer_elem.get('layerID')](passage,
+                                                                        attrib=_get_standard_attrib(layer_elem))
+                    _add_standard_extra(layer, layer_elem, extra_funcs)
+                    created_nodes = {x.ID: x for x in layer.all}
+                    nodes.update(created_nodes)
+                if elem.tag == 'layer':
+                    layer_elem = elem
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag == 'node' and stack and stack[-1] is layer_elem:
+                node = nodes[elem.get('ID')] = _from_standard_node(elem, layer, created_nodes, extra_funcs)
+                for from_node, edge_elem in pending_edges.pop(node.ID, ()):
+                    _from_standard_edge(from_node, node, edge_elem, extra_funcs)
+                for edge_elem in elem.findall('edge'):
+                    to_node = nodes.get(edge_elem.get('toID'))
+                    if to_node is None:  # not created yet
+                        pending_edges[edge_elem.get('toID')].append((node, edge_elem))
+                    else:
+                        _from_standard_edge(node, to_node, edge_elem, extra_funcs)
+                layer_elem.remove(elem)
+            elif elem.tag == 'layer':
+                if layer is None:  # no nodes
+                    layer = _STANDARD_LAYERS[elem.get('layerID')](passage, attrib=_get_standard_attrib(elem))
+                    _add_standard_extra(layer, elem, extra_funcs)
+                    nodes.update((x.ID, x) for x in layer.all)
+                layer = layer_elem = None
+                stack[-1].remove(elem)
+            elif elem.tag == 'root':
+                if passage is None:  # no layers
+                    passage = core.Passage(elem.get('passageID'), attrib=_get_standard_attrib(elem))
+                    _add_standard_extra(passage, elem, extra_funcs)
+                bulk_build.close()
+                if pending_edges:
+                    raise KeyError("Edges to missing nodes: " + ", ".join(pending_edges))
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+                yield passage
+                passage = None
+                nodes = {}
+
+
+BINARY_MAGIC = b"UCCA"
+BINARY_VERSION = 2  # version 2 added layer 0 annotation arrays
+_BINARY_HEADER = struct.Struct("<4sHH")  # magic, version, reserved flags
+_BINARY_COUNT = struct.Struct("<I")
+_BINARY_INT = "i"  # typecode of the 32-bit signed integer columns
+_NO_INDEX = -1  # string index for None or for an empty dictionary
+_BINARY_DOC_DTYPE = textutil.DOC_DTYPE.newbyteorder("<")  # layer0.extra["doc"] arrays are stored little-endian
+
+
+class _BinaryWriter:
+    """Collects the tables of the compact binary format, interning all strings."""
+    def __init__(self):
+        self.strings = {}
+        self.chunks = []
+
+    def string(self, value):
+        if value is None:
+            return _NO_INDEX
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def dict(self, dic):
+        return self.string(_json_dumps(dic)) if dic else _NO_INDEX
+
+    def table(self, columns, rows):
+        """Adds a table as a row count followed by an int32 array, row by row."""
+        values = array(_BINARY_INT, (x for row in rows for x in row))
+        assert len(values) == columns * (len(values) // columns)
+        self.chunks.append(_BINARY_COUNT.pack(len(values) // columns))
+        if sys.byteorder == "big":
+            values.byteswap()
+        self.chunks.append(values.tobytes())
+
+    def raw(self, data):
+        self.chunks.append(data)
+
+    def tobytes(self):
+        encoded = [s.encode("utf-8") for s in self.strings]
+        lengths = array(_BINARY_INT, map(len, encoded))
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        return b"".join([_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0), _BINARY_COUNT.pack(len(encoded)),
+                         lengths.tobytes()] + encoded + self.chunks)
+
+
+class _BinaryReader:
+    """Reads back the tables written by :class:`_BinaryWriter`."""
+    def __init__(self, data):
+        self.data = memoryview(data)
+        if len(self.data) < _BINARY_HEADER.size:
+            raise core.UCCAError("Not a binary UCCA passage: too short")
+        magic, version, _ = _BINARY_HEADER.unpack_from(self.data)
+        if magic != BINARY_MAGIC:
+            raise core.UCCAError("Not a binary UCCA passage: bad header %r" % bytes(magic))
+        if version > BINARY_VERSION:
+            raise core.UCCAError("Unsupported binary UCCA format version %d (the latest supported is %d)" %
+                                 (version, BINARY_VERSION))
+        self.version = version
+        self.offset = _BINARY_HEADER.size
+        lengths = self._ints(self._count())
+        self.strings = []
+        for length in lengths:
+            self.strings.append(str(self.data[self.offset:self.offset + length], "utf-8"))
+            self.offset += length
+        self.strings.append(None)  # so that _NO_INDEX (-1) maps to None
+        self._dicts = {_NO_INDEX: ({}, True)}
+
+    def _count(self):
+        count, = _BINARY_COUNT.unpack_from(self.data, self.offset)
+        self.offset += _BINARY_COUNT.size
+        return count
+
+    def _ints(self, count):
+        values = array(_BINARY_INT)
+        end = self.offset + values.itemsize * count
+        if end > len(self.data):
+            raise core.UCCAError("Truncated binary UCCA passage")
+        values.frombytes(self.data[self.offset:end])
+        if sys.byteorder == "big":
+            values.byteswap()
+        self.offset = end
+        return values
+
+    def raw(self, size):
+        """:return: memoryview of the next `size' bytes"""
+        end = self.offset + size
+        if end > len(self.data):
+            raise core.UCCAError("Truncated binary UCCA passage")
+        data = self.data[self.offset:end]
+        self.offset = end
+        return data
+
+    def table(self, columns):
+        """:return: list of rows, each a tuple of `columns' ints"""
+        values = self._ints(self._count() * columns)
+        return list(zip(*[iter(values)] * columns))
+
+    def dict(self, index):
+        """:return: a new dict, decoded from the JSON string with the given index"""
         try:
-            return {k: attribute_converters.get(k, str)(v)
-                    for k, v in elem.find('attributes').items()}
-        except AttributeError as e:
-            raise core.UCCAError("Element %s has no attributes" % elem.get("ID")) from e
+            dic, flat = self._dicts[index]
+        except KeyError:
+            dic = json.loads(self.strings[index])
+            flat = all(type(v) in (str, int, float, bool, type(None)) for v in dic.values())
+            self._dicts[index] = dic, flat
+        return dic.copy() if flat else json.loads(self.strings[index])  # do not share mutable values
+
+
+def _terminal_row(writer, node):
+    """:return: (text, paragraph, paragraph_position) of a Terminal, and the rest of its attributes.
+                If the attributes do not fit the table, text index is -1 and all attributes are returned.
+                If they are not first and in this order, their keys are kept in place with None values.
+    """
+    attrib = node.attrib  # a copy for Terminals
+    text, paragraph, paragraph_position = (attrib.get(k) for k in layer0.ATTRIB_KEYS)
+    if (_TERMINAL_KEYS <= attrib.keys() and type(text) is str and
+            type(paragraph) is int and type(paragraph_position) is int):
+        in_order = tuple(attrib)[:len(layer0.ATTRIB_KEYS)] == layer0.ATTRIB_KEYS
+        for key in layer0.ATTRIB_KEYS:
+            if in_order:
+                del attrib[key]
+            else:  # e.g. read from standard XML, where the keys are sorted
+                attrib[key] = None
+        return (writer.string(text), paragraph, paragraph_position), attrib
+    return (_NO_INDEX, 0, 0), attrib
+
+
+_TERMINAL_KEYS = set(layer0.ATTRIB_KEYS)
+
+
+def _binary_id(writer, node):
+    """:return: (number, string index) of the unique part of the node ID: the number if it is a canonical integer,
+                and otherwise the string (with number -1)
+    """
+    unique = node.ID.partition(core.Node.ID_SEPARATOR)[2]
+    if unique.isdecimal() and str(int(unique)) == unique:
+        return int(unique), _NO_INDEX
+    return -1, writer.string(unique)
 
-    def _add_extra(obj, elem):
-        if elem.find('extra') is not None:
-            for k, v in elem.find('extra').items():
-                obj.extra[k] = (extra_funcs or {}).get(k, _loads)(v)
 
-    passage = core.Passage(root.get('passageID'), attrib=_get_attrib(root))
-    _add_extra(passage, root)
-    edge_elems = []
-    for layer_elem in root.findall('layer'):
-        layer_id = layer_elem.get('layerID')
-        layer = layer_objs[layer_id](passage, attrib=_get_attrib(layer_elem))
-        _add_extra(layer, layer_elem)
-        # some nodes are created automatically, skip creating them when found
-        # in the XML (they should have 'constant' IDs) but take their edges
-        # and attributes/extra from the XML (may have changed from the default)
-        created_nodes = {x.ID: x for x in layer.all}
-        for node_elem in layer_elem.findall('node'):
-            node_id = node_elem.get('ID')
-            tag = node_elem.get('type')
+def _binary_docs(passage):
+    """:return: list of arrays of the annotation in layer0.extra["doc"], if it can be stored as arrays, else None"""
+    try:
+        docs = passage.layer(layer0.LAYER_ID).extra.get("doc")
+    except KeyError:
+        return None
+    if docs and isinstance(docs, list):
+        docs = [textutil.to_doc_array(doc) for doc in docs]
+        if all(isinstance(doc, np.ndarray) for doc in docs):
+            return docs
+    return None
+
+
+def to_binary(passage):
+    """Converts a Passage object to the compact binary format.
+
+    The format starts with a header of the magic bytes "UCCA" and a format version, followed by a table of all
+    (interned) strings, and by int32 tables of layers, nodes, Terminal text and positions, edges and categories,
+    referring to strings and nodes by their index. Attributes and extra information are stored as interned JSON,
+    except for the annotation in layer0.extra["doc"], which is stored at the end as a table of paragraph lengths
+    followed by the raw little-endian arrays (see :data:`textutil.DOC_DTYPE`), unless it is not all numeric.
+    Like the standard XML format, it does not include the extra information of categories.
+
+    :param passage: the passage to convert
+    :return: bytes object
+    """
+    writer = _BinaryWriter()
+    layers = sorted(passage.layers, key=attrgetter('ID'))
+    nodes = [node for layer in layers for node in layer.all]
+    node_indices = {node.ID: i for i, node in enumerate(nodes)}
+    layer_indices = {layer.ID: i for i, layer in enumerate(layers)}
+    node_rows = []
+    terminal_rows = []
+    edge_rows = []
+    category_rows = []
+    for node in nodes:
+        if isinstance(node, layer0.Terminal):
+            terminal_row, attrib = _terminal_row(writer, node)
+            terminal_rows.append(terminal_row)
+        else:
+            attrib = node.attrib.copy()
+        node_rows.append((layer_indices[node.layer.ID],) + _binary_id(writer, node) +
+                         (writer.string(node.tag), writer.dict(attrib), writer.dict(_get_extra(node))))
+        for edge in node:
+            edge_rows.append((node_indices[edge.child.ID], writer.dict(edge.attrib.copy()),
+                              writer.dict(_get_extra(edge)), len(edge.categories)))
+            category_rows += [(writer.string(c.tag), writer.string(None if c.slot is None else str(c.slot)),
+                               writer.string(c.layer), writer.string(c.parent)) for c in edge]
+    docs = _binary_docs(passage)
+    passage_row = (writer.string(str(passage.ID)), writer.dict(passage.attrib.copy()), writer.dict(passage.extra))
+    layer_rows = [(writer.string(layer.ID), writer.dict(layer.attrib.copy()), writer.dict(
+        {k: v for k, v in layer.extra.items() if k != "doc"} if docs and layer.ID == layer0.LAYER_ID else layer.extra))
+                  for layer in layers]
+    writer.table(3, [passage_row])
+    writer.table(3, layer_rows)
+    writer.table(6, node_rows)
+    writer.table(3, terminal_rows)
+    writer.table(1, [(len(node.outgoing),) for node in nodes])
+    writer.table(4, edge_rows)
+    writer.table(4, category_rows)
+    writer.table(1, [(len(doc),) for doc in docs or ()])
+    writer.raw(b"".join(doc.astype(_BINARY_DOC_DTYPE, copy=False).tobytes() for doc in docs or ()))
+    return writer.tobytes()
+
+
+def from_binary(data):
+    """Converts bytes in the compact binary format (see :func:`to_binary`) to a Passage object.
+
+    :param data: bytes-like object
+    :return: a Passage object
+    :raise UCCAError: if the data is not in a supported version of the format
+    """
+    reader = _BinaryReader(data)
+    strings, dic = reader.strings, reader.dict
+    (passage_id, passage_attrib, passage_extra), = reader.table(3)
+    layer_rows = reader.table(3)
+    node_rows = reader.table(6)
+    terminal_rows = iter(reader.table(3))
+    outgoing_counts = reader.table(1)
+    edge_rows = reader.table(4)
+    category_rows = iter(reader.table(4))
+    doc_lengths = [length for length, in reader.table(1)] if reader.version >= 2 else ()
+    docs = np.frombuffer(reader.raw(sum(doc_lengths) * _BINARY_DOC_DTYPE.itemsize), dtype=_BINARY_DOC_DTYPE)
+    passage = core.Passage(strings[passage_id], attrib=dic(passage_attrib))
+    passage.extra.update(dic(passage_extra))
+    with passage.bulk_build():
+        layers = []
+        created_nodes = {}
+        for layer_id, attrib, extra in layer_rows:
+            layer = _STANDARD_LAYERS[strings[layer_id]](passage, attrib=dic(attrib))
+            layer.extra.update(dic(extra))
+            if isinstance(layer, layer0.Layer0):
+                if doc_lengths:
+                    layer.extra["doc"] = np.split(docs.astype(textutil.DOC_DTYPE), np.cumsum(doc_lengths)[:-1])
+                else:
+                    _to_doc_arrays(layer)
+            layers.append(layer)
+            created_nodes.update((x.ID, x) for x in layer.all)
+        layer_prefixes = [layer.ID + core.Node.ID_SEPARATOR for layer in layers]
+        rows = []  # (Node subclass, Layer, ID, tag, attrib, extra) of each node
+        for layer_index, number, unique, tag, attrib, extra in node_rows:
+            tag = strings[tag]
+            node_class = _STANDARD_NODES[tag]
+            attrib = dic(attrib)
+            if node_class is layer0.Terminal:
+                text, paragraph, paragraph_position = next(terminal_rows)
+                if text != _NO_INDEX:
+                    values = zip(layer0.ATTRIB_KEYS, (strings[text], paragraph, paragraph_position))
+                    if layer0.ATTRIB_KEYS[0] in attrib:  # keys kept in their original positions
+                        attrib.update(values)
+                    else:
+                        attrib = dict(values, **attrib)
+            rows.append((node_class, layers[layer_index],
+                         layer_prefixes[layer_index] + (strings[unique] if number == -1 else str(number)),
+                         tag, attrib, None if extra == _NO_INDEX else dic(extra)))
+        for _, _, node_id, _, attrib, extra in rows:
             node = created_nodes.get(node_id)
-            if node is None:
-                node = node_objs[tag](root=passage, ID=node_id, tag=tag, attrib=_get_attrib(node_elem))
-            else:
-                for key, value in _get_attrib(node_elem).items():
+            if node is not None:  # created with its layer
+                for key, value in attrib.items():
                     node.attrib[key] = value
-            _add_extra(node, node_elem)
-            edge_elems += [(node, x) for x in node_elem.findall('edge')]
-
-    # Adding edges (must have all nodes before doing so)
-    for from_node, edge_elem in edge_elems:
-        to_node = passage.nodes[edge_elem.get('toID')]
-        categories_elems = edge_elem.findall('category')
-        categories = []
-        for c in categories_elems:
-            tag = c.get('tag')
-            slot = c.get('slot')
-            layer = c.get('layer_name')
-            parent = c.get('parent_name')
-            categories.append((tag, slot, layer, parent))
-        if not categories:  # an old xml format
-            tag = edge_elem.get('type')
-            categories.append((tag, "", "", ""))
-        edge = from_node.add_multiple(categories, to_node, edge_attrib=_get_attrib(edge_elem))
-        _add_extra(edge, edge_elem)
-
+                node.extra.update(extra or ())
+        # All other nodes and all edges are created directly, since the passage is sorted and indexed on exit
+        created = iter(passage._create_nodes(row for row in rows if row[2] not in created_nodes))
+        nodes = [created_nodes.get(node_id) or next(created) for _, _, node_id, _, _, _ in rows]
+        categories = {}  # row of category string indices -> tuple of category fields
+        edge_rows = iter(edge_rows)
+
+        def _edges():
+            for node, (count,) in zip(nodes, outgoing_counts):
+                for _ in range(count):
+                    child, attrib, extra, num_categories = next(edge_rows)
+                    edge_categories = []
+                    for _ in range(num_categories):
+                        row = next(category_rows)
+                        fields = categories.get(row)
+                        if fields is None:
+                            fields = categories[row] = tuple(strings[i] for i in row)
+                        edge_categories.append(fields)
+                    yield (node, nodes[child], tuple(edge_categories), None if attrib == _NO_INDEX else dic(attrib),
+                           None if extra == _NO_INDEX else dic(extra))
+
+        passage._create_edges(_edges())
     return passage
 
 
@@ -754,31 +1268,32 @@ def from_text(text, passage_id="1", tokenized=False, one_per_line=False, extra_f
         text = text.splitlines()
     if tokenized:
         text = (text,)  # text is a list of tokens, not list of lines
-    p = l0 = paragraph = None
     i = 0
     passage_lines = []
+
+    def _create_passage():
+        p = core.Passage("%s_%d" % (passage_id, i), attrib=dict(lang=lang))
+        if extra_format is not None:
+            p.extra["format"] = extra_format
+        with p.bulk_build():
+            l0 = layer0.Layer0(p)
+            layer1.Layer1(p)
+            for paragraph, passage_line in enumerate(passage_lines, start=1):
+                for lex in textutil.get_tokenizer(tokenized, lang=lang)(passage_line):
+                    l0.add_terminal(text=lex.orth_, punct=lex.is_punct, paragraph=paragraph)
+        return (p, "\n".join(passage_lines)) if return_text else p
+
     for line in text:
         if not tokenized:
             line = line.strip()
         if line or one_per_line:
-            if p is None:
-                p = core.Passage("%s_%d" % (passage_id, i), attrib=dict(lang=lang))
-                if extra_format is not None:
-                    p.extra["format"] = extra_format
-                l0 = layer0.Layer0(p)
-                layer1.Layer1(p)
-                paragraph = 1
-            for lex in textutil.get_tokenizer(tokenized, lang=lang)(line):
-                l0.add_terminal(text=lex.orth_, punct=lex.is_punct, paragraph=paragraph)
-            paragraph += 1
             passage_lines.append(line)
-        if p and (not line or one_per_line):
-            yield (p, "\n".join(passage_lines)) if return_text else p
-            p = None
+        if passage_lines and (not line or one_per_line):
+            yield _create_passage()
             i += 1
             passage_lines = []
-    if p:
-        yield (p, "\n".join(passage_lines)) if return_text else p
+    if passage_lines:
+        yield _create_passage()
 
 
 def to_text(passage, sentences=True, lang="en", *args, **kwargs):
@@ -901,13 +1416,20 @@ def from_json(lines, *args, skip_category_mapping=False, by_external_id=False, *
     passage_id = d["passage"]["id"]
     attrib = get_json_attrib(d)
     base_layer, categories = get_categories_details(d)
-    base_slot = ""
     if by_external_id:
         attrib["passageID"] = passage_id
         external_id = d["passage"]["external_id"]
         assert external_id, "No external ID found for passage %s (task %s)" % (passage_id, d.get("id", "unknown"))
         passage_id = external_id
     passage = core.Passage(str(passage_id), attrib=attrib)
+    with passage.bulk_build():
+        _from_json_units(d, passage, categories, base_layer, skip_category_mapping)
+    yield passage
+
+
+def _from_json_units(d, passage, categories, base_layer, skip_category_mapping):
+    """Creates the terminals and the annotation units of a UCCA-App JSON dict in the given passage."""
+    base_slot = ""
 
     # Create terminals
     l0 = layer0.Layer0(passage)
@@ -1001,8 +1523,6 @@ def from_json(lines, *args, skip_category_mapping=False, by_external_id=False, *
         if skip_category_mapping or not layer0.is_punct(terminal):
             node.add(EdgeTags.Terminal, terminal)
 
-    yield passage
-
 
 IGNORED_EDGE_TAGS = {EdgeTags.Punctuation, EdgeTags.Terminal}
 
@@ -1126,20 +1646,24 @@ def to_json(passage, *args, return_dict=False, tok_task=None, all_categories=Non
     return d if return_dict else json.dumps(d).splitlines()
 
 
-def file2passage(filename):
+def file2passage(filename, stream=False):
     """Opens a file and returns its parsed Passage object
-    Tries to read both as a standard XML file and as a binary pickle
+    Tries to read both as a standard XML file and as a binary pickle, or as the compact binary format (see
+    :func:`to_binary`) if the file name ends with ".ucca"
     :param filename: file name to write to
+    :param stream: whether to read XML incrementally (see :func:`iter_from_standard`)
     """
-    methods = [pickle2passage, xml2passage]
+    methods = [pickle2passage, partial(xml2passage, stream=stream)]
     _, ext = os.path.splitext(filename)
     ext = ext.lower()
     if ext == ".xml":
         del methods[0]
     elif ext == ".pickle":
         del methods[1]
+    elif ext == ".ucca":
+        methods = [binary2passage]
     else:
-        raise IOError("file2passage accepts only 'xml' and 'pickle' files.")
+        raise IOError("file2passage accepts only 'xml', 'pickle' and 'ucca' files.")
     exception = None
     for method in methods:
         try:
@@ -1150,7 +1674,15 @@ def file2passage(filename):
         raise IOError("Failed reading '%s'" % filename) from exception
 
 
-def xml2passage(filename):
+def xml2passage(filename, stream=False):
+    if stream:
+        passages = iter_from_standard(filename)
+        try:
+            return next(passages)
+        except StopIteration as e:
+            raise core.UCCAError("No passage found in '%s'" % filename) from e
+        finally:
+            passages.close()
     with open(filename, encoding="utf-8") as f:
         return from_standard(ET.ElementTree().parse(f))
 
@@ -1160,22 +1692,28 @@ def pickle2passage(filename):
         return pickle.load(h)
 
 
+def binary2passage(filename):
+    with open(filename, "rb") as h:
+        return from_binary(h.read())
+
+
 def passage2file(passage, filename, indent=True, binary=False):
-    """Writes a UCCA passage as a standard XML file or a binary pickle
+    """Writes a UCCA passage as a standard XML file or a binary pickle,
+    or in the compact binary format (see :func:`to_binary`) if the file name ends with ".ucca"
     :param passage: passage object to write
     :param filename: file name to write to
     :param indent: whether to indent each line
     :param binary: whether to write pickle format (or XML)
     """
-    if binary:
+    if os.path.splitext(filename)[1].lower() == ".ucca":
+        with open(filename, "wb") as h:
+            h.write(to_binary(passage))
+    elif binary:
         with open(filename, "wb") as h:
             pickle.dump(passage, h)
     else:  # xml
-        root = to_standard(passage)
-        xml_string = ET.tostring(root).decode()
-        output = textutil.indent_xml(xml_string) if indent else xml_string
         with open(filename, "w", encoding="utf-8") as h:
-            h.write(output)
+            write_standard(passage, h, indent=indent)
 
 
 def split2sentences(passage, remarks=False, lang="en", ids=None):
@@ -1219,31 +1757,32 @@ def split_passage(passage, ends, remarks=False, ids=None, suffix_format="%03d",
         other.extra = passage.extra.copy()
         # Create terminals and find layer 1 nodes to be included
         l0 = passage.layer(layer0.LAYER_ID)
-        other_l0 = layer0.Layer0(root=other, attrib=l0.attrib.copy())
-        other_l0.extra = l0.extra.copy()
-        level = set()
-        nodes = set()
-        id_to_other = {}
-        paragraphs = []
-        for terminal in l0.all[start:end]:
-            other_terminal = other_l0.add_terminal(terminal.text, terminal.punct, 1)
-            _copy_extra(terminal, other_terminal, remarks)
-            other_terminal.extra["orig_paragraph"] = terminal.paragraph
-            if terminal.paragraph not in paragraphs:
-                paragraphs.append(terminal.paragraph)
-            id_to_other[terminal.ID] = other_terminal
-            level.update(terminal.parents)
-            nodes.add(terminal)
-        while level:
-            nodes.update(level)
-            level = set(e.parent for n in level for e in n.incoming if not e.attrib.get("remote") and
-                        e.tag != layer1.EdgeTags.Punctuation and e.parent not in nodes)
-
-        other_l1 = layer1.Layer1(root=other, attrib=passage.layer(layer1.LAYER_ID).attrib.copy())
-        _copy_l1_nodes(passage, other, id_to_other, set(nodes), remarks=remarks)
+        with other.bulk_build():
+            other_l0 = layer0.Layer0(root=other, attrib=l0.attrib.copy())
+            other_l0.extra = l0.extra.copy()
+            level = set()
+            nodes = set()
+            id_to_other = {}
+            paragraphs = []
+            for terminal in l0.all[start:end]:
+                other_terminal = other_l0.add_terminal(terminal.text, terminal.punct, 1)
+                _copy_extra(terminal, other_terminal, remarks)
+                other_terminal.extra["orig_paragraph"] = terminal.paragraph
+                if terminal.paragraph not in paragraphs:
+                    paragraphs.append(terminal.paragraph)
+                id_to_other[terminal.ID] = other_terminal
+                level.update(terminal.parents)
+                nodes.add(terminal)
+            while level:
+                nodes.update(level)
+                level = set(e.parent for n in level for e in n.incoming if not e.attrib.get("remote") and
+                            e.tag != layer1.EdgeTags.Punctuation and e.parent not in nodes)
+
+            other_l1 = layer1.Layer1(root=other, attrib=passage.layer(layer1.LAYER_ID).attrib.copy())
+            _copy_l1_nodes(passage, other, id_to_other, set(nodes), remarks=remarks)
         attach_punct(other_l0, other_l1)
         for j, paragraph in enumerate(paragraphs, start=1):
-            other_l0.doc(j)[:] = l0.doc(paragraph)
+            other_l0.docs(j)[j - 1] = l0.doc(paragraph).copy()
         other.frozen = passage.frozen
         passages.append(other)
     return passages
@@ -1267,22 +1806,25 @@ def join_passages(passages, passage_id=None, remarks=False):
     layer1.Layer1(root=other, attrib=l1.attrib.copy())
     id_to_other = {}
     paragraph = 0
-    for passage in passages:
-        l0 = passage.layer(layer0.LAYER_ID)
-        paragraphs = set()
-        for terminal in l0.all:
-            if terminal.para_pos == 1:
-                paragraph += 1
-            orig_paragraph = terminal.extra.get("orig_paragraph")
-            if orig_paragraph is not None:
-                paragraph = orig_paragraph
-            paragraphs.add(paragraph)
-            other_terminal = other_l0.add_terminal(terminal.text, terminal.punct, paragraph)
-            _copy_extra(terminal, other_terminal, remarks)
-            id_to_other[terminal.ID] = other_terminal
-        for paragraph in paragraphs:
-            other_l0.doc(paragraph).extend(l0.doc(1))
-        _copy_l1_nodes(passage, other, id_to_other, remarks=remarks)
+    with other.bulk_build():
+        for passage in passages:
+            l0 = passage.layer(layer0.LAYER_ID)
+            paragraphs = set()
+            for terminal in l0.all:
+                if terminal.para_pos == 1:
+                    paragraph += 1
+                orig_paragraph = terminal.extra.get("orig_paragraph")
+                if orig_paragraph is not None:
+                    paragraph = orig_paragraph
+                paragraphs.add(paragraph)
+                other_terminal = other_l0.add_terminal(terminal.text, terminal.punct, paragraph)
+                _copy_extra(terminal, other_terminal, remarks)
+                id_to_other[terminal.ID] = other_terminal
+            for paragraph in paragraphs:
+                docs = other_l0.docs(paragraph)
+                docs[paragraph - 1] = list(docs[paragraph - 1]) + list(l0.doc(1))
+            _copy_l1_nodes(passage, other, id_to_other, remarks=remarks)
+    _to_doc_arrays(other_l0)
     return other
 
 
@@ -1297,6 +1839,7 @@ def _copy_l1_nodes(passage, other, id_to_other, include=None, remarks=False):
     """
     l1 = passage.layer(layer1.LAYER_ID)
     other_l1 = other.layer(layer1.LAYER_ID)
+    other_head = other_l1.heads[0]
     queue = [(n, None) for n in l1.heads]
     linkages = []
     remotes = []
@@ -1309,7 +1852,7 @@ def _copy_l1_nodes(passage, other, id_to_other, include=None, remarks=False):
             continue
         if other_node is None:
             heads.append(node)
-            other_node = other_l1.heads[0]
+            other_node = other_head
         for edge in node:
             is_remote = edge.attrib.get("remote", False)
             if include is None or edge.child in include or _unanchored(edge.child):
@@ -8,7 +8,10 @@ are connected between themselves and to Nodes in other layers using
 
 """
 
+import copy
 import functools
+import operator
+from contextlib import contextmanager
 
 # Max number of digits allowed for a unique ID
 UNIQUE_ID_MAX_DIGITS = 5
@@ -17,6 +20,21 @@ UNIQUE_ID_MAX_DIGITS = 5
 IRRELEVANT_ATTRIBUTES = {"uncertain"}
 
 
+def _id_key(ID):
+    """Computes the cached sort key of a :class:`Node` ID.
+
+    Args:
+        ID: the complete ID of the Node, "<layer ID><separator><unique ID>"
+
+    Returns:
+        a string with the layer and unique ID in such a way that sort will
+        first order lexicography the layer ID then numerically the unique ID.
+
+    """
+    layer, _, unique = ID.partition(Node.ID_SEPARATOR)
+    return "{} {:>{}}".format(layer, unique, UNIQUE_ID_MAX_DIGITS)
+
+
 # Used as the default ordering key function for ordered objects, namely
 # :class:`Layer` and :class:`Node` .
 def id_orderkey(node):
@@ -28,10 +46,10 @@ def id_orderkey(node):
     Returns:
         a string with the layer and unique ID in such a way that sort will
         first order lexicography the layer ID then numerically the unique ID.
+        The key is computed once when the Node is created.
 
     """
-    layer, unique = node.ID.split(Node.ID_SEPARATOR)
-    return "{} {:>{}}".format(layer, unique, UNIQUE_ID_MAX_DIGITS)
+    return node._id_key
 
 
 def edge_id_orderkey(edge):
@@ -42,12 +60,142 @@ def edge_id_orderkey(edge):
         parent and children after using :func:`id_orderkey`.
 
     Returns:
-        a string with the layer and unique ID in such a way that sort will
-        first order lexicography the layer ID then numerically the unique ID.
+        a string with the keys of the parent and the child, in such a way that
+        sort will first order by the parent then by the child.
+        The key is computed once when the Edge is created.
+
+    """
+    try:
+        return edge._id_key
+    except AttributeError:  # pickled before the sort key was cached
+        edge._id_key = key = _edge_id_key(edge)
+        return key
+
+
+def _edge_id_key(edge):
+    return Edge.ID_FORMAT.format(edge._parent._id_key, edge._child._id_key)
+
+
+_edge_parent = operator.attrgetter("_parent")
+_edge_child = operator.attrgetter("_child")
+
+
+def _hashable(value):
+    """Returns a hashable value equal to the given one, converting (possibly nested) lists, sets and dicts."""
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_hashable, value))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(map(_hashable, value))
+    if isinstance(value, dict):
+        return frozenset((k, _hashable(v)) for k, v in value.items())
+    return value
+
+
+def _attrib_key(attrib):
+    """Returns a hashable key of an :class:`_AttributeDict`, equal for dicts that are equal by its `equals` method."""
+    return frozenset((k, _hashable(v)) for k, v in attrib.items() if k not in IRRELEVANT_ATTRIBUTES)
+
+
+class _Fingerprints:
+    """Computes structural fingerprints of Node subgraphs, to compare them without nested pairwise comparisons.
+
+    A fingerprint is an int, equal for two Nodes iff they are recursively Node-equal (see :meth:`Node.equals`),
+    given the same `ordered`, `ignore_node` and `ignore_edge` settings.
+    Fingerprints are computed bottom-up, once per Node, by interning the key of each Node (see
+    :meth:`Node._fingerprint_key`) together with the keys of its outgoing Edges and the fingerprints of their
+    children, so they are only comparable between Nodes fingerprinted by the same object.
+
+    Args:
+        ordered: whether the order of outgoing Edges matters
+        ignore_node: function that returns whether to ignore a given node
+        ignore_edge: function that returns whether to ignore a given edge
 
     """
-    return Edge.ID_FORMAT.format(id_orderkey(edge.parent),
-                                 id_orderkey(edge.child))
+
+    def __init__(self, ordered=False, ignore_node=None, ignore_edge=None):
+        self.ordered = ordered
+        self.ignore_node = ignore_node
+        self.ignore_edge = ignore_edge
+        self._interned = {}
+        self._nodes = {}  # id(node) -> fingerprint
+
+    def _intern(self, key):
+        return self._interned.setdefault(key, len(self._interned))
+
+    def edges(self, node):
+        """Returns the outgoing Edges of a Node which are not ignored."""
+        if self.ignore_node is None and self.ignore_edge is None:
+            return node._outgoing
+        return [edge for edge in node._outgoing
+                if (self.ignore_node is None or not self.ignore_node(edge._child)) and (
+                    self.ignore_edge is None or not self.ignore_edge(edge))]
+
+    def edge(self, edge):
+        """Returns the fingerprint of an Edge, together with the subgraph of its child."""
+        return self._intern((edge.tag, _attrib_key(edge._attrib), self.node(edge._child)))
+
+    def node(self, node):
+        """Returns the fingerprint of the subgraph of a Node."""
+        fingerprint = self._nodes.get(id(node))
+        if fingerprint is not None:
+            return fingerprint
+        pending = set()
+        stack = [node]
+        while stack:  # iterative post-order traversal, to support deep graphs
+            current = stack[-1]
+            if id(current) in self._nodes:
+                stack.pop()
+            elif id(current) not in pending:
+                pending.add(id(current))
+                stack.extend(child for child in map(_edge_child, self.edges(current))
+                             if id(child) not in self._nodes and id(child) not in pending)
+            else:
+                stack.pop()
+                pending.discard(id(current))
+                children = [self._intern((edge.tag, _attrib_key(edge._attrib), self._child(edge._child)))
+                            for edge in self.edges(current)]
+                if not self.ordered:
+                    children.sort()
+                self._nodes[id(current)] = self._intern((current._fingerprint_key(), tuple(children)))
+        return self._nodes[id(node)]
+
+    def _child(self, node):
+        fingerprint = self._nodes.get(id(node))
+        if fingerprint is None:  # still pending, so there is a cycle: just use the non-recursive key
+            fingerprint = self._intern(("cycle", node._fingerprint_key()))
+        return fingerprint
+
+    def equal(self, nodes, other_nodes):
+        """Returns whether two sequences of Nodes are equal, as multisets if not ordered, or as lists if ordered."""
+        if len(nodes) != len(other_nodes):
+            return False
+        fingerprints, other_fingerprints = [list(map(self.node, n)) for n in (nodes, other_nodes)]
+        if not self.ordered:
+            fingerprints.sort()
+            other_fingerprints.sort()
+        return fingerprints == other_fingerprints
+
+
+@functools.lru_cache(maxsize=None)
+def _slot_names(cls):
+    """Returns the names of all slots defined for the given class and its bases."""
+    return tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ()))
+
+
+def _get_slots_state(obj):
+    """Returns the pickled state of an object with __slots__: a dict, as if it had no __slots__."""
+    state = {}
+    for name in _slot_names(type(obj)):
+        value = getattr(obj, name, _get_slots_state)
+        if value is not _get_slots_state:
+            state[name] = value
+    return state
+
+
+def _set_slots_state(obj, state):
+    """Restores an object with __slots__ from a pickled dict, also from before __slots__ were used."""
+    for name, value in state.items():
+        setattr(obj, name, value)
 
 
 class UCCAError(Exception):
@@ -135,22 +283,29 @@ class _AttributeDict:
     This dictionary is used to store attributes which are part of any
     element in the UCCA annotation scheme. It's advantage over regular
     dictionary is adhering to :class:`Passage` frozen status and modification
-    decorators.
+    decorators. The underlying dict is only created when first written to.
 
     Attributes:
         root: the Passage this object is linked with
+        owner: optional object whose _attrib_changed method is called with the
+            keys of every modification
 
     """
 
-    def __init__(self, root, mapping=None):
+    __slots__ = ("_root", "_dict", "_owner")
+
+    def __init__(self, root, mapping=None, owner=None):
         self._root = root
-        self._dict = mapping.copy() if mapping is not None else dict()
+        self._dict = mapping.copy() if mapping else None
+        self._owner = owner
 
     def __getitem__(self, key):
+        if self._dict is None:
+            raise KeyError(key)
         return self._dict[key]
 
     def get(self, key, default=None):
-        return self._dict.get(key, default)
+        return default if self._dict is None else self._dict.get(key, default)
 
     def equals(self, other):
         """True iff the two objects are equal (only dicts, w.o.r.t Passage).
@@ -162,32 +317,68 @@ class _AttributeDict:
         def omit_irrelevant(d):
             return {k: v for k, v in d.items() if k not in IRRELEVANT_ATTRIBUTES}
 
-        return omit_irrelevant(self._dict) == omit_irrelevant(other._dict)
+        return omit_irrelevant(self) == omit_irrelevant(other)
 
     @property
     def root(self):
         return self._root
 
     def copy(self):
-        return self._dict.copy()
+        return {} if self._dict is None else self._dict.copy()
 
     @ModifyPassage
     def __setitem__(self, key, value):
+        if self._dict is None:
+            self._dict = {}
         self._dict[key] = value
+        if self._owner is not None:
+            self._owner._attrib_changed((key,))
 
     @ModifyPassage
     def update(self, values):
+        values = dict(values)
+        if self._dict is None:
+            self._dict = {}
         self._dict.update(values)
+        if self._owner is not None:
+            self._owner._attrib_changed(values.keys())
 
     @ModifyPassage
     def __delitem__(self, key):
+        if self._dict is None:
+            raise KeyError(key)
         del self._dict[key]
+        if self._owner is not None:
+            self._owner._attrib_changed((key,))
 
     def __len__(self):
-        return len(self._dict)
+        return 0 if self._dict is None else len(self._dict)
 
     def items(self):
-        return self._dict.items()
+        return {}.items() if self._dict is None else self._dict.items()
+
+    @classmethod
+    def _create(cls, root, dic=None, owner=None):
+        """Returns an attribute dictionary using the given dict as is, without copying it (see :meth:`Node._create`)."""
+        attrib = cls.__new__(cls)
+        attrib._root = root
+        attrib._dict = dic or None
+        attrib._owner = owner
+        return attrib
+
+    def _clone(self, root, owner=None):
+        """Returns a copy of this dictionary for another Passage (see :meth:`Passage.clone`)."""
+        other = _AttributeDict.__new__(_AttributeDict)
+        other._root = root
+        other._dict = None if self._dict is None else self._dict.copy()
+        other._owner = owner
+        return other
+
+    __getstate__ = _get_slots_state
+
+    def __setstate__(self, state):
+        self._dict = self._owner = None
+        _set_slots_state(self, state)
 
 
 class Category:
@@ -196,12 +387,14 @@ class Category:
     information.
     """
 
+    __slots__ = ("_tag", "_slot", "_layer", "_parent", "_extra")
+
     def __init__(self, tag, slot=None, layer=None, parent=None):
         self._tag = tag
         self._slot = slot if slot else ""
         self._layer = layer if layer else ""
         self._parent = parent if parent else ""
-        self.extra = {}
+        self._extra = None
 
     @property
     def tag(self):
@@ -227,12 +420,34 @@ class Category:
     def parent(self, new_parent):
         self._parent = new_parent
 
+    @property
+    def extra(self):
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, value):
+        self._extra = value
+
     def to_xml(self):
         pass
 
     def __iter__(self):
         return iter((self.tag, self.slot, self.layer, self.parent))
 
+    def _clone(self):
+        """Returns a copy of this Category for a copy of its Edge (see :meth:`Passage.clone`)."""
+        other = Category(*self)
+        other._extra = None if self._extra is None else copy.deepcopy(self._extra)
+        return other
+
+    __getstate__ = _get_slots_state
+
+    def __setstate__(self, state):
+        self._extra = None
+        _set_slots_state(self, state)
+
 
 class Edge:
     """Labeled edge between two :class:`Node` objects in UCCA annotation graph.
@@ -247,7 +462,8 @@ class Edge:
         ID: ID of the Edge, constructed from the IDs of the two Nodes
         root: the Passage this object is linked with
         attrib: attribute dictionary of the Edge
-        extra: temporary storage space for undocumented attributes and data
+        extra: temporary storage space for undocumented attributes and data,
+            created on first access
         tag: the string label of the Edge
         parent: the originating Node of the Edge
         child: the target Node of the Edge
@@ -260,6 +476,8 @@ class Edge:
 
     ID_FORMAT = "{}->{}"
 
+    __slots__ = ("_root", "_parent", "_child", "_id_key", "_attrib", "_categories", "_extra")
+
     def __init__(self, root, parent, child, tag=None, attrib=None):
         """Creates a new :class:`Edge` object.
 
@@ -274,9 +492,10 @@ class Edge:
         self._root = root
         self._parent = parent
         self._child = child
-        self._attrib = _AttributeDict(root, attrib)
+        self._id_key = _edge_id_key(self)
+        self._attrib = _AttributeDict(root, attrib, owner=self)
         self._categories = [Category(tag)] if tag else []
-        self.extra = {}
+        self._extra = None
 
     @property
     def tag(self):
@@ -293,6 +512,10 @@ class Edge:
     def tags(self):
         return [category.tag for category in self.categories]
 
+    def _attrib_changed(self, keys):
+        if "remote" in keys:  # the parent's span depends on which of its Edges are remote
+            self._parent._invalidate_spans()
+
     @property
     def root(self):
         return self._root
@@ -321,6 +544,16 @@ class Edge:
     def attrib(self):
         return self._attrib
 
+    @property
+    def extra(self):
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, value):
+        self._extra = value
+
     @property
     def ID(self):
         return Edge.ID_FORMAT.format(self._parent.ID, self._child.ID)
@@ -368,6 +601,28 @@ class Edge:
     def __getitem__(self, index):
         return self.categories[index]
 
+    def __iter__(self):
+        return iter(self.categories)
+
+    def _clone(self, root, parent, child):
+        """Returns a copy of this Edge between the given copies of its Nodes (see :meth:`Passage.clone`)."""
+        other = Edge.__new__(type(self))
+        other._root = root
+        other._parent = parent
+        other._child = child
+        other._id_key = self._id_key
+        other._attrib = self._attrib._clone(root, owner=other)
+        other._categories = [c._clone() for c in self.categories]
+        other._extra = None if self._extra is None else copy.deepcopy(self._extra)
+        return other
+
+    __getstate__ = _get_slots_state
+
+    def __setstate__(self, state):
+        self._extra = None
+        _set_slots_state(self, state)
+        self._attrib._owner = self  # not pickled before the attributes had an owner
+
 
 class Node:
     """Labeled Node in UCCA annotation graph.
@@ -383,7 +638,8 @@ class Node:
             a separator, and a unique alphanumeric ID in the layer.
         root: the Passage this object is linked with
         attrib: attribute dictionary of the Node
-        extra: temporary storage space for undocumented attributes and data
+        extra: temporary storage space for undocumented attributes and data,
+            created on first access
         tag: the string label of the Node
         layer: the Layer this Node belongs to
         incoming: a copy of the incoming Edges to this object
@@ -398,6 +654,11 @@ class Node:
 
     ID_SEPARATOR = '.'
 
+    # _spans: cached Terminal span, computed and used by subclasses which support it
+    # _layer: the Layer of the Node, bound when it is created (or on first access, if unpickled or cloned)
+    __slots__ = ("_tag", "_root", "_ID", "_id_key", "_attrib", "_extra", "_outgoing", "_incoming", "_orderkey",
+                 "_spans", "_layer")
+
     def __init__(self, ID, root, tag, attrib=None, *,
                  orderkey=edge_id_orderkey):
         """Creates a new :class:`Node` object.
@@ -413,18 +674,22 @@ class Node:
         self._tag = tag
         self._root = root
         self._ID = ID
+        self._id_key = _id_key(ID)
         self._attrib = _AttributeDict(root, attrib)
-        self.extra = {}
+        self._extra = None
         self._outgoing = []
         self._incoming = []
         self._orderkey = orderkey
+        self._spans = None
+        layer_id = ID.partition(Node.ID_SEPARATOR)[0]
+        try:
+            self._layer = root.layer(layer_id)
+        except KeyError as e:
+            raise ValueError("Invalid layer '%s' in node ID '%s'" % (layer_id, self._ID)) from e
 
         # After properly initializing self, add it to the Passage/Layer
         root._add_node(self)
-        try:
-            root.layer(self.layer.ID)._add_node(self)
-        except KeyError as e:
-            raise ValueError("Invalid layer '%s' in node ID '%s'" % (self.layer.ID, self._ID)) from e
+        self._layer._add_node(self)
 
     @property
     def tag(self):
@@ -435,6 +700,7 @@ class Node:
     def tag(self, new_tag):
         old_tag = self._tag
         self._tag = new_tag
+        self._invalidate_spans()
         self._root._change_node_tag(self, old_tag)
 
     @property
@@ -449,9 +715,22 @@ class Node:
     def attrib(self):
         return self._attrib
 
+    @property
+    def extra(self):
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, value):
+        self._extra = value
+
     @property
     def layer(self):
-        return self._root.layer(self._ID.split(Node.ID_SEPARATOR)[0])
+        layer = self._layer
+        if layer is None:
+            layer = self._layer = self._root.layer(self._ID.partition(Node.ID_SEPARATOR)[0])
+        return layer
 
     @property
     def incoming(self):
@@ -469,6 +748,21 @@ class Node:
     def children(self):
         return [edge.child for edge in self._outgoing]
 
+    def iter_incoming(self):
+        """Returns an iterator over the incoming Edges, without copying them.
+
+        The Node must not be modified while iterating; use :attr:`incoming` for that.
+        """
+        return iter(self._incoming)
+
+    def iter_parents(self):
+        """Returns an iterator over the parent Nodes, without creating a list (see :meth:`iter_incoming`)."""
+        return map(_edge_parent, self._incoming)
+
+    def iter_children(self):
+        """Returns an iterator over the child Nodes, without creating a list (see :meth:`iter_incoming`)."""
+        return map(_edge_child, self._outgoing)
+
     def __bool__(self):
         return True
 
@@ -481,6 +775,32 @@ class Node:
     def __repr__(self):
         return Node.__name__ + "(" + self.ID + ")"
 
+    def _clone(self, root):
+        """Returns a copy of this Node for another Passage, without Edges (see :meth:`Passage.clone`)."""
+        other = Node.__new__(type(self))
+        other._tag = self._tag
+        other._root = root
+        other._ID = self._ID
+        other._id_key = self._id_key
+        other._attrib = self._attrib._clone(root)
+        other._extra = None if self._extra is None else copy.deepcopy(self._extra)
+        other._outgoing = []
+        other._incoming = []
+        other._orderkey = self._orderkey
+        other._spans = other._layer = None
+        return other
+
+    def __getstate__(self):
+        state = _get_slots_state(self)
+        state.pop("_layer", None)  # bound again on first access
+        return state
+
+    def __setstate__(self, state):
+        self._extra = self._spans = self._layer = None
+        _set_slots_state(self, state)
+        if "_id_key" not in state:  # pickled before the sort key was cached
+            self._id_key = _id_key(self._ID)
+
     @ModifyPassage
     def add_multiple(self, edge_categories, node, *, edge_attrib=None):
         """Adds another :class:`Node` object as a child of self.
@@ -502,9 +822,13 @@ class Node:
         for category in edge_categories:
             edge.add(*category)
         self._outgoing.append(edge)
-        self._outgoing.sort(key=self._orderkey)
         node._incoming.append(edge)
-        node._incoming.sort(key=node._orderkey)
+        self._invalidate_spans()
+        if self._root._bulk_depth:  # sorted once when the bulk build is over
+            self._root._unsorted_nodes.update((self, node))
+        else:
+            self._outgoing.sort(key=self._orderkey)
+            node._incoming.sort(key=node._orderkey)
         self.root._add_edge(edge)
         return edge
 
@@ -552,10 +876,27 @@ class Node:
         try:
             self._outgoing.remove(edge)
             edge.child._incoming.remove(edge)
+            self._invalidate_spans()
             self.root._remove_edge(edge)
         except ValueError as e:
             raise MissingNodeError(edge_or_node) from e
 
+    def _invalidate_spans(self):
+        """Clears the cached Terminal spans of self and of all its ancestors.
+
+        A cached span implies cached spans for all non-remote descendants, so
+        the ancestors are only traversed until reaching one with no cached span.
+
+        """
+        if self._spans is not None:
+            self._spans = None
+        waiting = [edge.parent for edge in self._incoming]
+        while waiting:
+            node = waiting.pop()
+            if node._spans is not None:
+                node._spans = None
+                waiting.extend(edge.parent for edge in node._incoming if not edge.attrib.get("remote"))
+
     @property
     def orderkey(self):
         return self._orderkey
@@ -606,31 +947,14 @@ class Node:
             return False
         if not recursive:
             return True
-        edges, other_edges = [[edge for edge in node
-                               if (ignore_node is None or
-                                   not ignore_node(edge.child)) and (
-                                       ignore_edge is None or
-                                       not ignore_edge(edge))]
-                              for node in (self, other)]
-        if len(edges) != len(other_edges):
-            return False  # not necessary, but gives better performance
-        if ordered:
-            return all(e1.equals(e2, ordered=True,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge)
-                       for e1, e2 in zip(edges, other_edges))
-        # For unordered equality, I try to find & remove an equivalent
-        # Edge + Node couple from other's Edges until exhausted.
-        # Because both Edge-equality and Node-equality are equivalence
-        # classes, I can just take the first I found and remove it w/o
-        # trying to iterate through possible orders.
-        try:
-            for e1 in edges:
-                other_edges.remove(next(e2 for e2 in other_edges
-                                        if e1.equals(e2, ignore_node=ignore_node,
-                                                     ignore_edge=ignore_edge)))
-        except StopIteration:
-            return False
-        return not other_edges
+        # Both subgraphs are fingerprinted bottom-up, so that unordered comparison of the Edges is a comparison of
+        # sorted fingerprints, rather than a search for an equivalent Edge + Node couple for each Edge
+        fingerprints = _Fingerprints(ordered=ordered, ignore_node=ignore_node, ignore_edge=ignore_edge)
+        return fingerprints.node(self) == fingerprints.node(other)
+
+    def _fingerprint_key(self):
+        """Returns a hashable key, equal for two Nodes iff they are non-recursively Node-equal."""
+        return self.tag, _attrib_key(self._attrib)
 
     def missing_edges(self, other, ignore_node=None):
         """Returns edges present in this node but missing in the other.
@@ -641,11 +965,13 @@ class Node:
         :return: List of edges present in this node but missing in the other.
 
         """
+        fingerprints = _Fingerprints()
         edges, other_edges = [[edge for edge in node
                                if ignore_node is None or
                                not ignore_node(edge.child)]
                               for node in (self, other)]
-        return sorted([e1 for e1 in edges if not any(e1.equals(e2) for e2 in other_edges)],
+        other_fingerprints = set(map(fingerprints.edge, other_edges))
+        return sorted([e1 for e1 in edges if fingerprints.edge(e1) not in other_fingerprints],
                       key=edge_id_orderkey)
 
     def iter(self, obj="nodes", method="dfs", duplicates=False, key=None):
@@ -754,10 +1080,12 @@ class Layer:
 
     @property
     def all(self):
+        self._check_index()
         return self._all[:]
 
     @property
     def heads(self):
+        self._check_index()
         return self._heads[:]
 
     @property
@@ -787,28 +1115,17 @@ class Layer:
         :return: True iff self and other are Layer-equal.
 
         """
+        return self._equals(other, _Fingerprints(ordered=ordered, ignore_node=ignore_node, ignore_edge=ignore_edge))
+
+    def _equals(self, other, fingerprints):
+        """Layer-equality (see :meth:`equals`), with heads compared by their fingerprints in the given object."""
         if not self._attrib.equals(other._attrib):
             return False
         heads, other_heads = [[head for head in layer.heads
-                               if ignore_node is None or
-                               not ignore_node(head)]
+                               if fingerprints.ignore_node is None or
+                               not fingerprints.ignore_node(head)]
                               for layer in (self, other)]
-        if len(heads) != len(other_heads):
-            return False  # can be removed, here for performance gain
-        if ordered:
-            return all(x1.equals(x2, ordered=True,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge)
-                       for x1, x2 in zip(heads, other_heads))
-        # I can just find the first equal head in unordered search, as
-        # Node-equality is an equivalence class (see their for details).
-        try:
-            for h1 in heads:
-                other_heads.remove(next(h2 for h2 in other_heads
-                                        if h1.equals(h2, ignore_node=ignore_node,
-                                                     ignore_edge=ignore_edge)))
-        except StopIteration:
-            return False
-        return not other_heads
+        return fingerprints.equal(heads, other_heads)
 
     def _add_edge(self, edge):
         """Alters self.heads if an :class:`Edge` has been added to the subgraph.
@@ -848,9 +1165,12 @@ class Layer:
 
         """
         self._all.append(node)
-        self._all.sort(key=self._orderkey)
         self._heads.append(node)
-        self._heads.sort(key=self._orderkey)
+        if self._root._bulk_depth:  # re-indexed once when the bulk build is over
+            self._root._unindexed_layers.add(self)
+        else:
+            self._all.sort(key=self._orderkey)
+            self._heads.sort(key=self._orderkey)
 
     def _remove_node(self, node):
         """Removes a :class:`node` from the :class:`Layer`.
@@ -859,7 +1179,51 @@ class Layer:
 
         """
         self._all.remove(node)
-        self._heads.remove(node)
+        if self._root._bulk_depth:  # heads are not up to date, but will be re-computed
+            self._root._unindexed_layers.add(self)
+            if node in self._heads:
+                self._heads.remove(node)
+        else:
+            self._heads.remove(node)
+
+    def _check_index(self):
+        """Brings the :class:`Layer` up to date if it was modified during bulk build.
+
+        Called before exposing the nodes or heads of the Layer, so that they are
+        correct even when accessed inside :meth:`Passage.bulk_build`.
+
+        """
+        if self in self._root._unindexed_layers:
+            self._root._reindex()
+
+    def _reindex(self):
+        """Re-sorts the :class:`Layer` nodes and re-computes its heads from scratch.
+
+        Called at the end of :meth:`Passage.bulk_build` instead of updating the
+        Layer on each added/removed :class:`Node` and :class:`Edge`.
+        Subclasses which keep additional indices should re-compute them here.
+
+        """
+        self._all.sort(key=self._orderkey)
+        self._heads = [node for node in self._all
+                       if all(edge.parent.layer is not self for edge in node._incoming)]
+
+    def _clone(self, root, nodes):
+        """Returns a copy of this Layer for another Passage (see :meth:`Passage.clone`).
+
+        Subclasses which keep additional references to Nodes should replace them here.
+
+        :param root: the Passage to copy to
+        :param nodes: dict of node ID to the copied Node
+        """
+        other = Layer.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other._root = root
+        other._attrib = self._attrib._clone(root)
+        other.extra = copy.deepcopy(self.extra)
+        other._all = [nodes[node.ID] for node in self._all]
+        other._heads = [nodes[node.ID] for node in self._heads]
+        return other
 
     def _change_edge_tag(self, edge, old_tag):
         """Updates the :class:`Layer` objects with the change.
@@ -898,6 +1262,12 @@ class Passage:
 
     """
 
+    # Bulk build state (see bulk_build), defined in the class level so that
+    # passages pickled before it was introduced can still be modified
+    _bulk_depth = 0
+    _unsorted_nodes = frozenset()
+    _unindexed_layers = frozenset()
+
     def __init__(self, ID, attrib=None):
         """Creates a new :class:`Passage` object.
 
@@ -973,11 +1343,12 @@ class Passage:
         # noinspection PyTypeChecker
         if len(self.layers) != len(other.layers):
             return False  # can be removed, here for performance gain
+        # Fingerprints are shared between layers, so Nodes reachable from several layers are fingerprinted once
+        fingerprints = _Fingerprints(ordered=ordered, ignore_node=ignore_node, ignore_edge=ignore_edge)
         try:
             for lid, l1 in self._layers.items():
                 l2 = other.layer(lid)
-                if not l1.equals(l2, ordered=ordered,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge):
+                if not l1._equals(l2, fingerprints):
                     return False
         except KeyError:  # no layer with same ID found
             return False
@@ -993,14 +1364,13 @@ class Passage:
         :return: List of nodes present in this passage but missing in the other.
 
         """
-        nodes, other_nodes = [[node for node in passage.nodes.values()
+        fingerprints = _Fingerprints(ignore_node=ignore_node, ignore_edge=ignore_edge)
+        nodes, other_nodes = [[node for node in passage._nodes.values()
                                if ignore_node is None or
                                not ignore_node(node)]
                               for passage in (self, other)]
-        return sorted([n1 for n1 in nodes
-                       if not any(n1.equals(n2, ignore_node=ignore_node,
-                                            ignore_edge=ignore_edge)
-                                  for n2 in other_nodes)],
+        other_fingerprints = set(map(fingerprints.node, other_nodes))
+        return sorted([n1 for n1 in nodes if fingerprints.node(n1) not in other_fingerprints],
                       key=id_orderkey)
 
     def copy(self, layers=None):
@@ -1023,14 +1393,158 @@ class Passage:
         other.extra = self.extra.copy()
         if layers is None:
             layers = sorted(self._layers)
-        for lid in layers:
-            try:
-                self.layer(lid).copy(other)
-            except AttributeError as e:
-                raise UnimplementedMethodError() from e
+        with other.bulk_build():
+            for lid in layers:
+                try:
+                    self.layer(lid).copy(other)
+                except AttributeError as e:
+                    raise UnimplementedMethodError() from e
         other.frozen = self.frozen
         return other
 
+    def clone(self):
+        """Returns a copy of the Passage, with all its layers, nodes and edges.
+
+        Unlike :meth:`copy`, the copy is made directly from the structure of this Passage,
+        without creating and re-sorting the Nodes and Edges through their constructors,
+        so it is fast enough to protect a Passage from destructive operations (e.g., normalization).
+        Extra information (including that of Categories) is copied deeply, and attribute dictionaries shallowly.
+
+        :return: A new Passage object.
+
+        """
+        if self._bulk_depth:  # bring everything up to date before copying
+            self._reindex()
+        other = Passage.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        for attr in ("_bulk_depth", "_unsorted_nodes", "_unindexed_layers"):
+            other.__dict__.pop(attr, None)  # not in a bulk build, even if self is
+        other._attrib = self._attrib._clone(other)
+        other.extra = copy.deepcopy(self.extra)
+        other._categories = {tag: dict(category) for tag, category in self._categories.items()}
+        other._refined_categories = list(self._refined_categories)
+        other._nodes = {ID: node._clone(other) for ID, node in self._nodes.items()}
+        other._layers = {ID: layer._clone(other, other._nodes) for ID, layer in self._layers.items()}
+        for node in other._nodes.values():
+            node._layer = other._layers[node._ID.partition(Node.ID_SEPARATOR)[0]]
+        edges = {}  # id of Edge -> copied Edge
+        for ID, node in self._nodes.items():
+            parent = other._nodes[ID]
+            for edge in node._outgoing:
+                edges[id(edge)] = copied = edge._clone(other, parent, other._nodes[edge._child._ID])
+                parent._outgoing.append(copied)
+        for ID, node in self._nodes.items():
+            other._nodes[ID]._incoming = [edges[id(edge)] for edge in node._incoming]
+        return other
+
+    @contextmanager
+    def bulk_build(self):
+        """Context manager for adding many :class:`Node` and :class:`Edge` objects.
+
+        Normally, every added Node or Edge causes the :class:`Layer` objects
+        and the Nodes involved to be re-sorted and their heads to be updated.
+        Inside this context, this maintenance is deferred and done once on exit,
+        so building a whole Passage takes time nearly linear in its size.
+        The order of Edges in each Node is undefined until exit; the Layer
+        nodes and heads are brought up to date whenever they are accessed.
+        May be nested, in which case the work is done when the outermost exits.
+
+        Usage::
+
+            with passage.bulk_build():
+                ...  # create nodes and edges
+
+        """
+        if not self._bulk_depth:
+            self._unsorted_nodes = set()
+            self._unindexed_layers = set()
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth:
+                self._reindex()
+
+    def _reindex(self):
+        """Sorts the Edges and re-indexes the Layers modified during bulk build."""
+        for node in self._unsorted_nodes:
+            node._outgoing.sort(key=node._orderkey)
+            node._incoming.sort(key=node._orderkey)
+        self._unsorted_nodes.clear()
+        layers = list(self._unindexed_layers)
+        self._unindexed_layers.clear()
+        for layer in layers:
+            layer._reindex()
+
+    def _create_nodes(self, rows):
+        """Creates Nodes directly, for building a whole Passage at once (see :func:`convert.from_binary`).
+
+        Unlike the constructors, does not check whether the Passage is frozen and does not call subclass
+        initializers. Must be called inside :meth:`bulk_build`, which sorts and indexes everything on exit.
+
+        :param rows: iterable of (Node subclass, Layer, ID, tag, attributes dict, extra dict or None) tuples,
+                where the dicts are used as they are (not copied)
+        :return: list of the created Nodes
+        """
+        assert self._bulk_depth, "Nodes can only be created directly inside bulk_build"
+        nodes = []
+        for cls, layer, ID, tag, attrib, extra in rows:
+            if ID in self._nodes:
+                raise DuplicateIdError(ID)
+            node = cls.__new__(cls)
+            node._tag = tag
+            node._root = self
+            node._ID = ID
+            node._id_key = _id_key(ID)
+            node._attrib = _AttributeDict._create(self, attrib)
+            node._extra = extra or None
+            node._outgoing = []
+            node._incoming = []
+            node._orderkey = edge_id_orderkey
+            node._spans = None
+            node._layer = layer
+            self._nodes[ID] = node
+            layer._add_node(node)
+            nodes.append(node)
+        return nodes
+
+    def _create_edges(self, rows):
+        """Creates Edges directly, for building a whole Passage at once (see :func:`convert.from_binary`).
+
+        Unlike :meth:`Node.add_multiple`, does not check whether the Passage is frozen, and registers each distinct
+        combination of categories once. Must be called inside :meth:`bulk_build`, like :meth:`_create_nodes`.
+
+        :param rows: iterable of (parent Node, child Node, tuple of 4-tuples of category fields, attributes dict,
+                extra dict or None) tuples, where the dicts are used as they are (not copied)
+        """
+        assert self._bulk_depth, "Edges can only be created directly inside bulk_build"
+        registered = set()
+        nodes = {}  # id -> Node, since hashing Terminals is slower
+        for parent, child, categories, attrib, extra in rows:
+            edge = Edge.__new__(Edge)
+            edge._root = self
+            edge._parent = parent
+            edge._child = child
+            edge._id_key = Edge.ID_FORMAT.format(parent._id_key, child._id_key)
+            edge._attrib = _AttributeDict._create(self, attrib, owner=edge)
+            edge._categories = [Category(*fields) for fields in categories]
+            edge._extra = extra or None
+            if categories not in registered:
+                registered.add(categories)
+                for category in edge._categories:
+                    if category.tag not in self._categories:
+                        self._update_categories(category)
+                    if category.parent and category.parent not in self._refined_categories:
+                        self._update_refined_categories(category.parent)
+            parent._outgoing.append(edge)
+            child._incoming.append(edge)
+            parent._spans = None
+            nodes[id(parent)] = parent
+            nodes[id(child)] = child
+        self._unsorted_nodes.update(nodes.values())
+        self._unindexed_layers.update(node.layer for node in nodes.values())
+
     def by_id(self, ID):
         """Returns a Node whose ID is given.
 
@@ -1041,10 +1555,7 @@ class Passage:
         try:
             return self._nodes[ID]
         except KeyError as e:
-            layer_id, _ = ID.split(Node.ID_SEPARATOR)
-            layer = self.layer(layer_id)
-            raise KeyError("Node '%s' not found in passage '%s', existing IDs in layer '%s': %s" % (
-                ID, self.ID, layer_id, ", ".join(n.ID for n in layer.all))) from e
+            raise KeyError("Node '%s' not found in passage '%s'" % (ID, self.ID)) from e
 
     @ModifyPassage
     def _add_layer(self, layer):
@@ -1106,8 +1617,10 @@ class Passage:
         :param edge: the Edge object to add
 
         """
-        # Currently no work is done in the Passage level
-        edge.parent.layer._add_edge(edge)
+        if self._bulk_depth:
+            self._unindexed_layers.add(edge.parent.layer)
+        else:
+            edge.parent.layer._add_edge(edge)
 
     def _remove_edge(self, edge):
         """Removes a :class:`Edge` object from :class:`Passage`.
@@ -1117,8 +1630,10 @@ class Passage:
         :param edge: the Edge object to remove
 
         """
-        # Currently no work is done in the Passage level
-        edge.parent.layer._remove_edge(edge)
+        if self._bulk_depth:
+            self._unindexed_layers.add(edge.parent.layer)
+        else:
+            edge.parent.layer._remove_edge(edge)
 
     def _change_edge_tag(self, edge, old_tag):
         """Updates the :class:`Passage` and :class:`Layer` objects with the change.
@@ -1127,8 +1642,10 @@ class Passage:
             old_tag: the Edge's tag before the change
 
         """
-        # Currently no work is done in the Passage level
-        edge.parent.layer._change_edge_tag(edge, old_tag)
+        if self._bulk_depth:
+            self._unindexed_layers.add(edge.parent.layer)
+        else:
+            edge.parent.layer._change_edge_tag(edge, old_tag)
 
     def _change_node_tag(self, node, old_tag):
         """Updates the :class:`Passage` and :class:`Layer` objects with the change.
@@ -1,6 +1,13 @@
+import json
+import os
 import sys
+from collections import namedtuple, OrderedDict, Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
-from ucca.ioutil import passage2file
+from ucca import layer0, layer1
+from ucca.core import Node
+from ucca.ioutil import passage2file, read_files_and_dirs, gen_files
 
 
 def diff_passages(true_passage, pred_passage, write=False):
@@ -60,3 +67,239 @@ def diff_passages(true_passage, pred_passage, write=False):
         sys.stderr.write("Writing passage '%s'...\n" % outfile)
         passage2file(pred_passage, outfile)
     return "\n" + "\n".join(lines)
+
+
+NODE = "node"
+EDGE = "edge"
+REMOTE_EDGE = "remote edge"
+ADDED = "added"
+REMOVED = "removed"
+RETAGGED = "retagged"
+
+
+class Change(namedtuple("Change", ("action", "element", "tag", "new_tag", "span", "parent_span", "text", "ID",
+                                   "new_ID"))):
+    """
+    A difference between two passages, found by :func:`find_changes`.
+    `action' is ADDED, REMOVED or RETAGGED, and `element' is NODE, EDGE or REMOTE_EDGE.
+    `tag' and `ID' are of the element in the first passage, and `new_tag' and `new_ID' of the one in the second
+    (None if it is missing there).
+    `span' is the tuple of terminal positions the node (or child node of the edge) yields, and `parent_span' that
+    of the parent node of the edge (None for nodes). `text' is the text of the span.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        return dict(self._asdict(), span=list(self.span),
+                    parent_span=None if self.parent_span is None else list(self.parent_span))
+
+
+class _Alignment:
+    """
+    Signatures of the nodes and edges of a passage, by which they are aligned with those of another passage.
+    A node is identified by its layer, terminal yield and, for terminals, text (or for nodes with an empty yield,
+    e.g. implicit nodes, the yield of the parent). Its tag is then compared separately, so that retagged nodes are
+    aligned too. The layer 1 root is identified as such, so that it is aligned even if some terminals are not under
+    it in one of the passages. An edge is identified by its parent and child node signatures and by whether it is
+    remote.
+    """
+    def __init__(self, passage):
+        self.passage = passage
+        try:
+            self.root = passage.layer(layer1.LAYER_ID).heads[0]
+        except (KeyError, IndexError):
+            self.root = None
+        self.spans = {}  # node ID -> tuple of terminal positions
+        self.keys = {}  # node ID -> node signature
+        self.nodes = OrderedDict()  # node signature -> list of nodes
+        self.edges = OrderedDict()  # edge signature -> list of edges
+        for layer in passage.layers:
+            for node in layer.all:
+                self.nodes.setdefault(self.key(node), []).append(node)
+        for nodes in self.nodes.values():
+            for node in nodes:
+                for edge in node:
+                    self.edges.setdefault((self.key(node), self.key(edge.child), bool(edge.attrib.get("remote"))),
+                                          []).append(edge)
+
+    def span(self, node):
+        span = self.spans.get(node.ID)
+        if span is None:
+            self.spans[node.ID] = ()  # in case of cycles
+            get_terminals = getattr(node, "get_terminals", None)
+            if get_terminals is None:  # e.g. linkage nodes: the union of the yields of the children
+                span = tuple(sorted({p for child in node.iter_children() for p in self.span(child)}))
+            else:
+                span = tuple(t.position for t in get_terminals())
+            self.spans[node.ID] = span
+        return span
+
+    def key(self, node):
+        key = self.keys.get(node.ID)
+        if key is None:
+            span = self.span(node)
+            if node is self.root:
+                span, extra = None, "root"
+            elif node.layer.ID == layer0.LAYER_ID:
+                extra = node.text
+            elif span:
+                extra = None
+            else:
+                extra = tuple(self.span(parent) for parent in node.iter_parents())
+            key = self.keys[node.ID] = (node.layer.ID, span, extra)
+        return key
+
+    def text(self, span):
+        return " ".join(self.passage.by_id(layer0.LAYER_ID + Node.ID_SEPARATOR + str(p)).text for p in span)
+
+
+def _align(elements, other_elements):
+    """
+    Match two lists of elements with the same signature: first those with equal tags, then the rest in order.
+    :return: list of (element, other element) pairs, where either may be None if there is nothing to match it with
+    """
+    other_by_tag = OrderedDict()
+    for element in other_elements:
+        other_by_tag.setdefault(element.tag, deque()).append(element)
+    pairs, unmatched = [], []
+    for element in elements:
+        matches = other_by_tag.get(element.tag)
+        if matches:
+            pairs.append((element, matches.popleft()))
+        else:
+            unmatched.append(element)
+    other_unmatched = deque(e for es in other_by_tag.values() for e in es)
+    for element in unmatched:
+        pairs.append((element, other_unmatched.popleft() if other_unmatched else None))
+    pairs += [(None, element) for element in other_unmatched]
+    return pairs
+
+
+def find_changes(true_passage, pred_passage):
+    """
+    Find the differences between the annotations of two passages of the same text.
+    Nodes and edges are aligned by hash lookup of their signatures (see :class:`_Alignment`), without comparing
+    node subgraphs recursively.
+    :param true_passage: Passage object to compare from
+    :param pred_passage: Passage object to compare to
+    :return: list of Change objects: nodes and edges missing in pred_passage are REMOVED, those missing in
+             true_passage are ADDED, and those with a different tag are RETAGGED
+    """
+    true, pred = _Alignment(true_passage), _Alignment(pred_passage)
+    changes = []
+    for element_type, true_elements, pred_elements in ((NODE, true.nodes, pred.nodes),
+                                                       (EDGE, true.edges, pred.edges)):
+        for key in chain(true_elements, (k for k in pred_elements if k not in true_elements)):
+            for element, other in _align(true_elements.get(key, ()), pred_elements.get(key, ())):
+                tag, new_tag = [None if e is None else e.tag for e in (element, other)]
+                if element is not None and other is not None and tag == new_tag:
+                    continue
+                action = REMOVED if other is None else ADDED if element is None else RETAGGED
+                if element_type == NODE:
+                    element_name, span, parent_span = NODE, key[1], None
+                else:
+                    element_name, span, parent_span = REMOTE_EDGE if key[2] else EDGE, key[1][1], key[0][1]
+                changes.append(Change(action, element_name, tag, new_tag, span, parent_span,
+                                      (true if element is not None else pred).text(span),
+                                      None if element is None else element.ID, None if other is None else other.ID))
+    return changes
+
+
+def diff_files(true_file, pred_file):
+    """
+    Find the differences between the passages in two files, matched by passage ID.
+    :param true_file: file name of passages to compare from
+    :param pred_file: file name of passages to compare to
+    :return: list of (passage ID, changes) pairs, where changes is a list of Change objects as returned by
+             :func:`find_changes`, or None if the passage is missing in one of the files
+    """
+    true_passages, pred_passages = [OrderedDict((p.ID, p) for p in read_files_and_dirs((f,), converters={}))
+                                    for f in (true_file, pred_file)]
+    results = []
+    for passage_id in chain(true_passages, (i for i in pred_passages if i not in true_passages)):
+        true_passage, pred_passage = true_passages.get(passage_id), pred_passages.get(passage_id)
+        results.append((passage_id, None if true_passage is None or pred_passage is None else
+                        find_changes(true_passage, pred_passage)))
+    return results
+
+
+def diff_dirs(true_dir, pred_dir, workers=1, prefetch=None):
+    """
+    Find the differences between the passages in two directories, matching files by name (ignoring the extension,
+    so that different formats may be compared) and passages by ID.
+    :param true_dir: directory of passage files to compare from
+    :param pred_dir: directory of passage files to compare to
+    :param workers: number of processes to compare files in
+    :param prefetch: maximum number of file pairs to send to comparison ahead if workers > 1 (default: 2 * workers)
+    :return: generator of (true file, pred file, passage ID, changes) tuples, in the order of the files, where
+             changes is as returned by :func:`diff_files`. If a file is missing in one directory, its name is None,
+             and so are the passage ID and changes.
+    """
+    true_files, pred_files = [OrderedDict((os.path.splitext(os.path.basename(f))[0], f) for f in gen_files(d))
+                              for d in (true_dir, pred_dir)]
+    pairs = [(true_files.get(name), pred_files.get(name))
+             for name in chain(true_files, (n for n in pred_files if n not in true_files))]
+    if workers <= 1:
+        results = (diff_files(*pair) if None not in pair else None for pair in pairs)
+    else:
+        results = _diff_parallel(pairs, workers, 2 * workers if prefetch is None else prefetch)
+    for pair, result in zip(pairs, results):
+        if result is None:
+            yield pair + (None, None)
+        else:
+            for passage_id, changes in result:
+                yield pair + (passage_id, changes)
+
+
+def _diff_parallel(pairs, workers, prefetch):
+    pending = deque()
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            for pair in pairs:
+                pending.append(None if None in pair else executor.submit(diff_files, *pair))
+                while len(pending) > prefetch:
+                    yield _result(pending.popleft())
+            while pending:
+                yield _result(pending.popleft())
+        finally:  # in case iteration was stopped early
+            for future in pending:
+                if future is not None:
+                    future.cancel()
+
+
+def _result(future):
+    return None if future is None else future.result()
+
+
+def write_report(diffs, filename):
+    """
+    Write a JSON report of passage differences, as returned by :func:`diff_dirs`.
+    :param diffs: iterable of (true file, pred file, passage ID, changes) tuples
+    :param filename: file name to write the report to
+    :return: summary dict, as written under "summary" in the report: the number of files and passages compared,
+             the number of passages with changes, and the number of changes of each kind
+    """
+    summary = OrderedDict((("files", 0), ("passages", 0), ("changed", 0), ("missing", 0)))
+    counts = Counter()
+    files = set()
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write('{"passages": [')  # written incrementally, passages with no changes are omitted
+        separator = "\n"
+        for true_file, pred_file, passage_id, changes in diffs:
+            files.add((true_file, pred_file))
+            if changes is None:
+                summary["missing"] += 1
+            else:
+                summary["passages"] += 1
+                if not changes:
+                    continue
+                summary["changed"] += 1
+                counts.update("%s %s" % (change.action, change.element) for change in changes)
+            f.write(separator + json.dumps(OrderedDict((
+                ("ID", passage_id), ("true_file", true_file), ("pred_file", pred_file),
+                ("changes", None if changes is None else [change.to_dict() for change in changes])))))
+            separator = ",\n"
+        summary["files"] = len(files)
+        summary["changes"] = OrderedDict(sorted(counts.items()))
+        f.write('\n], "summary": %s}\n' % json.dumps(summary))
+    return summary
@@ -9,12 +9,22 @@ v1.4
 2019-01-22: support multiple categories per edge
 2019-11-29: evaluate implicit nodes too (by their parent's yield)
 """
-from collections import Counter, OrderedDict
-from itertools import groupby
+import copy
+import hashlib
+import pickle
+import sys
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from itertools import groupby, chain
 from operator import attrgetter
 
-from ucca import layer0, layer1, normalization
-from ucca.constructions import get_by_names, create_passage_yields, PRIMARY, DEFAULT, ALL_EDGES
+import numpy as np
+
+from ucca import layer0, layer1, normalization, convert
+from ucca.constructions import get_by_names, create_passage_yields, iter_candidates, CandidateRecord, PRIMARY, \
+    DEFAULT, ALL_EDGES, CATEGORIES_NAME
 from ucca.layer1 import EdgeTags, NodeTags
 
 UNLABELED = "unlabeled"
@@ -37,12 +47,19 @@ def get_yield(unit):
         return frozenset()
 
 
+def get_function_yields(p):
+    """
+    :return: dict of yield -> Function unit with that yield, for all Function units in the passage
+    """
+    return {get_yield(u): u for u in p.layer(layer1.LAYER_ID).all
+            if u.tag == NodeTags.Foundational and u.ftag == EdgeTags.Function}
+
+
 def move_functions(p1, p2):
     """
     Move any common Fs to the root
     """
-    f1, f2 = [{get_yield(u): u for u in p.layer(layer1.LAYER_ID).all
-               if u.tag == NodeTags.Foundational and u.ftag == EdgeTags.Function} for p in (p1, p2)]
+    f1, f2 = map(get_function_yields, (p1, p2))
     for positions in f1.keys() & f2.keys():  # positions is a yield corresponding to a Function in both passages
         for (p, unit) in ((p1, f1[positions]), (p2, f2[positions])):
             unit.fparent.remove(unit)  # Remove from current primary parent (but preserve remote parents)
@@ -73,6 +90,123 @@ def expand_equivalents(tag_set):
     return tag_set.union(t1 for t in tag_set for pair in EQUIV for t1 in pair if t in pair and t != t1)
 
 
+class YieldMatrix:
+    """
+    Encodes the terminal yields of candidates from two passages (guessed and reference) as boolean arrays,
+    so that mutual units are found for all constructions and evaluation types at once.
+    Each row corresponds to a (construction, yield) pair found in at least one of the passages,
+    and each column of the tag matrices corresponds to an edge tag (sorted alphabetically).
+    """
+    def __init__(self, maps, constructions):
+        """
+        :param maps: pair of dicts (guessed, reference): Construction -> dict: yield -> list of Candidates
+        :param constructions: list of Constructions to include, in order
+        """
+        self.maps = maps
+        self.constructions = list(constructions)
+        self.rows = {}  # (construction index, yield) -> row index
+        construction, present, sides, rows, tags, non_unary = [], ([], []), [], [], [], []  # coordinates per tag
+        for i, c in enumerate(self.constructions):
+            for side, m in enumerate(maps):
+                for y, candidates in m.get(c, {}).items():
+                    row = self.rows.get((i, y))
+                    if row is None:
+                        row = self.rows[i, y] = len(construction)
+                        construction.append(i)
+                    present[side].append(row)
+                    for candidate in candidates:
+                        for t in candidate.tags:
+                            sides.append(side)
+                            rows.append(row)
+                            tags.append(t)
+                            non_unary.append(not candidate.is_unary_child)
+        self.tag_names = sorted(set(tags))
+        tag_ids = {t: i for i, t in enumerate(self.tag_names)}
+        self.construction = np.array(construction, dtype=np.int64)
+        shape = (len(maps), len(construction), len(self.tag_names))
+        self.present = np.zeros(shape[:2], dtype=bool)
+        for side, rows_present in enumerate(present):
+            self.present[side, rows_present] = True
+        coordinates = np.array((sides, rows, [tag_ids[t] for t in tags]), dtype=np.int64).reshape(3, -1)
+        self.tags = np.zeros(shape, dtype=bool)
+        self.tags[tuple(coordinates)] = True
+        self.non_unary_tags = np.zeros(shape, dtype=bool)  # for the confusion matrix
+        self.non_unary_tags[tuple(coordinates[:, np.array(non_unary, dtype=bool)])] = True
+        self.equivalents = np.eye(len(self.tag_names), dtype=bool)  # see expand_equivalents
+        for pair in EQUIV:
+            for t1 in pair:
+                for t2 in pair:
+                    if t1 in tag_ids and t2 in tag_ids:
+                        self.equivalents[tag_ids[t1], tag_ids[t2]] = True
+        self._mutual = {}
+        self._labels = None
+
+    def _guessed_tags(self, eval_type):
+        return self.tags[0].dot(self.equivalents) if eval_type == WEAK_LABELED else self.tags[0]
+
+    def mutual(self, eval_type):
+        """
+        :param eval_type: evaluation type, out of EVAL_TYPES
+        :return: boolean array: for each row, whether the yield is of a mutual unit for the evaluation type
+        """
+        mutual = self._mutual.get(eval_type)
+        if mutual is None:
+            mutual = self.present.all(axis=0)
+            if eval_type != UNLABELED:
+                mutual &= (self._guessed_tags(eval_type) & self.tags[1]).any(axis=1)
+            self._mutual[eval_type] = mutual
+        return mutual
+
+    def counts(self, eval_type):
+        """
+        :param eval_type: evaluation type, out of EVAL_TYPES
+        :return: three int arrays with an entry per construction: number of mutual units, of units only in the guessed
+                 passage, and of units only in the reference passage
+        """
+        num_constructions = len(self.constructions)
+        mutual = np.bincount(self.construction[self.mutual(eval_type)], minlength=num_constructions)
+        return (mutual,) + tuple(np.bincount(self.construction[present], minlength=num_constructions) - mutual
+                                 for present in self.present)
+
+    def mutual_tags(self, eval_type):
+        """
+        :param eval_type: evaluation type, out of EVAL_TYPES
+        :return: dict: Construction -> dict: yield of mutual unit -> set of mutual tags (empty for UNLABELED)
+        """
+        mutual = self.mutual(eval_type)
+        intersection = self._guessed_tags(eval_type) & self.tags[1]
+        mutual_tags = OrderedDict((c, {}) for c in self.constructions)
+        for (i, y), row in self.rows.items():
+            if mutual[row]:
+                mutual_tags[self.constructions[i]][y] = () if eval_type == UNLABELED else \
+                    {self.tag_names[t] for t in np.flatnonzero(intersection[row])}
+        return mutual_tags
+
+    def errors(self, construction, yields):
+        """
+        :param construction: Construction to count errors for
+        :param yields: iterable of yields to count (all yields of the construction in either passage)
+        :return: Counter of (guessed tags, reference tags) pairs, each joined by "|", or "<UNMATCHED>" if there are none
+        """
+        if self._labels is None:  # non-unary tags of each row, per passage
+            self._labels = []
+            for tags in self.non_unary_tags:
+                labels = [[] for _ in self.construction]
+                for row, t in zip(*np.nonzero(tags)):
+                    labels[row].append(self.tag_names[t])
+                self._labels.append(["|".join(l) or "<UNMATCHED>" for l in labels])
+        i = self.constructions.index(construction)
+        return Counter(tuple(labels[self.rows[i, y]] for labels in self._labels) for y in yields)
+
+
+def get_constructions(constructions):
+    """
+    :param constructions: names of construction types to include in the evaluation
+    :return: list of Constructions to evaluate: the default ones, followed by the given ones
+    """
+    return list(DEFAULT.values()) + [c for c in get_by_names(constructions) if c not in DEFAULT.values()]
+
+
 class Evaluator:
     def __init__(self, verbose, constructions, units, fscore, errors):
         """
@@ -83,8 +217,7 @@ class Evaluator:
         :param errors: whether to calculate and print the confusion matrix of errors
         """
         self.verbose = verbose
-        self.constructions = list(DEFAULT.values()) + [c for c in get_by_names(constructions)
-                                                       if c not in DEFAULT.values()]
+        self.constructions = get_constructions(constructions)
         self.units = units
         self.fscore = fscore
         self.errors = errors
@@ -95,7 +228,7 @@ class Evaluator:
             if eval_type == UNLABELED:
                 mutual_tags[y] = ()
             else:
-                tags = [set(t for c in m[y] for t in c.edge.tags) for m in (m1, m2)]
+                tags = [set(t for c in m[y] for t in c.tags) for m in (m1, m2)]
                 if eval_type == WEAK_LABELED:
                     tags[0] = expand_equivalents(tags[0])
                 intersection = set.intersection(*tags)
@@ -103,11 +236,37 @@ class Evaluator:
                     mutual_tags[y] = intersection
         if counter is not None:  # for confusion matrix / error counter
             for y in m1.keys() | m2.keys():  # common yields (keys), but perhaps different tags (values)
-                tags = [sorted(set(t for c in m.get(y, ()) if not c.is_unary_child for t in c.edge.tags))
+                tags = [sorted(set(t for c in m.get(y, ()) if not c.is_unary_child for t in c.tags))
                         for m in (m1, m2)]  # the tags for the yield in each of the two passages
                 counter[tuple("|".join(t) or "<UNMATCHED>" for t in tags)] += 1
 
-    def get_scores(self, p1, p2, eval_type, r=None):
+    def yield_matrix(self, p1, p2, r=None, candidates=None):
+        """
+        Extracts the candidate units of both passages and encodes their yields, to be shared by all evaluation types.
+        :param p1: passage to compare
+        :param p2: reference passage object
+        :param r: reference passage for fine-grained evaluation
+        :param candidates: iterable of Candidates (or CandidateRecords) to use for p2 instead of extracting them
+        :returns: YieldMatrix object
+        """
+        reference_yield_tags = None
+        if CATEGORIES_NAME in self.constructions:  # only needed for fine-grained evaluation
+            passage_yields = create_passage_yields(r or p2)
+            reference_yield_tags = passage_yields[ALL_EDGES.name] if passage_yields else None
+        maps = [{} if p is None else create_passage_yields(p, self.constructions, tags=False, reference=p2,
+                                                           reference_yield_tags=reference_yield_tags,
+                                                           candidates=candidates if p is p2 else None)
+                for p in (p1, None if p1 is p2 else p2)]
+        if p1 is p2:  # the same passage evaluated against itself is extracted once
+            maps[1] = maps[0]
+        ordered_constructions = []
+        if p1 is not None:
+            ordered_constructions = [c for c in self.constructions if any(c in m for m in maps)]
+            for m in maps[::-1]:
+                ordered_constructions += [c for c in m if c not in ordered_constructions]
+        return YieldMatrix(maps, ordered_constructions)
+
+    def get_scores(self, p1, p2, eval_type, r=None, matrix=None):
         """
         prints the relevant statistics and f-scores. eval_type can be 'unlabeled', 'labeled' or 'weak_labeled'.
         calculates a set of all the yields such that both passages have a unit with that yield.
@@ -119,32 +278,27 @@ class Evaluator:
         3. WEAK_LABELED: also requires weak tag match (if there are multiple units with the same yield,
                          requires one match)
         :param r: reference passage for fine-grained evaluation
+        :param matrix: YieldMatrix of the passages, if already calculated by yield_matrix (for another eval_type)
         :returns: EvaluatorResults object if self.fscore is True, otherwise None
         """
-        mutual = OrderedDict()
-        counters = OrderedDict() if self.errors and eval_type == LABELED else None
-        passage_yields = create_passage_yields(r or p2)
-        reference_yield_tags = passage_yields[ALL_EDGES.name] if passage_yields else None
-        maps = [{} if p is None else create_passage_yields(p, self.constructions, tags=False, reference=p2,
-                                                           reference_yield_tags=reference_yield_tags) for p in (p1, p2)]
-        if p1 is not None:
-            ordered_constructions = [c for c in self.constructions if any(c in m for m in maps)]
-            for m in maps[::-1]:
-                ordered_constructions += [c for c in m if c not in ordered_constructions]
-            for construction in ordered_constructions:
-                yield_cands = [m.get(construction, {}) for m in maps]
-                self.find_mutuals(*yield_cands, eval_type=eval_type, mutual_tags=mutual.setdefault(construction, {}),
-                                  counter=None if counters is None else counters.setdefault(construction, Counter()))
-
-        only = [{construction: {terminal_yield: set.union(*(set(candidate.edge.tags) for candidate in candidates))
-                                for terminal_yield, candidates in candidates_per_yield.items()
-                                if terminal_yield not in mutual[construction]}
-                 for construction, candidates_per_yield in m.items()} for m in maps]
-        res = EvaluatorResults((c, SummaryStatistics(len(mutual[c]), len(only[0].get(c, ())), len(only[1].get(c, ())),
-                                                     None if counters is None else counters.get(c))) for c in mutual)
+        if matrix is None:
+            matrix = self.yield_matrix(p1, p2, r=r)
+        maps = matrix.maps
+        errors = self.errors and eval_type == LABELED
+        res = EvaluatorResults((c, SummaryStatistics(
+            int(num_matches), int(num_only_guessed), int(num_only_ref),
+            matrix.errors(c, maps[0].get(c, {}).keys() | maps[1].get(c, {}).keys()) if errors else None))
+                               for c, num_matches, num_only_guessed, num_only_ref in zip(matrix.constructions,
+                                                                                        *matrix.counts(eval_type)))
         if self.verbose:
             print("Evaluation type: (" + eval_type + ")")
             if self.units and p1 is not None:
+                mutual = matrix.mutual_tags(eval_type)
+                only = [{construction: {terminal_yield: set.union(*(set(candidate.tags)
+                                                                     for candidate in candidates))
+                                        for terminal_yield, candidates in candidates_per_yield.items()
+                                        if terminal_yield not in mutual[construction]}
+                         for construction, candidates_per_yield in m.items()} for m in maps]
                 print("==> Mutual Units:")
                 print_tags_and_text(p1, mutual)
                 print("==> Only in guessed:")
@@ -182,14 +336,10 @@ class Scores:
         :param scores: iterable of Scores
         :return: new Scores with aggregated scores
         """
-        scores = list(scores)
-        evaluators = [s.evaluators for s in scores]
-        names = list(set(s.name for s in scores))
-        formats = list(set(s.format for s in scores))
-        return Scores(((t, EvaluatorResults.aggregate(filter(None, (e.get(t) for e in evaluators))))
-                       for t in EVAL_TYPES),
-                      name=names[0] if len(names) == 1 else None,
-                      evaluation_format=formats[0] if len(formats) == 1 else None)
+        accumulator = ScoresAccumulator()
+        for s in scores:
+            accumulator.add(s)
+        return accumulator.summary()
 
     def print(self, eval_type=None, **kwargs):
         for eval_type in EVAL_TYPES if eval_type is None else [eval_type]:
@@ -222,6 +372,57 @@ class Scores:
         return self.evaluators[eval_type]
 
 
+class ScoresAccumulator:
+    """
+    Aggregates Scores one at a time, keeping only the running totals, so that memory does not depend on the number
+    of aggregated Scores. The summary is the same as :meth:`Scores.aggregate` of all the added Scores.
+    """
+    def __init__(self):
+        self.count = 0
+        self._counts = OrderedDict((t, OrderedDict()) for t in EVAL_TYPES)  # eval_type -> Construction -> counts
+        self._defaults = {t: OrderedDict() for t in EVAL_TYPES}
+        self._names = set()
+        self._formats = set()
+
+    def add(self, scores):
+        """
+        :param scores: Scores object to add to the totals
+        :return: the given Scores object
+        """
+        self.count += 1
+        self._names.add(scores.name)
+        self._formats.add(scores.format)
+        for eval_type, counts in self._counts.items():
+            evaluator_results = scores.evaluators.get(eval_type)
+            if evaluator_results:
+                for construction, stats in evaluator_results.results.items():
+                    construction_counts = counts.get(construction)
+                    if construction_counts is None:
+                        construction_counts = counts[construction] = [0, 0, 0, Counter()]
+                    construction_counts[0] += stats.num_matches
+                    construction_counts[1] += stats.num_only_guessed
+                    construction_counts[2] += stats.num_only_ref
+                    construction_counts[3].update(stats.errors or ())
+                self._defaults[eval_type].update(evaluator_results.default)
+        return scores
+
+    def summary(self):
+        """
+        :return: new Scores with aggregated scores of all added Scores
+        """
+        names = list(self._names)
+        formats = list(self._formats)
+        return Scores(((t, EvaluatorResults(((c, SummaryStatistics(*construction_counts[:3],
+                                                                    Counter(construction_counts[3])))
+                                             for c, construction_counts in counts.items()),
+                                            default=self._defaults[t])) for t, counts in self._counts.items()),
+                      name=names[0] if len(names) == 1 else None,
+                      evaluation_format=formats[0] if len(formats) == 1 else None)
+
+    def __len__(self):
+        return self.count
+
+
 class EvaluatorResults:
     def __init__(self, results, default=None):
         """
@@ -325,11 +526,206 @@ class SummaryStatistics:
         return bool(self.num_matches or self.num_only_guessed or self.num_only_ref or self.errors)
 
 
+def passage_hash(passage):
+    """
+    :param passage: Passage object
+    :return: hex digest of the passage contents, to identify changed passages
+    """
+    return hashlib.sha1(convert.to_binary(passage)).hexdigest()
+
+
+class ReferenceEntry:
+    """
+    Evaluation data of one reference passage, after normalization, so that evaluating against it does not require
+    normalizing and extracting candidates from it again (see :class:`ReferenceIndex`).
+    """
+    def __init__(self, passage, normalized, constructions, verbose=False):
+        """
+        :param passage: reference Passage object, as given to :func:`evaluate`
+        :param normalized: normalized copy of the passage (or the passage itself if evaluating without normalization)
+        :param constructions: list of Constructions to include
+        :param verbose: whether to print annotation progress
+        """
+        self.ID = passage.ID
+        self.hash = passage_hash(passage)
+        self.functions = {y: u.ID for y, u in get_function_yields(normalized).items()}  # see move_functions
+        self.records = [(c.edge.parent.ID, c.edge.child.ID, CandidateRecord(c, constructions))
+                        for c in iter_candidates(normalized, verbose=verbose)]  # in the order of iter_candidates
+        self.docs = copy.deepcopy(normalized.layer(layer0.LAYER_ID).extra.get("doc")) \
+            if normalized.extra.get("annotated") else None  # POS tags etc., if needed by any of the constructions
+
+    def prepare(self, guessed, ref, normalize=True):
+        """
+        Normalize a guessed passage and move common Functions to the root (see :func:`move_functions`),
+        updating the reference only if any of its units are moved.
+        :param guessed: guessed Passage object
+        :param ref: reference Passage object this entry was created from (not modified)
+        :param normalize: whether to normalize the passages
+        :return: tuple of (guessed passage, reference passage, iterable of reference Candidates/CandidateRecords)
+        """
+        moved = ()
+        if normalize:
+            guessed = guessed.clone()
+            normalization.normalize(guessed)
+            moved = get_function_yields(guessed).keys() & self.functions.keys()
+        if not moved:  # the reference is only needed for its terminals
+            if self.docs is not None:
+                ref = self.annotate(ref.clone())
+            return guessed, ref, (record for _, _, record in self.records)
+        ref = ref.clone()
+        normalization.normalize(ref)
+        self.annotate(ref)
+        # Moving a unit changes the yields of its ancestors, and so the candidates whose parent or child is one of them
+        changed = {self.functions[y] for y in moved}
+        for node in map(ref.by_id, list(changed)):
+            node = node.fparent
+            while node is not None and node.ID not in changed:
+                changed.add(node.ID)
+                node = node.fparent
+        move_functions(guessed, ref)
+        records = {}
+        for parent_id, group in groupby(self.records, key=lambda r: r[0]):
+            if parent_id not in changed:
+                records.update(((parent_id, i), record) for i, (_, child_id, record) in enumerate(group)
+                               if child_id not in changed)
+        return guessed, ref, iter_candidates(ref, records=records)
+
+    def annotate(self, passage):
+        if self.docs is not None:
+            passage.layer(layer0.LAYER_ID).extra["doc"] = copy.deepcopy(self.docs)
+            passage.extra["annotated"] = True
+        return passage
+
+
+class ReferenceIndex:
+    """
+    Evaluation data of reference passages, computed once and saved to a file, for evaluating many guessed passages
+    (e.g. the outputs of several parsers) against the same reference passages.
+    Each entry is keyed by passage ID and is only used if the contents of the reference passage have not changed.
+    Fine-grained evaluation by categories (ref_yield_tags) is not supported.
+    """
+    VERSION = 1
+
+    def __init__(self, constructions=DEFAULT, normalize=True, verbose=False):
+        """
+        :param constructions: names of construction types to include in the evaluation
+        :param normalize: whether passages are normalized before evaluation
+        :param verbose: whether to print annotation progress
+        """
+        self.constructions = get_constructions(constructions)
+        if CATEGORIES_NAME in self.constructions:
+            raise ValueError("Evaluation by categories is not supported by reference index")
+        self.normalize = normalize
+        self.verbose = verbose
+        self.entries = {}
+
+    def add(self, passage):
+        """
+        Compute evaluation data for a reference passage, replacing any previous entry with the same ID
+        :param passage: reference Passage object
+        :return: ReferenceEntry object
+        """
+        normalized = passage.clone()  # annotation modifies the passage even if not normalizing
+        if self.normalize:
+            normalization.normalize(normalized)
+        entry = self.entries[passage.ID] = ReferenceEntry(passage, normalized, self.constructions,
+                                                          verbose=self.verbose)
+        return entry
+
+    def get(self, passage):
+        """
+        :param passage: reference Passage object
+        :return: ReferenceEntry for the passage, or None if it is not in the index or its contents have changed
+        """
+        entry = self.entries.get(passage.ID)
+        return entry if entry is not None and entry.hash == passage_hash(passage) else None
+
+    def supports(self, constructions, normalize=True):
+        """
+        :param constructions: names of construction types to include in the evaluation
+        :param normalize: whether passages are normalized before evaluation
+        :return: whether the index can be used for evaluation with the given settings
+        """
+        return normalize == self.normalize and get_constructions(constructions) == self.constructions
+
+    def select(self, ids):
+        """
+        :param ids: iterable of passage IDs
+        :return: new ReferenceIndex with only the entries with the given IDs (if they exist)
+        """
+        index = copy.copy(self)
+        index.entries = {i: self.entries[i] for i in ids if i in self.entries}
+        return index
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            pickle.dump((self.VERSION, self.constructions, self.normalize, list(self.entries.values())), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename, verbose=False):
+        with open(filename, "rb") as f:
+            version, constructions, normalize, entries = pickle.load(f)
+        if version != cls.VERSION:
+            raise ValueError("Unsupported reference index version in '%s': %s" % (filename, version))
+        index = cls(constructions, normalize=normalize, verbose=verbose)
+        index.entries = {e.ID: e for e in entries}
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, passage_id):
+        return passage_id in self.entries
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+
+class YieldCache:
+    """
+    Evaluation data of reference passages after normalization (see :class:`ReferenceEntry`), computed when they are
+    first evaluated against, and kept in memory for evaluating other guessed passages against the same references.
+    The same cache may be passed to several calls of :func:`evaluate`.
+    Entries are keyed by passage ID and replaced if the contents of the reference passage change, like in
+    :class:`ReferenceIndex`, so no passages are kept.
+    Fine-grained evaluation by categories (ref_yield_tags) does not use the cache.
+    """
+    def __init__(self, verbose=False):
+        """
+        :param verbose: whether to print annotation progress
+        """
+        self.verbose = verbose
+        self.indexes = {}  # (construction names, normalize) -> ReferenceIndex
+
+    def get(self, passage, constructions=DEFAULT, normalize=True):
+        """
+        :param passage: reference Passage object
+        :param constructions: names of construction types to include in the evaluation
+        :param normalize: whether passages are normalized before evaluation
+        :return: ReferenceEntry for the passage, created if it is not in the cache or its contents have changed
+        """
+        constructions = get_constructions(constructions)
+        key = (tuple(c.name for c in constructions), normalize)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = ReferenceIndex(constructions, normalize=normalize, verbose=self.verbose)
+        entry = index.get(passage)
+        return index.add(passage) if entry is None else entry
+
+    def clear(self):
+        self.indexes.clear()
+
+    def __len__(self):
+        return sum(map(len, self.indexes.values()))
+
+
 def evaluate(guessed, ref, converter=None, verbose=False, constructions=DEFAULT,
-             units=False, fscore=True, errors=False, normalize=True, eval_type=None, ref_yield_tags=None, **kwargs):
+             units=False, fscore=True, errors=False, normalize=True, eval_type=None, ref_yield_tags=None, cache=None,
+             reference_index=None, **kwargs):
     """
     Compare two passages and return requested diagnostics and scores, possibly printing them too.
-    NOTE: since normalize=True by default, this method is destructive: it modifies the given passages before evaluation.
+    The given passages are not modified: normalization is done on copies (see :meth:`ucca.core.Passage.clone`).
     :param guessed: Passage object to evaluate
     :param ref: reference Passage object to compare to
     :param converter: optional function to apply to passages before evaluation
@@ -338,22 +734,91 @@ def evaluate(guessed, ref, converter=None, verbose=False, constructions=DEFAULT,
     :param units: whether to evaluate common units
     :param fscore: whether to compute precision, recall and f1 score
     :param errors: whether to print the mistakes
-    :param normalize: flatten centers and move common functions to root before evaluation - modifies passages
+    :param normalize: flatten centers and move common functions to root before evaluation
     :param eval_type: specific evaluation type(s) to limit to
     :param ref_yield_tags: reference passage for fine-grained evaluation
+    :param cache: YieldCache object to share reference evaluation data with other evaluations, if possible
+    :param reference_index: ReferenceIndex object with precomputed data for the reference passage, used if possible
     :return: Scores object
     """
     del kwargs
     if converter is not None:
         guessed = converter(guessed)
         ref = converter(ref)
-    if normalize:  # FIXME clone passages to avoid modifying the original ones
+    evaluator = Evaluator(verbose, constructions, units, fscore, errors)
+    entry = None
+    if guessed is not ref and ref_yield_tags is None:
+        if reference_index is not None and reference_index.supports(evaluator.constructions, normalize):
+            entry = reference_index.get(ref)
+        if entry is None and cache is not None and CATEGORIES_NAME not in evaluator.constructions:
+            entry = cache.get(ref, evaluator.constructions, normalize=normalize)
+    ref_candidates = None
+    if entry is not None:
+        guessed, ref, ref_candidates = entry.prepare(guessed, ref, normalize=normalize)
+    elif normalize:
+        guessed, ref = (guessed.clone(),) * 2 if guessed is ref else (guessed.clone(), ref.clone())
         for passage in (guessed, ref):
             normalization.normalize(passage)  # flatten Cs inside Cs
         move_functions(guessed, ref)  # move common Fs to be under the root, FIXME should be before normalize
 
     if isinstance(eval_type, str):
         eval_type = [eval_type]
-    evaluator = Evaluator(verbose, constructions, units, fscore, errors)
-    return Scores((evaluation_type, evaluator.get_scores(guessed, ref, evaluation_type, r=ref_yield_tags))
+    matrix = evaluator.yield_matrix(guessed, ref, r=ref_yield_tags, candidates=ref_candidates)
+    return Scores((evaluation_type, evaluator.get_scores(guessed, ref, evaluation_type, r=ref_yield_tags,
+                                                         matrix=matrix))
                   for evaluation_type in (eval_type or EVAL_TYPES))
+
+
+def evaluate_corpus(pairs, workers=1, prefetch=None, capture_output=False, **kwargs):
+    """
+    Evaluate pairs of passages, possibly in parallel processes, yielding the Scores of each pair in the given order.
+    The results (and printed output) are the same as calling :func:`evaluate` on each pair in turn.
+    Aggregate the results with :meth:`Scores.aggregate`.
+    :param pairs: iterable of (guessed, ref) or (guessed, ref, ref_yield_tags) tuples of Passage objects
+    :param workers: number of processes to evaluate in
+    :param prefetch: maximum number of pairs to send to evaluation ahead if workers > 1 (default: 2 * workers)
+    :param capture_output: instead of printing the output of evaluating each pair, return it with its Scores,
+                           so that the caller can print it along with information about the pair
+    :param kwargs: keyword arguments for :func:`evaluate`
+    :return: generator of Scores objects, one for each pair,
+             or of (guessed passage ID, Scores, output string) tuples if `capture_output' is True
+    """
+    if workers <= 1:
+        for pair in pairs:
+            result = _evaluate_pair(*pair, capture_output=capture_output, **kwargs)
+            yield (pair[0].ID,) + result if capture_output else result
+        return
+    kwargs.pop("cache", None)  # would be copied to every process, so each process uses its own
+    reference_index = kwargs.pop("reference_index", None)
+    if prefetch is None:
+        prefetch = 2 * workers
+    pending = deque()  # (guessed passage ID, future)
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            for pair in pairs:
+                if reference_index is not None:  # send only the entry needed for this pair
+                    kwargs["reference_index"] = reference_index.select((pair[1].ID,))
+                pending.append((pair[0].ID, executor.submit(_evaluate_pair, *pair, capture_output=True, **kwargs)))
+                while len(pending) > prefetch:
+                    yield _pair_result(*pending.popleft(), capture_output=capture_output)
+            while pending:
+                yield _pair_result(*pending.popleft(), capture_output=capture_output)
+        finally:  # in case iteration was stopped early
+            for _, future in pending:
+                future.cancel()
+
+
+def _evaluate_pair(guessed, ref, ref_yield_tags=None, capture_output=False, **kwargs):
+    if not capture_output:
+        return evaluate(guessed, ref, ref_yield_tags=ref_yield_tags, **kwargs)
+    with redirect_stdout(StringIO()) as output:  # to be printed in the main process, in order
+        scores = evaluate(guessed, ref, ref_yield_tags=ref_yield_tags, **kwargs)
+    return scores, output.getvalue()
+
+
+def _pair_result(passage_id, future, capture_output=False):
+    scores, output = future.result()
+    if capture_output:
+        return passage_id, scores, output
+    sys.stdout.write(output)
+    return scores
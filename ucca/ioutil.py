@@ -1,8 +1,12 @@
 """Input/output utility functions for UCCA scripts."""
+import json
+import mmap
 import os
+import struct
 import sys
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from glob import glob
 from itertools import filterfalse, chain
@@ -10,20 +14,27 @@ from xml.etree.ElementTree import ParseError
 
 from tqdm import tqdm
 
-from ucca.convert import file2passage, passage2file, from_text, to_text, split2segments
+from ucca.convert import file2passage, passage2file, from_text, to_text, split2segments, iter_from_standard, \
+    to_binary, from_binary
 from ucca.core import Passage
 
 DEFAULT_LANG = "en"
 DEFAULT_ATTEMPTS = 3
 DEFAULT_DELAY = 5
+ARCHIVE_SUFFIX = ".uccarc"
+ARCHIVE_MAGIC = b"UCCAARCH"
+ARCHIVE_VERSION = 1
+_ARCHIVE_HEADER = struct.Struct("<8sHHQ")  # magic, version, reserved flags, index offset
 
 
 class LazyLoadedPassages:
     """
-    Iterable interface to Passage objects that loads files on-the-go and can be iterated more than once
+    Iterable interface to Passage objects that loads files on-the-go and can be iterated more than once.
+    If `workers' > 1, files are loaded in a pool of that many processes, reading ahead at most `prefetch' files
+    (default: twice the number of workers), but passages are still returned in the same order as the files.
     """
     def __init__(self, files, sentences=False, paragraphs=False, converters=None, lang=DEFAULT_LANG,
-                 attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY):
+                 attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY, stream=False, workers=1, prefetch=None):
         self.files = files
         self.sentences = sentences
         self.paragraphs = paragraphs
@@ -32,16 +43,40 @@ class LazyLoadedPassages:
         self.lang = lang
         self.attempts = attempts
         self.delay = delay
+        self.stream = stream
+        self.workers = workers
+        self.prefetch = 2 * workers if prefetch is None else prefetch
+        self._kwargs = dict(sentences=sentences, paragraphs=paragraphs, converters=converters, lang=lang,
+                            attempts=attempts, delay=delay, stream=stream)  # to load files in other processes
         self._files_iter = None
         self._split_iter = None
         self._file_handle = None
 
     def __iter__(self):
+        if self.workers > 1:
+            return self._iter_parallel()
         self._files_iter = iter(self.files)
         self._split_iter = None
         self._file_handle = None
         return self
 
+    def _iter_parallel(self):
+        pending = deque()  # for each file: future of its list of passages, or the list itself if already loaded
+        executor = ProcessPoolExecutor(self.workers)
+        try:
+            for file in list(self.files):
+                pending.append(_load_passages(file, **self._kwargs) if isinstance(file, Passage) else
+                               executor.submit(_load_passages, file, **self._kwargs))
+                while len(pending) > self.prefetch:
+                    yield from _result(pending.popleft())
+            while pending:
+                yield from _result(pending.popleft())
+        finally:  # in case iteration was stopped early
+            for future in pending:
+                if not isinstance(future, list):
+                    future.cancel()
+            executor.shutdown(wait=False)
+
     def __next__(self):
         while True:
             passage = self._next_passage()
@@ -67,17 +102,23 @@ class LazyLoadedPassages:
                         print("Failed reading %s, trying %d more times..." % (file, attempts), file=sys.stderr)
                     time.sleep(self.delay)
                     attempts -= 1
-                try:
-                    passage = file2passage(file)  # XML or binary format
-                except (IOError, ParseError) as e:  # Failed to read as passage file
-                    base, ext = os.path.splitext(os.path.basename(file))
-                    converter = self.converters.get(ext.lstrip("."))
-                    if converter is None:
-                        raise IOError("Could not read %s file. See error message above. "
-                                      "If this file's format is not %s, try adding '.txt' suffix to read as plain text:"
-                                      " '%s'" % (ext, ext, file)) from e
-                    self._file_handle = open(file, encoding="utf-8")
-                    self._split_iter = iter(converter(chain(self._file_handle, [""]), passage_id=base, lang=self.lang))
+                if self.stream and file.lower().endswith(".xml"):  # Possibly several passages, read incrementally
+                    self._split_iter = iter_from_standard(file)
+                elif file.lower().endswith(ARCHIVE_SUFFIX):  # Several passages in one archive
+                    self._split_iter = _iter_archive(file)
+                else:
+                    try:
+                        passage = file2passage(file)  # XML or binary format
+                    except (IOError, ParseError) as e:  # Failed to read as passage file
+                        base, ext = os.path.splitext(os.path.basename(file))
+                        converter = self.converters.get(ext.lstrip("."))
+                        if converter is None:
+                            raise IOError("Could not read %s file. See error message above. If this file's format is "
+                                          "not %s, try adding '.txt' suffix to read as plain text: '%s'"
+                                          % (ext, ext, file)) from e
+                        self._file_handle = open(file, encoding="utf-8")
+                        self._split_iter = iter(converter(chain(self._file_handle, [""]), passage_id=base,
+                                                          lang=self.lang))
             if self.split:
                 if self._split_iter is None:
                     self._split_iter = (passage,)
@@ -110,13 +151,127 @@ class LazyLoadedPassages:
         return bool(self.files)
 
 
+def _iter_archive(filename):
+    """Yields all passages in an archive file, closing it when done"""
+    with PassageArchive(filename) as archive:
+        yield from archive
+
+
+def _load_passages(file, **kwargs):
+    """Loads all passages from one file (or a Passage object), possibly in another process"""
+    return list(LazyLoadedPassages([file], **kwargs))
+
+
+def _result(passages_or_future):
+    return passages_or_future if isinstance(passages_or_future, list) else passages_or_future.result()
+
+
+class PassageArchive:
+    """
+    Random-access collection of passages stored in a single archive file (see :func:`write_archive`).
+    The file is memory-mapped, and passages are only decoded when accessed by passage ID.
+    Iteration follows the list of passage IDs in `ids', which can be reordered (e.g. shuffled) without reading any
+    passage.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _ARCHIVE_HEADER.size:
+            raise IOError("Not a passage archive: '%s'" % filename)
+        magic, version, _, index_offset = _ARCHIVE_HEADER.unpack_from(self._mmap)
+        if magic != ARCHIVE_MAGIC:
+            raise IOError("Not a passage archive: '%s'" % filename)
+        if version > ARCHIVE_VERSION:
+            raise IOError("Unsupported passage archive version %d in '%s' (the latest supported is %d)" %
+                          (version, filename, ARCHIVE_VERSION))
+        self._index = {passage_id: (offset, length) for passage_id, offset, length in
+                       json.loads(self._mmap[index_offset:].decode("utf-8"))}
+        self.ids = list(self._index)
+
+    def select(self, ids):
+        """
+        :param ids: iterable of passage IDs, all in the archive
+        :return: PassageArchive sharing the same file, iterating over only the given passages, in the given order
+        :raise KeyError: if any of the IDs is not in the archive
+        """
+        selected = object.__new__(PassageArchive)
+        selected.__dict__.update(self.__dict__)
+        selected.ids = list(ids)
+        missing = [passage_id for passage_id in selected.ids if passage_id not in self._index]
+        if missing:
+            raise KeyError("Passages not found in '%s': %s" % (self.filename, ", ".join(missing)))
+        return selected
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return (self[passage_id] for passage_id in list(self.ids))
+
+    def __getitem__(self, passage_id):
+        offset, length = self._index[passage_id]
+        return from_binary(self._mmap[offset:offset + length])
+
+    def __contains__(self, passage_id):
+        return passage_id in self._index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return bool(self.ids)
+
+
+def write_archive(passages, filename):
+    """
+    Write passages to a single archive file, to be read by :class:`PassageArchive`.
+    Each passage is stored in the compact binary format (see :func:`ucca.convert.to_binary`), followed by an index
+    of passage IDs and their offsets.
+    The archive is written to a temporary file, which replaces `filename' only once it is complete.
+    :param passages: iterable of Passage objects, with unique IDs
+    :param filename: archive file to create
+    :return: number of passages written
+    :raise ValueError: if two passages have the same ID (in which case `filename' is not changed)
+    """
+    index = []
+    ids = set()
+    temp_filename = filename + ".tmp"
+    try:
+        with open(temp_filename, "wb") as f:
+            f.write(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0))
+            for passage in passages:
+                passage_id = str(passage.ID)
+                if passage_id in ids:
+                    raise ValueError("Duplicate passage ID in archive: %s" % passage_id)
+                ids.add(passage_id)
+                data = to_binary(passage)
+                index.append((passage_id, f.tell(), len(data)))
+                f.write(data)
+            index_offset = f.tell()
+            f.write(json.dumps(index).encode("utf-8"))
+            f.seek(0)
+            f.write(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, index_offset))
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.remove(temp_filename)
+        raise
+    return len(index)
+
+
 def resolve_patterns(filename_patterns):
     for pattern in [filename_patterns] if isinstance(filename_patterns, str) else filename_patterns:
         yield from sorted(glob(pattern)) or [pattern]
 
 
 def get_passages_with_progress_bar(filename_patterns, desc=None, **kwargs):
-    filenames = list(resolve_patterns(filename_patterns))
+    filenames = list(gen_files(resolve_patterns(filename_patterns)))
     t = tqdm(read_files_and_dirs(filenames, **kwargs), desc=desc, unit=" passages", total=len(filenames))
     for passage in t:
         t.set_postfix(ID=passage.ID)
@@ -124,8 +279,8 @@ def get_passages_with_progress_bar(filename_patterns, desc=None, **kwargs):
 
 
 def get_passages(filename_patterns, **kwargs):
-    for filenames in resolve_patterns(filename_patterns):
-        yield from read_files_and_dirs(filenames, **kwargs)
+    # All patterns are read together, so that a single process pool is used if workers > 1
+    yield from read_files_and_dirs(list(resolve_patterns(filename_patterns)), **kwargs)
 
 
 def gen_files(files_and_dirs):
@@ -142,7 +297,7 @@ def gen_files(files_and_dirs):
 
 
 def read_files_and_dirs(files_and_dirs, sentences=False, paragraphs=False, converters=None, lang=DEFAULT_LANG,
-                        attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY):
+                        attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY, stream=False, workers=1, prefetch=None):
     """
     :param files_and_dirs: iterable of files and/or directories to look in
     :param sentences: whether to split to sentences
@@ -151,10 +306,16 @@ def read_files_and_dirs(files_and_dirs, sentences=False, paragraphs=False, conve
     :param lang: language to use for tokenization model
     :param attempts: number of times to try reading a file before giving up
     :param delay: number of seconds to wait before subsequent attempts to read a file
-    :return: lazy-loaded passages from all files given, plus any files directly under any directory given
+    :param stream: whether to read XML files incrementally, allowing several passages per file
+                   (see :func:`ucca.convert.iter_from_standard`)
+    :return: lazy-loaded passages from all files given, plus any files directly under any directory given.
+             Archive files (with ARCHIVE_SUFFIX, see :func:`write_archive`) yield all passages in them.
+    :param workers: number of processes to load files in parallel (passages are still returned in file order)
+    :param prefetch: maximum number of files to load ahead if workers > 1 (default: twice the number of workers)
     """
     return LazyLoadedPassages(list(gen_files(files_and_dirs)), sentences=sentences, paragraphs=paragraphs,
-                              converters=converters, lang=lang, attempts=attempts, delay=delay)
+                              converters=converters, lang=lang, attempts=attempts, delay=delay, stream=stream,
+                              workers=workers, prefetch=prefetch)
 
 
 def write_passage(passage, output_format=None, binary=False, outdir=".", prefix="", converter=None, verbose=True,
@@ -163,7 +324,8 @@ def write_passage(passage, output_format=None, binary=False, outdir=".", prefix=
     Write a given UCCA passage in any format.
     :param passage: Passage object to write
     :param output_format: filename suffix (if given "ucca", suffix will be ".pickle" or ".xml" depending on `binary')
-    :param binary: save in pickle format with ".pickle" suffix
+    :param binary: save in pickle format with ".pickle" suffix, or if given "ucca", in the compact binary format
+                   with ".ucca" suffix (see :func:`ucca.convert.to_binary`)
     :param outdir: output directory, should exist already
     :param prefix: string to prepend to output filename
     :param converter: function to apply to passage before saving (if output_format is not "ucca"/"pickle"/"xml"),
@@ -174,7 +336,8 @@ def write_passage(passage, output_format=None, binary=False, outdir=".", prefix=
     :return: path of created output file
     """
     os.makedirs(outdir, exist_ok=True)
-    suffix = output_format if output_format and output_format != "ucca" else ("pickle" if binary else "xml")
+    suffix = output_format if output_format and output_format != "ucca" else \
+        ("ucca" if binary == "ucca" else "pickle") if binary else "xml"
     outfile = os.path.join(outdir, prefix + (basename or passage.ID) + "." + suffix)
     if verbose:
         with external_write_mode():
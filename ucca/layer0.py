@@ -46,6 +46,8 @@ class Terminal(core.Node):
 
     """
 
+    __slots__ = ()
+
     @property
     def text(self):
         return self.attrib['text']
@@ -104,6 +106,10 @@ class Terminal(core.Node):
                 and self.paragraph == other.paragraph
                 and self.para_pos == other.para_pos)
 
+    def _fingerprint_key(self):
+        """Returns a hashable key, equal for two Terminals iff they are equal by :meth:`equals`."""
+        return self.layer.ID, self.text, self.position, self.tag, self.paragraph, self.para_pos
+
     def __eq__(self, other):
         """Equals if both of the same Passage, Layer, position, tag & text."""
         return (isinstance(other, Terminal) and other.layer.ID == LAYER_ID
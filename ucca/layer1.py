@@ -8,7 +8,6 @@ the type of relation between the Nodes.
 
 """
 
-import itertools
 import operator
 
 from ucca import core, layer0
@@ -98,6 +97,12 @@ def _multiple_children_by_tag(node, tag):
     return [edge.child for edge in node if tag in edge.tags]
 
 
+def _unique_number(node):
+    """Returns the numeric part of the Node's unique ID, or 0 if it is not numeric."""
+    unique = node.ID.partition(core.Node.ID_SEPARATOR)[2]
+    return int(unique) if unique.isdecimal() else 0
+
+
 class Linkage(core.Node):
     """A Linkage between parallel scenes.
 
@@ -115,6 +120,8 @@ class Linkage(core.Node):
 
     """
 
+    __slots__ = ()
+
     @property
     def relation(self):
         return _single_child_by_tag(self, EdgeTags.LinkRelation)
@@ -182,6 +189,8 @@ class FoundationalNode(core.Node):
 
     """
 
+    __slots__ = ()
+
     @property
     def participants(self):
         return _multiple_children_by_tag(self, EdgeTags.Participant)
@@ -248,7 +257,7 @@ class FoundationalNode(core.Node):
 
     def _fedge(self):
         """Returns the Edge of the fparent, or None."""
-        for edge in self.incoming:
+        for edge in self.iter_incoming():
             if (edge.parent.layer.ID == LAYER_ID and
                 edge.parent.tag == NodeTags.Foundational and
                     not edge.attrib.get('remote')):
@@ -278,36 +287,80 @@ class FoundationalNode(core.Node):
         :return: a list of :class:`layer0`.Terminal objects
         """
         if visited is None:
+            if not remotes:
+                spans = self._get_spans()
+                if spans is not None:
+                    return list(spans[0 if punct else 1])
             return sorted(self.get_terminals(punct=punct, remotes=remotes, visited=set()),
                           key=operator.attrgetter("position"))
         outgoing = {e for e in set(self) - visited if remotes or not e.attrib.get("remote")}
         return [t for e in outgoing for t in e.child.get_terminals(
             punct=punct, remotes=remotes, visited=visited | outgoing)]
 
+    def _get_spans(self, visiting=None):
+        """Returns the Terminals under self, not through remote Edges, sorted by position.
+
+        The result is cached until an Edge is added or removed anywhere below self.
+        Computing it caches the spans of all descendants too.
+
+        :param visiting: the nodes currently being computed, used to detect cycles
+
+        :return: a pair of tuples of :class:`layer0`.Terminal objects, with and
+                without punctuation, or None if there is a cycle (and then nothing is cached)
+        """
+        if self._spans is None:
+            if visiting is None:
+                visiting = set()
+            visiting.add(self)
+            terminals, no_punct = [], []
+            for edge in self._outgoing:
+                if edge.attrib.get("remote"):
+                    continue
+                child = edge.child
+                if child in visiting:
+                    return None
+                if isinstance(child, FoundationalNode):
+                    spans = child._get_spans(visiting)
+                    if spans is None:
+                        return None
+                    terminals += spans[0]
+                    no_punct += spans[1]
+                else:
+                    terminals += child.get_terminals()
+                    no_punct += child.get_terminals(punct=False)
+            visiting.discard(self)
+            key = operator.attrgetter("position")
+            terminals.sort(key=key)
+            no_punct.sort(key=key)
+            self._spans = tuple(terminals), tuple(no_punct)
+        return self._spans
+
+    def _get_positions(self):
+        """Returns the positions of :meth:`get_terminals` (with punctuation, without remotes)."""
+        spans = self._get_spans()
+        return [t.position for t in (self.get_terminals() if spans is None else spans[0])]
+
     @property
     def start_position(self):
-        try:
-            return self.get_terminals()[0].position
-        except IndexError:  # implicit unit or having no Terminals
-            return -1
+        spans = self._get_spans()
+        terminals = self.get_terminals() if spans is None else spans[0]
+        return terminals[0].position if terminals else -1  # -1 for implicit unit or having no Terminals
 
     @property
     def end_position(self):
-        try:
-            return self.get_terminals()[-1].position
-        except IndexError:  # implicit unit or having no Terminals
-            return -1
+        spans = self._get_spans()
+        terminals = self.get_terminals() if spans is None else spans[0]
+        return terminals[-1].position if terminals else -1  # -1 for implicit unit or having no Terminals
 
     @property
     def discontiguous(self):
-        terms = self.get_terminals()
-        return any(terms[i].position + 1 != terms[i + 1].position
-                   for i in range(len(terms) - 1))
+        pos = self._get_positions()
+        return any(pos[i] + 1 != pos[i + 1] for i in range(len(pos) - 1))
 
     def get_sequences(self):
         if self.attrib.get('implicit'):
             return []
-        pos = sorted([x.position for x in self.get_terminals()])
+        pos = self._get_positions()
 
         # all terminals which end a sequence, including the last one
         seq_closers = [pos[i] for i in range(len(pos) - 1)
@@ -355,7 +408,7 @@ class FoundationalNode(core.Node):
 
     def get_top_scene(self):
         """Returns the top-level scene this FNode is within, or None"""
-        if self in self.layer.top_scenes:
+        if self.layer.is_top_scene(self):
             return self
         elif self.fparent is None:
             return None
@@ -376,6 +429,8 @@ class PunctNode(FoundationalNode):
 
     """
 
+    __slots__ = ()
+
     def add(self, edge_tag, node, *, edge_attrib=None):
         if node.layer.ID != layer0.LAYER_ID:
             raise ValueError("Non-terminal child (%s) for %s node (%s)" % (node.ID, NodeTags.Punctuation, self.ID))
@@ -398,6 +453,11 @@ class PunctNode(FoundationalNode):
         """
         return self.children if punct else ()
 
+    def _get_spans(self, visiting=None):
+        if self._spans is None:
+            self._spans = tuple(self.iter_children()), ()
+        return self._spans
+
     def __str__(self):
         return self.to_text()
 
@@ -407,11 +467,19 @@ class Layer1(core.Layer):
 
     """
 
+    # Whether the top-level scenes and linkages need to be re-computed (always so for old pickles)
+    _top_stale = True
+    # Number of the next ID to allocate, higher than that of any node ever added (unknown for old pickles)
+    _next_id = None
+
     def __init__(self, root, attrib=None, *, orderkey=core.id_orderkey):
         super().__init__(ID=LAYER_ID, root=root, attrib=attrib,
                          orderkey=orderkey)
         self._scenes = []
+        self._scene_set = set()
         self._linkages = []
+        self._top_stale = False
+        self._next_id = 1
         self._head_fnode = FoundationalNode(root=root,
                                             tag=NodeTags.Foundational,
                                             ID=self.next_id())
@@ -420,20 +488,43 @@ class Layer1(core.Layer):
 
     @property
     def top_scenes(self):
+        self._check_top_index()
         return self._scenes[:]
 
     @property
     def top_linkages(self):
+        self._check_top_index()
         return self._linkages[:]
 
+    def is_top_scene(self, node):
+        """Returns whether the given node is one of :attr:`top_scenes`, without copying them."""
+        self._check_top_index()
+        return node in self._scene_set
+
+    def _clone(self, root, nodes):
+        other = super()._clone(root, nodes)
+        if not self._top_stale:
+            other._scenes = [nodes[node.ID] for node in self._scenes]
+            other._scene_set = set(other._scenes)
+            other._linkages = [nodes[node.ID] for node in self._linkages]
+        other._head_fnode = nodes[self._head_fnode.ID]
+        return other
+
     def next_id(self):
-        """Returns the next available ID string for this layer."""
-        for n in itertools.count(start=len(self._all) + 1):
-            id_str = "{}{}{}".format(LAYER_ID, core.Node.ID_SEPARATOR, n)
-            try:
-                self._root.by_id(id_str)
-            except KeyError:
-                return id_str
+        """Returns the next available ID string for this layer.
+
+        IDs are allocated in increasing order, after the highest numeric ID of any node added to the layer,
+        so IDs of destroyed nodes are not reused, and no search for an unused ID is needed.
+        The ID is only taken by adding a node with it, so calling this again before that returns the same ID.
+        """
+        if self._next_id is None:  # unpickled from before IDs were allocated this way
+            self._next_id = max(map(_unique_number, self._all), default=0) + 1
+        return "{}{}{}".format(LAYER_ID, core.Node.ID_SEPARATOR, self._next_id)
+
+    def _add_node(self, node):
+        super()._add_node(node)
+        if self._next_id is not None:
+            self._next_id = max(self._next_id, _unique_number(node) + 1)
 
     def add_fnode_multiple(self, parent, edge_categories, *, implicit=False, edge_attrib=None):
         """Adds a new :class:`FNode` whose parent and Edge tag are given.
@@ -540,39 +631,33 @@ class Layer1(core.Layer):
                 return False
         return True
 
-    def _update_top_scene(self, node):
-        """Adds/removes the node if it's a top-level scene."""
-        if node.tag != NodeTags.Foundational:
-            return
-        if node in self._scenes and not self._check_top_scene(node):
-            self._scenes.remove(node)
-        elif node not in self._scenes and self._check_top_scene(node):
-            self._scenes.append(node)
-            # Other scenes may now become not top-level, check it
-            for ts in self._scenes[:-1]:
-                if not self._check_top_scene(ts):
-                    self._scenes.remove(ts)
-            self._scenes.sort(key=self.orderkey)
-
-    def _update_top_linkage(self, linkage):
-        """Adds/removes the linkage if it's a top level linkage."""
-        if all(fnode in self._scenes for fnode in linkage.arguments):
-            if linkage not in self._linkages:
-                self._linkages.append(linkage)
-                self._linkages.sort(key=self.orderkey)
-        elif linkage in self._linkages:
-            self._linkages.remove(linkage)
-
     def _update_edge(self, edge):
-        """Adds the Edge to the Layer, and updates top scenes and linkers."""
-        self._update_top_scene(edge.parent)
-        self._update_top_scene(edge.child)
-        for lkg in [x for x in edge.parent.parents
-                    if x.tag == NodeTags.Linkage]:
-            self._update_top_linkage(lkg)
-        for lkg in [x for x in edge.child.parents
-                    if x.tag == NodeTags.Linkage]:
-            self._update_top_linkage(lkg)
+        """Marks the top scenes and linkages for re-computation after an Edge change.
+
+        Adding or removing a single Edge may change the top-level status of any
+        scene below it, so they are all re-computed together on the next access.
+
+        """
+        self._top_stale = True
+
+    def _check_top_index(self):
+        self._check_index()
+        if self._top_stale:
+            self._index_top()
+
+    def _index_top(self):
+        """Re-computes the top-level scenes and linkages from scratch."""
+        self._scenes = [node for node in self._all
+                        if node.tag == NodeTags.Foundational and self._check_top_scene(node)]
+        self._scene_set = set(self._scenes)
+        self._linkages = [node for node in self._all if node.tag == NodeTags.Linkage and
+                          all(fnode in self._scene_set for fnode in node.arguments)]
+        self._top_stale = False
+
+    def _reindex(self):
+        """Re-computes the heads after bulk build, and marks the top-level scenes and linkages for re-computation."""
+        super()._reindex()
+        self._top_stale = True
 
     def _add_edge(self, edge):
         super()._add_edge(edge)
@@ -1,3 +1,5 @@
+from collections import Counter
+
 from ucca import layer0, layer1
 from ucca.layer0 import NodeTags as L0Tags
 from ucca.layer1 import EdgeTags as ETags, NodeTags as L1Tags
@@ -7,12 +9,14 @@ NO_MULTIPLE_INCOMING_CATEGORIES = {ETags.Function, ETags.ParallelScene, ETags.Li
 TOP_CATEGORIES = {ETags.ParallelScene, ETags.Linker, ETags.Function, ETags.Ground, ETags.Punctuation,
                   ETags.LinkRelation, ETags.LinkArgument, ETags.Connector}
 COORDINATED_MAIN_REL = "Coordinated_Main_Rel."
+# Edge categories of a node without which none of the rules in normalize_node (other than the extra ones) applies
+RULE_CATEGORIES = {ETags.Center, ETags.Function, ETags.Participant, ETags.Process, ETags.State}
 
 
 def traverse_up_centers(node):
     while True:
         found_center = False
-        for edge in node.incoming:
+        for edge in node.iter_incoming():
             if not edge.attrib.get("remote") and layer1.EdgeTags.Center in edge.tags:
                 node = edge.parent
                 found_center = True
@@ -28,11 +32,11 @@ def fparent(node_or_edge):
         try:
             return node_or_edge.parent
         except AttributeError:
-            return node_or_edge.parents[0] if node_or_edge.parents else None
+            return next(node_or_edge.iter_parents(), None)
 
 
 def remove_unmarked_implicits(node):
-    while node is not None and not node.children and not node.attrib.get("implicit"):
+    while node is not None and not len(node) and not node.attrib.get("implicit"):
         parent = fparent(node)
         if parent is None:
             break
@@ -77,7 +81,7 @@ def copy_edge(edge, parent=None, child=None, tag=None, attrib=None):
 
 
 def replace_center(edge):
-    if len(edge.parent) == 1 and not edge.parent.parents:
+    if len(edge.parent) == 1 and next(edge.parent.iter_parents(), None) is None:
         return ETags.ParallelScene
     if edge.parent.participants and not edge.parent.is_scene():
         return ETags.Process  # TODO should be state if the word is a copula
@@ -135,14 +139,30 @@ def separate_scenes(node, l1, top_level=False):
                     remove(node, edge)
 
 
+def ancestor_ids(node):
+    """
+    Returns the set of id() of the node and all nodes it is reachable from, i.e., the nodes whose iter() yields it.
+    """
+    ids = {id(node)}
+    stack = [node]
+    while stack:
+        for parent in stack.pop().iter_parents():
+            if id(parent) not in ids:
+                ids.add(id(parent))
+                stack.append(parent)
+    return ids
+
+
 def lowest_common_ancestor(*nodes):
     parents = [nodes[0]] if nodes else []
+    # Going up from each of the other nodes once is much cheaper than going down the subtree of each candidate
+    ancestors = [ancestor_ids(n) for n in nodes[1:]]
     while parents:
         for parent in parents:
-            if parent.tag == L1Tags.Foundational and (not parent.terminals or nodes[1:]) \
-                    and all(n in parent.iter() for n in nodes[1:]):
+            if parent.tag == L1Tags.Foundational and (len(nodes) > 1 or not parent.terminals) \
+                    and all(id(parent) in ids for ids in ancestors):
                 return parent
-        parents = [p for n in parents for p in n.parents]
+        parents = [p for n in parents for p in n.iter_parents()]
     return None
 
 
@@ -163,13 +183,16 @@ def nearest_parent(l0, *terminals):
 
 
 def reattach_punct(l0, l1):
-    detach_punct(l1)
-    attach_punct(l0, l1)
+    # Punctuation is attached according to terminal positions only, not to the order of edges, so re-sorting and
+    # re-indexing can be deferred until all punctuation is re-attached
+    with l1.root.bulk_build():
+        detach_punct(l1)
+        attach_punct(l0, l1)
 
 
 def attach_punct(l0, l1):
     for terminal in l0.all:
-        if layer0.is_punct(terminal) and not terminal.incoming:
+        if layer0.is_punct(terminal) and next(terminal.iter_incoming(), None) is None:
             l1.add_punct(nearest_parent(l0, terminal), terminal)
 
 
@@ -191,7 +214,7 @@ def reattach_terminals(l0, l1):
 
 def attach_terminals(l0, l1):
     for terminal in l0.all:
-        if not terminal.incoming:
+        if next(terminal.iter_incoming(), None) is None:
             node = l1.add_fnode(nearest_parent(l0, terminal), ETags.Function)
             node.add(ETags.Terminal, terminal)
 
@@ -209,10 +232,10 @@ def flatten_centers(node):
             for edge in node:
                 copy_edge(edge, parent=fparent(node))
             return destroy(node)
-        elif len(node.children) == 1:  # Center as only child
+        elif len(node) == 1:  # Center as only child
             for edge in node.incoming:
                 attrib = edge.attrib
-                if node.outgoing[0].attrib.get("remote"):
+                if node[0].attrib.get("remote"):
                     attrib["remote"] = True
                 copy_edge(edge, child=node.centers[0], attrib=attrib)
             return destroy(node)
@@ -225,11 +248,11 @@ def flatten_functions(node):
     """
     if node.tag == L1Tags.Foundational and node.incoming:  # Avoid creating root->terminal edge
         for child in node.functions:
-            if len(child.children) > len(child.terminals):
+            if len(child) > len(child.terminals):
                 for edge in child:
                     copy_edge(edge, parent=node, tag=ETags.Function if edge.tag == ETags.Center else edge.tag)
                 destroy(child)
-        if len(node.functions) == len(node.children) == 1:
+        if len(node.functions) == len(node) == 1:
             for edge in node.incoming:
                 copy_edge(edge, child=node.functions[0])
             return destroy(node)
@@ -243,7 +266,7 @@ def flatten_participants(node):
     """
     if node.tag == L1Tags.Foundational:
         participants = node.participants
-        if len(participants) == len(node.children) == 1 and len(participants[0].ftags) == 1:
+        if len(participants) == len(node) == 1 and len(participants[0].ftags) == 1:
             for edge in node.incoming:
                 copy_edge(edge, child=participants[0])
             return destroy(node)
@@ -297,53 +320,100 @@ def split_coordinated_main_rel(node, l1):
     return node
 
 
-def normalize_node(node, l1, extra):
+def is_normalized(node):
+    """
+    Read-only check whether the rules in normalize_node (other than the extra ones) leave the node as it is,
+    so that they can be skipped without trying each in turn.
+    """
+    return not any(RULE_CATEGORIES.intersection(edge.tags) or edge.attrib.get(COORDINATED_MAIN_REL) for edge in node)
+
+
+def _apply(changes, rule, node, *args, **kwargs):
+    """
+    Apply a normalization rule to a node, counting it in `changes' if the node's edges were replaced or retagged.
+    :return: the return value of the rule
+    """
+    state = [edge.tag for edge in node] if rule is replace_edge_tags else node._outgoing[:]
+    result = rule(node, *args, **kwargs)
+    if state != ([edge.tag for edge in node] if rule is replace_edge_tags else node._outgoing):
+        changes[rule.__name__] += 1
+    return result
+
+
+def normalize_node(node, l1, extra, changes=None):
+    if changes is None:
+        changes = Counter()
     if node.tag == L1Tags.Foundational:
         if extra:
-            replace_edge_tags(node)
-            move_scene_elements(node)
-            move_sub_scene_elements(node)
-        separate_scenes(node, l1, top_level=node in l1.heads)
-        node = split_coordinated_main_rel(node, l1)
+            _apply(changes, replace_edge_tags, node)
+            _apply(changes, move_scene_elements, node)
+            _apply(changes, move_sub_scene_elements, node)
+        if is_normalized(node):
+            return
+        _apply(changes, separate_scenes, node, l1, top_level=node in l1.heads)
+        node = _apply(changes, split_coordinated_main_rel, node, l1)
         if node is None:
             return None
-        node = flatten_centers(node)
+        node = _apply(changes, flatten_centers, node)
         if node is None:
             return
-        node = flatten_functions(node)
+        node = _apply(changes, flatten_functions, node)
         if node is None:
             return
-        flatten_participants(node)
+        _apply(changes, flatten_participants, node)
 
 
 def normalize(passage, extra=False):
+    """
+    Normalize a passage in place: re-attach punctuation, then apply the rules in normalize_node to each node,
+    top-down, removing cycles on the way.
+    :param passage: Passage object to normalize
+    :param extra: whether to apply extra normalization rules
+    :return: Counter of the number of nodes changed by each rule (by function name, or "remove_cycle")
+    """
     l0 = passage.layer(layer0.LAYER_ID)
     l1 = passage.layer(layer1.LAYER_ID)
+    changes = Counter()
     reattach_punct(l0, l1)
-    heads = list(l1.heads)
-    stack = [heads]
-    visited = set()
+    # Each entry is a node (or the list of heads) with its edges when last scanned and the position to resume from.
+    # Scanning restarts from the first edge only if the edges were changed since, rather than every time.
+    stack = [[l1.heads, None, 0]]
+    # Maps id() of visited nodes, which are cheaper to hash than Terminals, to the nodes themselves: keeping them alive
+    # means nodes destroyed by a rule are not freed, so a node created later by another rule cannot get the same id()
+    visited = {}
     path = []
     path_set = set()
     while stack:
-        for edge in stack[-1]:
+        entry = stack[-1]
+        edges = entry[0] if isinstance(entry[0], list) else entry[0]._outgoing
+        i = entry[2] if entry[1] is not None and entry[1] == edges else 0
+        modified = False
+        while i < len(edges):
+            edge = edges[i]
+            i += 1
             try:
                 node = edge.child
             except AttributeError:
                 node = edge
-            if node in path_set:
+            if id(node) in path_set:
                 destroy(edge)
-            elif node not in visited:
-                visited.add(node)
+                changes["remove_cycle"] += 1
+                modified = True
+            elif id(node) not in visited:
+                visited[id(node)] = node
+                if node.layer is l0:  # Terminals have no children and no rules apply to them
+                    continue
+                entry[1:] = (None, 0) if modified else (edges[:], i)
                 path.append(node)
-                path_set.add(node)
-                stack.append(node)
-                normalize_node(node, l1, extra)
+                path_set.add(id(node))
+                stack.append([node, None, 0])
+                normalize_node(node, l1, extra, changes)
                 break
         else:
             if path:
-                path_set.remove(path.pop())
+                path_set.remove(id(path.pop()))
             stack.pop()
     reattach_punct(l0, l1)
     if extra:
         reattach_terminals(l0, l1)
+    return changes
@@ -1,7 +1,11 @@
 import xml.etree.ElementTree as ETree
+from io import BytesIO, StringIO
 
-from ucca import layer0, layer1, convert, textutil
-from .conftest import loaded, load_xml
+import numpy as np
+import pytest
+
+from ucca import core, layer0, layer1, convert, textutil
+from .conftest import loaded, load_xml, PASSAGES
 
 """Tests convert module correctness and API."""
 
@@ -165,6 +169,103 @@ def test_from_standard():
     assert passage.equals(ref, ordered=True)
 
 
+@pytest.mark.parametrize("create", PASSAGES)
+def test_iter_from_standard(create):
+    passage = create()
+    xml = ETree.tostring(convert.to_standard(passage))
+    streamed, = convert.iter_from_standard(BytesIO(xml))
+    assert passage.equals(streamed, ordered=True)
+    for layer in passage.layers:
+        assert [n.ID for n in layer.heads] == [n.ID for n in streamed.layer(layer.ID).heads]
+    assert ETree.tostring(convert.to_standard(streamed)) == xml
+    corpus = list(convert.iter_from_standard(BytesIO(b"<corpus>" + xml + xml + b"</corpus>")))
+    assert len(corpus) == 2 and all(passage.equals(p, ordered=True) for p in corpus)
+
+
+def test_iter_from_standard_error(monkeypatch):
+    xml = ETree.tostring(convert.to_standard(loaded()))
+    from_standard_node = convert._from_standard_node
+    built = []
+
+    def _from_standard_node(elem, layer, *args):
+        built.append(layer.root)
+        if len(built) > 3:
+            raise ValueError("Invalid node")
+        return from_standard_node(elem, layer, *args)
+
+    monkeypatch.setattr(convert, "_from_standard_node", _from_standard_node)
+    with pytest.raises(ValueError):
+        list(convert.iter_from_standard(BytesIO(xml)))
+    assert not built[0]._bulk_depth, "Bulk build should be exited on error"
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+@pytest.mark.parametrize("indent", (True, False))
+def test_write_standard(create, indent):
+    passage = create()
+    passage.attrib["text"] = 'a&b<c>"d\'\r\n\t \u05e9'
+    passage.extra["list"] = [1, {"a": "\u00fc"}]
+    passage.layer(layer1.LAYER_ID).heads[0].extra["tuple"] = (1, 2)
+    xml_string = ETree.tostring(convert.to_standard(passage)).decode()
+    out = StringIO()
+    convert.write_standard(passage, out, indent=indent)
+    assert out.getvalue() == (textutil.indent_xml(xml_string) if indent else xml_string)
+    assert convert.from_standard(ETree.fromstring(out.getvalue())).equals(passage, ordered=True)
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_binary(create):
+    passage = create()
+    passage.extra["list"] = [1, {"a": "\u00fc"}]
+    data = convert.to_binary(passage)
+    converted = convert.from_binary(data)
+    assert passage.equals(converted, ordered=True)
+    assert converted.extra == passage.extra
+    assert (ETree.tostring(convert.to_standard(passage)) ==
+            ETree.tostring(convert.to_standard(converted)))
+    # Nodes and edges are created directly, so check that the passage is indexed as if built by the constructors
+    assert converted.categories == passage.categories and converted.refined_categories == passage.refined_categories
+    for layer in passage.layers:
+        other = converted.layer(layer.ID)
+        assert [n.ID for n in other.heads] == [n.ID for n in layer.heads]
+        assert [n.ID for n in other.all] == [n.ID for n in layer.all]
+    l1 = converted.layer(layer1.LAYER_ID)
+    assert l1.next_id() == passage.layer(layer1.LAYER_ID).next_id()
+    assert [n.ID for n in l1.top_scenes] == [n.ID for n in passage.layer(layer1.LAYER_ID).top_scenes]
+    with pytest.raises(core.UCCAError):
+        convert.from_binary(data.replace(convert.BINARY_MAGIC, b"XXXX", 1))
+    with pytest.raises(core.UCCAError):
+        convert.from_binary(data[:4] + bytes([convert.BINARY_VERSION + 1, 0]) + data[6:])
+
+
+def test_binary_from_standard():
+    passage = convert.from_standard(load_xml("test_files/120_parsed.xml"))
+    terminals = passage.layer(layer0.LAYER_ID).all
+    assert list(terminals[0].attrib) != list(layer0.ATTRIB_KEYS), "Standard XML keys should be in another order"
+    data = convert.to_binary(passage)
+    assert data.count(b"paragraph_position") == 1, "Terminal attributes should be in the table, not in JSON"
+    converted = convert.from_binary(data)
+    assert [t.attrib for t in converted.layer(layer0.LAYER_ID).all] == [t.attrib for t in terminals]
+    assert [list(t.attrib) for t in converted.layer(layer0.LAYER_ID).all] == [list(t.attrib) for t in terminals]
+    assert ETree.tostring(convert.to_standard(converted)) == ETree.tostring(convert.to_standard(passage))
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_doc_arrays(create):
+    passage = create()
+    l0 = passage.layer(layer0.LAYER_ID)
+    l0.extra["doc"] = [[[2 ** 64 - 1 - j, j, 2, 3, 4, -1, 6, -j, 8, 9, 10] for j in range(len(terminals))]
+                       for terminals in textutil.break2paragraphs(passage, return_terminals=True)]
+    expected = [[t.text, list(t.tok)] for t in l0.all]
+    xml_string = ETree.tostring(convert.to_standard(passage))
+    for converted in (convert.from_standard(ETree.fromstring(xml_string)),
+                      convert.from_binary(convert.to_binary(passage))):
+        converted_l0 = converted.layer(layer0.LAYER_ID)
+        assert all(isinstance(doc, np.ndarray) for doc in converted_l0.extra["doc"])
+        assert [[t.text, [int(v) for v in t.tok]] for t in converted_l0.all] == expected
+        assert ETree.tostring(convert.to_standard(converted)) == xml_string
+
+
 def test_from_text():
     sample = ["Hello . again", "nice", " ? ! end", ""]
     passage = next(convert.from_text(sample))
@@ -147,6 +147,30 @@ def test_equals():
     assert not (p1.equals(p2) or p2.equals(p1))
 
 
+def test_missing():
+    p1 = core.Passage("1")
+    p2 = core.Passage("2")
+    for p in p1, p2:
+        l0 = layer0.Layer0(p)
+        l1 = layer1.Layer1(p)
+        terminals = [l0.add_terminal(text, False) for text in "abc"]
+        ps = l1.add_fnode(None, layer1.EdgeTags.ParallelScene)
+        for tag, terminal in zip((layer1.EdgeTags.Participant, layer1.EdgeTags.Process), terminals):
+            l1.add_fnode(ps, tag).add(layer1.EdgeTags.Terminal, terminal)
+    assert not p1.missing_nodes(p2) and not p2.missing_nodes(p1)
+    ps1, ps2 = [p.layer(layer1.LAYER_ID).heads[0].children[0] for p in (p1, p2)]
+    ps2.attrib["uncertain"] = True  # irrelevant attribute
+    assert p1.equals(p2) and not p1.missing_nodes(p2)
+    a2 = ps2.children[0]
+    a2.add(layer1.EdgeTags.Terminal, p2.layer(layer0.LAYER_ID).all[2])
+    assert not p1.equals(p2)
+    assert [n.ID for n in p2.missing_nodes(p1)] == [p2.layer(layer1.LAYER_ID).heads[0].ID, ps2.ID, a2.ID]
+    assert [e.ID for e in ps2.missing_edges(ps1)] == [ps2[0].ID]
+    assert [e.ID for e in ps1.missing_edges(ps2)] == [ps1[0].ID]
+    assert not ps2.missing_edges(ps1, ignore_node=lambda n: n.ID == a2.ID)
+    assert p1.equals(p2, ignore_node=lambda n: n.ID == a2.ID)
+
+
 @pytest.mark.parametrize("create", PASSAGES)
 def test_copying(create):
     # we don't need such a complex passage, but it will work anyway
@@ -163,6 +187,33 @@ def test_copying(create):
     assert (p1.layer(l0id).equals(p2.layer(l0id)))
 
 
+@pytest.mark.parametrize("create", PASSAGES)
+def test_clone(create):
+    p1 = create()
+    p1.extra["test"] = [1]
+    p2 = p1.clone()
+    assert p1.equals(p2, ordered=True)
+    assert p2.extra == p1.extra and p2.extra["test"] is not p1.extra["test"]
+    for lid in p1._layers:
+        for attr in ("all", "heads"):
+            assert [n.ID for n in getattr(p1.layer(lid), attr)] == [n.ID for n in getattr(p2.layer(lid), attr)]
+    for node in p2.nodes.values():
+        assert node.root is p2 and node._attrib.root is p2 and node is not p1.by_id(node.ID)
+        for edge in node:
+            assert edge.root is p2 and edge.child is p2.by_id(edge.child.ID)
+            assert edge in edge.child.incoming
+    l1 = p2.layer(layer1.LAYER_ID)
+    assert [n.ID for n in p1.layer(layer1.LAYER_ID).top_scenes] == [n.ID for n in l1.top_scenes]
+    assert all(n.root is p2 for n in l1.top_scenes + l1.top_linkages)
+    # Modifying the clone does not affect the original
+    for node in l1.all:
+        for edge in list(node):
+            node.remove(edge)
+    l1.heads[0].attrib["test"] = True
+    assert not p1.equals(p2)
+    assert p1.equals(create(), ordered=True)
+
+
 def test_iteration():
     p = basic()
     l1, l2 = p.layer("1"), p.layer("2")
@@ -177,3 +228,117 @@ def test_iteration():
     assert list(node21.iter(duplicates=True)) == [node21, node11, node12, node13, node11]
     assert list(node21.iter()) == [node21, node11, node12, node13]
     assert list(node22.iter(method="bfs", duplicates=True)) == [node22, node11, node12, node13, node13, node11]
+    for node in p.nodes.values():
+        assert list(node.iter_children()) == node.children
+        assert list(node.iter_parents()) == node.parents
+        assert tuple(node.iter_incoming()) == node.incoming
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_node_layer(create):
+    import pickle
+    p1 = create()
+    for p2 in p1, p1.clone(), pickle.loads(pickle.dumps(p1)):
+        for node in p2.nodes.values():
+            assert node.layer is p2.layer(node.ID.partition(core.Node.ID_SEPARATOR)[0])
+            assert node in node.layer.all
+    with pytest.raises(ValueError):
+        core.Node(ID="3.1", root=p1, tag="test")
+    assert "3.1" not in p1.nodes
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_bulk_build(create):
+    p1 = create()
+    p2 = core.Passage(p1.ID)
+    with p2.bulk_build():
+        l0 = layer0.Layer0(p2)
+        l1 = layer1.Layer1(p2)
+        for terminal in p1.layer(layer0.LAYER_ID).all:
+            l0.add_terminal(terminal.text, terminal.punct, terminal.paragraph)
+        for node in sorted(p1.layer(layer1.LAYER_ID).all, key=core.id_orderkey, reverse=True):
+            if node.ID not in p2.nodes:
+                type(node)(ID=node.ID, root=p2, tag=node.tag, attrib=node.attrib.copy())
+        assert [n.ID for n in l1.heads] == [n.ID for n in p1.layer(layer1.LAYER_ID).all]
+        for node in p1.layer(layer1.LAYER_ID).all:
+            for edge in reversed(node.outgoing):
+                p2.by_id(node.ID).add_multiple([tuple(c) for c in edge], p2.by_id(edge.child.ID),
+                                               edge_attrib=edge.attrib.copy())
+    assert p1.equals(p2, ordered=True)
+    for lid in (layer0.LAYER_ID, layer1.LAYER_ID):
+        for attr in ("all", "heads"):
+            assert [n.ID for n in getattr(p1.layer(lid), attr)] == [n.ID for n in getattr(p2.layer(lid), attr)]
+    assert [n.ID for n in p1.layer(layer1.LAYER_ID).top_scenes] == [n.ID for n in l1.top_scenes]
+    assert [n.ID for n in p1.layer(layer1.LAYER_ID).top_linkages] == [n.ID for n in l1.top_linkages]
+
+
+def test_id_orderkey():
+    p = core.Passage("1")
+    core.Layer("1", p)
+    core.Layer("2", p)
+    ids = ["2.1", "1.10", "1.9", "1.100", "1.2", "2.03", "1.x", "1.123456"]
+    nodes = [core.Node(ID=ID, root=p, tag="1") for ID in ids]
+    # Unique IDs are padded to UNIQUE_ID_MAX_DIGITS and compared as strings
+    assert [n.ID for n in sorted(nodes, key=core.id_orderkey)] == [
+        "1.2", "1.9", "1.x", "1.10", "1.100", "1.123456", "2.1", "2.03"]
+    node11, node12 = p.by_id("1.9"), p.by_id("1.10")
+    e1 = node11.add(1, node12)
+    e2 = node12.add(1, node11)
+    assert sorted([e2, e1], key=core.edge_id_orderkey) == [e1, e2]
+    assert core.edge_id_orderkey(e1) is core.edge_id_orderkey(e1) == "1 {:>{}}->1 {:>{}}".format(
+        9, core.UNIQUE_ID_MAX_DIGITS, 10, core.UNIQUE_ID_MAX_DIGITS), "Edge keys should be computed once"
+    old = object.__new__(core.Edge)  # State pickled before the key was cached
+    old.__setstate__({"_root": p, "_parent": node12, "_child": node11, "_attrib": e2.attrib,
+                      "_categories": e2.categories})
+    assert sorted([old, e1], key=core.edge_id_orderkey) == [e1, old]
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_lean_representation(create):
+    p = create()
+    for node in p.nodes.values():
+        assert not hasattr(node, "__dict__")
+        for edge in node:
+            assert not hasattr(edge, "__dict__")
+            for category in edge:
+                assert not hasattr(category, "__dict__") and category._extra is None
+    node = p.layer(layer1.LAYER_ID).heads[0]
+    assert node._extra is None and node._attrib._dict is None
+    node.extra["test"] = True
+    assert node.extra == {"test": True}
+
+
+def test_edge_categories(recwarn):
+    import pickle
+    p = basic()
+    edge1, edge2 = [e for n in p.nodes.values() for e in n if e.tag == "test"][:2]
+    category = edge1[0]
+    assert category is edge1.categories[0] and category is not edge2[0]
+    category.extra["test"] = True
+    assert not edge2[0].extra
+    edge1[0].tag = "other"
+    assert edge1.tag == "other" and edge2.tag == "test"
+    edge1.tag = "test"
+    assert edge1[0] is category and category.extra == {"test": True}
+    assert pickle.loads(pickle.dumps(category)).extra == {"test": True}
+    # State pickled before __slots__ were used
+    old = object.__new__(core.Category)
+    old.__setstate__({"_tag": "test", "_slot": "", "_layer": "", "_parent": "", "extra": {"test": True}})
+    assert tuple(old) == tuple(category) and old.extra == {"test": True}
+    assert not recwarn.list
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_pickle(create):
+    import pickle
+    p1 = create()
+    p2 = pickle.loads(pickle.dumps(p1))
+    assert p1.equals(p2, ordered=True)
+    # State pickled before __slots__ were used
+    node = p1.layer(layer1.LAYER_ID).heads[0]
+    state = {"_tag": node.tag, "_root": p1, "_ID": node.ID, "_attrib": node.attrib, "extra": {"test": True},
+             "_outgoing": node.outgoing, "_incoming": node.incoming, "_orderkey": node.orderkey}
+    old = object.__new__(type(node))
+    old.__setstate__(state)
+    assert old.equals(node) and old.extra == {"test": True}
+    assert core.id_orderkey(old) == core.id_orderkey(node)
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from ucca import ioutil, layer1, diffutil
+from .conftest import loaded, multi_sent, discontiguous, l1_passage
+
+"""Tests the diffutil module functions."""
+
+
+def test_find_changes():
+    p = l1_passage()
+    copy = p.clone()
+    assert not diffutil.find_changes(p, copy)
+    head = copy.layer(layer1.LAYER_ID).heads[0]
+    head[0].tag = layer1.EdgeTags.Function
+    punct = head.children[-1]
+    punct.destroy()
+    changes = diffutil.find_changes(p, copy)
+    assert [(c.action, c.element, c.tag, c.new_tag, c.ID, c.new_ID) for c in changes] == [
+        (diffutil.REMOVED, diffutil.NODE, layer1.NodeTags.Punctuation, None, punct.ID, None),
+        (diffutil.RETAGGED, diffutil.EDGE, layer1.EdgeTags.Linker, layer1.EdgeTags.Function, head[0].ID, head[0].ID),
+        (diffutil.REMOVED, diffutil.EDGE, layer1.EdgeTags.Punctuation, None, head.ID + "->" + punct.ID, None),
+        (diffutil.REMOVED, diffutil.EDGE, layer1.EdgeTags.Terminal, None, punct.ID + "->0.20", None)]
+    assert changes[0].span == (20,) and changes[0].text == p.by_id("0.20").text
+    assert [c.action for c in diffutil.find_changes(copy, p)] == [diffutil.ADDED, diffutil.RETAGGED] + 2 * [
+        diffutil.ADDED]
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_diff_dirs(tmp_path, workers):
+    true_dir, pred_dir = tmp_path / "true", tmp_path / "pred"
+    passages = [create() for create in (loaded, multi_sent, discontiguous, l1_passage)]
+    for i, passage in enumerate(passages):
+        passage._ID = str(i)
+        ioutil.write_passage(passage, outdir=str(true_dir), verbose=False)
+        if i:  # missing in pred_dir
+            ioutil.write_passage(passage, outdir=str(pred_dir), binary=i == 2, verbose=False)
+    passages[-1].layer(layer1.LAYER_ID).heads[0].children[1].destroy()
+    ioutil.write_passage(passages[-1], outdir=str(pred_dir), verbose=False)
+    diffs = list(diffutil.diff_dirs(str(true_dir), str(pred_dir), workers=workers))
+    assert [(d[2], d[3] is None or len(d[3]) > 0) for d in diffs] == [
+        (None, True), ("1", False), ("2", False), ("3", True)]
+    report = str(tmp_path / "report.json")
+    summary = diffutil.write_report(diffs, report)
+    assert (summary["files"], summary["passages"], summary["changed"], summary["missing"]) == (4, 3, 1, 1)
+    with open(report, encoding="utf-8") as f:
+        assert json.load(f)["summary"] == summary
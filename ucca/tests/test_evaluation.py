@@ -1,4 +1,7 @@
+import gc
 import os
+import weakref
+from collections import Counter
 from functools import partial
 from io import StringIO
 from itertools import repeat
@@ -6,7 +9,9 @@ from itertools import repeat
 import pytest
 
 from ucca import core, layer0, layer1, convert
-from ucca.evaluation import evaluate, LABELED, UNLABELED, WEAK_LABELED
+from ucca.constructions import DEFAULT
+from ucca.evaluation import evaluate, evaluate_corpus, Evaluator, EvaluatorResults, Scores, ScoresAccumulator, \
+    YieldCache, ReferenceIndex, LABELED, UNLABELED, WEAK_LABELED, EVAL_TYPES
 from ucca.validation import validate
 from .conftest import PASSAGES, load_xml
 
@@ -334,3 +339,114 @@ def test_evaluate(create1, create2, f1, units=False, errors=False):
         if not before:
             assert not after
     check_primary_remote(scores, f1)
+    assert p1.equals(create1(), ordered=True) and p2.equals(create2(), ordered=True), "Passages should not change"
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_evaluate_corpus(workers):
+    pairs = [(passage1, passage2), (simple1, simple2), (function1, function2), (passage1, passage1)]
+    expected = [evaluate(create1(), create2(), errors=True) for create1, create2 in pairs]
+    scores = list(evaluate_corpus(((create1(), create2()) for create1, create2 in pairs), workers=workers,
+                                  errors=True))
+    assert len(scores) == len(expected)
+    for s, e in zip(scores + [Scores.aggregate(scores)], expected + [Scores.aggregate(expected)]):
+        for eval_type in EVAL_TYPES:
+            assert s.fields(eval_type) == e.fields(eval_type)
+            assert s.fields(eval_type, counts=True) == e.fields(eval_type, counts=True)
+            assert s.titles(eval_type) == e.titles(eval_type)
+        assert s[LABELED][PRIMARY].errors == e[LABELED][PRIMARY].errors
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_evaluate_corpus_capture_output(workers, capsys):
+    pairs = [(passage1, passage2), (simple1, simple2)]
+    expected = []
+    for create1, create2 in pairs:
+        evaluate(create1(), create2(), verbose=True)
+        expected.append(capsys.readouterr().out)
+    results = list(evaluate_corpus(((create1(), create2()) for create1, create2 in pairs), workers=workers,
+                                   capture_output=True, verbose=True))
+    assert not capsys.readouterr().out
+    assert [(passage_id, output) for passage_id, _, output in results] == [
+        (create1().ID, e) for (create1, _), e in zip(pairs, expected)]
+
+
+@pytest.mark.parametrize("create1, create2", ((passage1, passage2), (simple1, simple2), (function1, function2)))
+def test_yield_matrix(create1, create2):
+    p1, p2 = create1(), create2()
+    evaluator = Evaluator(verbose=False, constructions=DEFAULT, units=False, fscore=True, errors=True)
+    matrix = evaluator.yield_matrix(p1, p2)
+    for eval_type in EVAL_TYPES:
+        mutual_tags = matrix.mutual_tags(eval_type)
+        for construction, num_matches in zip(matrix.constructions, matrix.counts(eval_type)[0]):
+            expected, counter = {}, Counter()
+            Evaluator.find_mutuals(*[m.get(construction, {}) for m in matrix.maps], eval_type=eval_type,
+                                   mutual_tags=expected, counter=counter)
+            assert mutual_tags[construction] == expected
+            assert num_matches == len(expected)
+            if eval_type == LABELED:
+                yields = set().union(*(m.get(construction, ()) for m in matrix.maps))
+                assert matrix.errors(construction, yields) == counter
+
+
+@pytest.mark.parametrize("normalize", (True, False), ids=("normalize", ""))
+def test_yield_cache(normalize):
+    ref = passage2()
+    guessed = [passage1(), passage1(), ref]
+    expected = [evaluate(p, ref, normalize=normalize, errors=True) for p in guessed]
+    cache = YieldCache()
+    for p, e in zip(guessed, expected):
+        s = evaluate(p, ref, normalize=normalize, errors=True, cache=cache)
+        for eval_type in EVAL_TYPES:
+            assert s.fields(eval_type, counts=True) == e.fields(eval_type, counts=True)
+        assert s[LABELED][PRIMARY].errors == e[LABELED][PRIMARY].errors
+    assert len(cache) == 1, "Reference should be processed only once"
+    entry = cache.get(ref, normalize=normalize)
+    assert cache.get(ref.clone(), normalize=normalize) is entry, "Entries should be found by passage contents"
+    passage = passage1()
+    evaluate(passage, ref, normalize=normalize, cache=cache)
+    passage = weakref.ref(passage)
+    gc.collect()
+    assert passage() is None, "Guessed passages should not be kept"
+    ref.layer(layer1.LAYER_ID).heads[0].children[0].destroy()
+    assert cache.get(ref, normalize=normalize) is not entry, "Changed reference should not use the old entry"
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize("normalize", (True, False), ids=("normalize", ""))
+def test_reference_index(tmp_path, normalize):
+    pairs = [(passage1(), passage2()), (passage2(), passage1()), (function1(), function2()), (passage1(), passage1())]
+    index = ReferenceIndex(normalize=normalize)
+    for i, (_, ref) in enumerate(pairs):
+        ref._ID = str(i)
+        index.add(ref)
+    filename = str(tmp_path / "index.pickle")
+    index.save(filename)
+    index = ReferenceIndex.load(filename)
+    assert len(index) == len(pairs) and all(index.get(ref) is not None for _, ref in pairs)
+    for guessed, ref in pairs:
+        expected = evaluate(guessed, ref, normalize=normalize, errors=True)
+        scores = evaluate(guessed, ref, normalize=normalize, errors=True, reference_index=index)
+        for eval_type in EVAL_TYPES:
+            assert scores.fields(eval_type, counts=True) == expected.fields(eval_type, counts=True)
+        assert scores[LABELED][PRIMARY].errors == expected[LABELED][PRIMARY].errors
+    ref = pairs[0][1]
+    ref.layer(layer1.LAYER_ID).heads[0].children[0].incoming[0].tag = layer1.EdgeTags.Adverbial
+    assert index.get(ref) is None, "Changed passage should not be found in index"
+
+
+def test_scores_accumulator():
+    pairs = [(passage1, passage2), (simple1, simple2), (function1, function2), (passage1, passage1)]
+    scores = [evaluate(create1(), create2(), errors=True) for create1, create2 in pairs]
+    accumulator = ScoresAccumulator()
+    for s in scores:
+        assert accumulator.add(s) is s
+    assert len(accumulator) == len(scores)
+    summary = accumulator.summary()
+    for eval_type in EVAL_TYPES:
+        expected = EvaluatorResults.aggregate(s[eval_type] for s in scores)
+        assert list(summary[eval_type].results) == list(expected.results)
+        for construction, stats in expected.results.items():
+            actual = summary[eval_type][construction]
+            assert (actual.num_matches, actual.num_only_guessed, actual.num_only_ref, actual.errors) == \
+                (stats.num_matches, stats.num_only_guessed, stats.num_only_ref, stats.errors)
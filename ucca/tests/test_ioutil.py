@@ -88,3 +88,55 @@ def test_shuffle_passages():
     random.shuffle(passages)
     assert len(files) == len(passages)
     _test_passages(passages)
+
+
+@pytest.mark.parametrize("binary", (False, True, "ucca"))
+def test_write_read_passage(tmp_path, binary):
+    p = loaded()
+    outfile = ioutil.write_passage(p, binary=binary, outdir=str(tmp_path), verbose=False)
+    assert os.path.splitext(outfile)[1] == {False: ".xml", True: ".pickle", "ucca": ".ucca"}[binary]
+    passages = list(ioutil.read_files_and_dirs(str(tmp_path)))
+    assert len(passages) == 1
+    assert p.equals(passages[0], ordered=True)
+
+
+def test_passage_archive(tmp_path, monkeypatch):
+    passages = [create() for create in (loaded, multi_sent, discontiguous, l1_passage)]
+    for i, passage in enumerate(passages):
+        passage._ID = str(i)
+    filename = str(tmp_path / ("corpus" + ioutil.ARCHIVE_SUFFIX))
+    assert ioutil.write_archive(passages, filename) == len(passages)
+    with ioutil.PassageArchive(filename) as archive:
+        assert len(archive) == len(passages)
+        assert archive.ids == ["0", "1", "2", "3"]
+        assert "2" in archive and "4" not in archive
+        assert all(p.equals(archive[p.ID], ordered=True) for p in passages)
+        random.shuffle(archive.ids)
+        assert [p.ID for p in archive] == archive.ids
+        selected = archive.select(["3", "1"])
+        assert [p.ID for p in selected] == ["3", "1"]
+        with pytest.raises(KeyError):
+            archive.select(["4"])
+    closed = []
+    close = ioutil.PassageArchive.close
+    monkeypatch.setattr(ioutil.PassageArchive, "close", lambda self: closed.append(self.filename) or close(self))
+    assert [p.ID for p in ioutil.read_files_and_dirs(str(tmp_path))] == ["0", "1", "2", "3"]
+    assert closed == [filename], "Archive should be closed after iteration"
+    with pytest.raises(ValueError):
+        ioutil.write_archive(passages * 2, filename)
+    with ioutil.PassageArchive(filename) as archive:  # not overwritten by the failed write
+        assert archive.ids == ["0", "1", "2", "3"]
+    assert os.listdir(str(tmp_path)) == [os.path.basename(filename)]
+
+
+@pytest.mark.parametrize("sentences", (False, True))
+def test_load_passages_parallel(sentences):
+    files = 3 * ["test_files/standard3.xml"]
+    passages = [p.ID for p in ioutil.read_files_and_dirs(files, sentences=sentences)]
+    parallel = ioutil.read_files_and_dirs(files, sentences=sentences, workers=2, prefetch=1)
+    assert [p.ID for p in parallel] == passages
+    assert [p.ID for p in parallel] == passages, "Should be possible to iterate more than once"
+    assert [p.ID for p in ioutil.get_passages(files, sentences=sentences, workers=2)] == passages
+    mixed = [multi_sent()] + files
+    assert [p.ID for p in ioutil.LazyLoadedPassages(mixed, sentences=sentences, workers=2)] == \
+        [p.ID for p in ioutil.LazyLoadedPassages(mixed, sentences=sentences)]
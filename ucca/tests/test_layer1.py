@@ -1,3 +1,5 @@
+import pytest
+
 from ucca import layer1
 from .conftest import l1_passage, discontiguous
 
@@ -64,6 +66,16 @@ def test_layer1():
     p_edge.tag = layer1.EdgeTags.Process
     assert l1.top_scenes == [ps1, ps2, ps3]
     assert l1.top_linkages == [lkg1, lkg2]
+    assert l1.is_top_scene(ps1) and not l1.is_top_scene(p1)
+
+    # A scene embedded in another one becomes top-level once the outer one is no longer a scene
+    inner = l1.add_fnode(a1, layer1.EdgeTags.Participant)
+    l1.add_fnode(inner, layer1.EdgeTags.Process)
+    assert l1.top_scenes == [ps1, ps2, ps3]
+    assert inner.get_top_scene() == ps1
+    ps1.remove(p_edge)
+    assert l1.top_scenes == [ps2, ps3, inner]
+    assert inner.get_top_scene() == inner
 
 
 def test_str():
@@ -91,6 +103,51 @@ def test_destroy():
     assert not punct1.parents
 
 
+def test_next_id():
+    p = l1_passage()
+    l1 = p.layer("1")
+    ids = [node.ID for node in l1.all]
+    last = max(int(i.split(".")[1]) for i in ids)
+    assert l1.next_id() == l1.next_id() == "1.%d" % (last + 1), "Should not take the ID until a node is added"
+    l1.heads[0].children[1].destroy()
+    node = l1.add_fnode(None, layer1.EdgeTags.ParallelScene)
+    assert node.ID == "1.%d" % (last + 1), "IDs of destroyed nodes should not be reused"
+    assert l1.next_id() == "1.%d" % (last + 2)
+    layer1.FoundationalNode("1.%d" % (last + 100), p, layer1.NodeTags.Foundational)
+    assert l1.next_id() == "1.%d" % (last + 101), "Should come after IDs of nodes added with explicit IDs"
+    with pytest.raises(KeyError):
+        p.by_id("1.%d" % (last + 101))
+
+
+def test_terminals_cache():
+    p = l1_passage()
+    l0 = p.layer("0")
+    l1 = p.layer("1")
+    terms = l0.all
+    head = l1.heads[0]
+    link1, ps1, ps2, link2, ps3, punct2 = head.children
+    p1, a1, punct1 = [x.child for x in ps1 if not x.attrib.get("remote")]
+
+    assert ps1.get_terminals() == terms[1:10]
+    assert ps1.get_terminals(punct=False) == terms[1:9]
+    assert head.end_position == 20
+
+    # Changes anywhere below a node are reflected in its span
+    a1.add(layer1.EdgeTags.Terminal, terms[15])
+    assert ps1.get_terminals() == terms[1:10] + terms[15:16]
+    assert ps1.discontiguous
+    a1.remove(terms[15])
+    assert ps1.get_terminals() == terms[1:10]
+    remote = [e for e in ps1 if e.attrib.get("remote")][0]
+    remote.attrib["remote"] = False
+    assert ps1.get_terminals() == terms[1:10] + terms[14:15]
+    punct1.destroy()
+    assert ps1.get_terminals() == terms[1:9] + terms[14:15]
+    assert head.end_position == 20
+    punct2.destroy()
+    assert head.end_position == 19
+
+
 def test_discontiguous():
     """Tests FNode.discontiguous and FNode.get_sequences"""
     p = discontiguous()
@@ -1,6 +1,8 @@
+import gc
+
 import pytest
 
-from ucca import layer1
+from ucca import layer1, normalization
 from ucca.normalization import normalize, COORDINATED_MAIN_REL
 from .conftest import create_passage, attach_terminals
 
@@ -390,3 +392,53 @@ def test_normalize(unnormalized, normalized):
 ))
 def test_normalize_extra(unnormalized, normalized):
     normalize_and_compare(unnormalized, normalized, extra=True)
+
+
+@pytest.mark.parametrize("unnormalized, rules", (
+        (root_scene, {"separate_scenes": 1}),
+        (nested_center, {"flatten_centers": 1}),
+        (cycle, {"remove_cycle": 1}),
+        (top_scene, {}),
+))
+def test_normalize_changes(unnormalized, rules):
+    assert normalize(unnormalized()) == rules
+
+
+def destroyed_then_created(n=5):
+    """
+    Scenes with a participant to be flattened, destroying its node, followed by an elaborator to be separated into
+    a scene, creating a new node
+    """
+    p, l1, terms = create_passage(6 * n)
+    nodes = []
+    for _ in range(n):
+        ps1 = l1.add_fnode(None, layer1.EdgeTags.ParallelScene)
+        a1 = l1.add_fnode(ps1, layer1.EdgeTags.Participant)
+        c1 = l1.add_fnode(a1, layer1.EdgeTags.Center)
+        p1 = l1.add_fnode(ps1, layer1.EdgeTags.Process)
+        e1 = l1.add_fnode(ps1, layer1.EdgeTags.Elaborator)
+        ps2 = l1.add_fnode(e1, layer1.EdgeTags.ParallelScene)
+        a2 = l1.add_fnode(ps2, layer1.EdgeTags.Participant)
+        p2 = l1.add_fnode(ps2, layer1.EdgeTags.Process)
+        a3 = l1.add_fnode(e1, layer1.EdgeTags.Participant)
+        d1 = l1.add_fnode(ps1, layer1.EdgeTags.Adverbial)
+        nodes += [c1, p1, a2, p2, a3, d1]
+    attach_terminals(terms, *nodes)
+    return p
+
+
+def test_normalize_all_nodes(monkeypatch):
+    normalized = []
+    normalize_node = normalization.normalize_node
+
+    def _normalize_node(node, *args, **kwargs):
+        normalized.append(node.ID)  # Not the node, so that nodes destroyed by a rule are freed
+        result = normalize_node(node, *args, **kwargs)
+        gc.collect()  # Free destroyed nodes now, so that new nodes may reuse their memory
+        return result
+
+    monkeypatch.setattr(normalization, "normalize_node", _normalize_node)
+    p = destroyed_then_created()
+    normalize(p)
+    assert all(node.ID in normalized for node in p.layer(layer1.LAYER_ID).all
+               if node.tag == layer1.NodeTags.Foundational), "Not all nodes were normalized"
@@ -1,3 +1,6 @@
+import pickle
+from collections import OrderedDict
+
 import pytest
 
 from ucca import layer0, convert, textutil
@@ -25,6 +28,33 @@ def test_word_vectors():
         assert len(vector) == dim, "Vector dimension for %s is %d != %d" % (word, len(vector), dim)
 
 
+@pytest.mark.parametrize("tokenized", (False, True), ids=("text", "tokens"))
+def test_tokenizer(tokenized, monkeypatch):
+    monkeypatch.setattr(textutil, "tokenizer", {})  # so that the tokenizer is loaded even if other tests did
+    monkeypatch.setattr(textutil, "load_times", OrderedDict())
+    monkeypatch.setattr(textutil, "get_nlp", assert_spacy_not_loaded)
+    doc = textutil.get_tokenizer(tokenized)(["Hello", ",", "world", "."] if tokenized else "Hello, world.")
+    assert [(t.orth_, t.is_punct) for t in doc] == [("Hello", False), (",", True), ("world", False), (".", True)]
+    assert [t.orth_ for t in pickle.loads(pickle.dumps(textutil.WordsTokenizer(doc.vocab)))(["a", "b"])] == ["a", "b"]
+    assert any(kind == "tokenizer" for kind, _ in textutil.load_times)
+
+
+def test_doc_array():
+    passage = multi_sent()
+    l0 = passage.layer(layer0.LAYER_ID)
+    rows = [[[2 ** 64 - 1, j, 2, 3, 4, -1, 6, -j, 8, 9, 10] for j in range(len(terminals))]
+            for terminals in textutil.break2paragraphs(passage, return_terminals=True)]
+    l0.extra["doc"] = [textutil.to_doc_array(doc) for doc in rows]
+    assert textutil.is_annotated(passage, as_array=True, as_extra=False)
+    for terminal in l0.all:
+        assert list(terminal.tok) == rows[terminal.paragraph - 1][terminal.para_pos - 1]
+    assert textutil.terminal_annotations(l0.all, textutil.Attr.HEAD) == {0, -1, -2, -3, -4, -5, -6}
+    l0.all[0].tok[textutil.Attr.ENT_IOB.value] = 3  # Terminal annotation is a view of the array
+    assert l0.extra["doc"][0][textutil.Attr.ENT_IOB.key][0] == 3
+    for rows in [[None] * len(textutil.Attr)], [["x"] + (len(textutil.Attr) - 1) * [0]], [len(textutil.Attr) * [-1]]:
+        assert textutil.to_doc_array(rows) is rows, "Should only convert integers in range"
+
+
 @pytest.mark.parametrize("create", PASSAGES)
 @pytest.mark.parametrize("as_array", (True, False), ids=("array", "extra"))
 def test_annotate_passage(create, as_array):
@@ -96,3 +126,58 @@ def test_preannotate_passage(create, as_array, convert_and_back, partial, monkey
             if value:
                 assert (terminal.tok[i] if as_array else terminal.extra.get(attr.key)) == value, \
                     "Terminal %s has wrong %s" % (terminal, attr.name)
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+@pytest.mark.parametrize("as_array", (True, False), ids=("array", "extra"))
+def test_annotation_cache(create, as_array, tmp_path, monkeypatch):
+    monkeypatch.setattr(textutil, "get_nlp", assert_spacy_not_loaded)
+    passage = create()
+    paragraphs = [[t.text for t in terminals]
+                  for terminals in textutil.break2paragraphs(passage, return_terminals=True)]
+    with textutil.AnnotationCache(str(tmp_path / "annotations.db")) as cache:
+        cache.update(((tokens, ([[10 + j + a.value for a in textutil.Attr] for j in range(len(tokens))],
+                                [[str(10 + j + a.value) for a in textutil.Attr] for j in range(len(tokens))]))
+                      for tokens in paragraphs), lang="en")
+        assert len(cache) == len({tuple(tokens) for tokens in paragraphs})
+        assert cache.get(["not", "seen"]) is None
+        textutil.annotate(passage, as_array=as_array, as_extra=not as_array, cache=cache)
+    assert textutil.is_annotated(passage, as_array=as_array, as_extra=not as_array), \
+        "Passage %s is not annotated" % passage.ID
+    for terminals in textutil.break2paragraphs(passage, return_terminals=True):
+        for j, terminal in enumerate(terminals):
+            for attr in textutil.Attr:
+                assert (terminal.tok[attr.value] if as_array else terminal.extra.get(attr.key)) == \
+                    (10 + j + attr.value if as_array else str(10 + j + attr.value)), \
+                    "Terminal %s has wrong %s" % (terminal, attr.name)
+
+
+class CountingNLP:
+    """ Stub spaCy pipeline, counting the paragraphs it annotates """
+    def __init__(self):
+        self.calls = 0
+
+    def pipe(self, texts, **kwargs):
+        for tokens in texts:
+            self.calls += 1
+            yield tokens
+
+
+def test_annotation_cache_miss_then_hit(tmp_path, monkeypatch):
+    nlp = CountingNLP()
+    monkeypatch.setattr(textutil, "get_nlp", lambda *args, **kwargs: nlp)
+    monkeypatch.setattr(textutil, "get_doc_values", lambda tokens, *args, **kwargs: [
+        [[len(token)] for token in tokens], [[token.upper()] for token in tokens]])
+    monkeypatch.setenv(textutil.ANNOTATION_CACHE_ENV_VAR, str(tmp_path / "env.db"))
+    paragraphs = [(["Hello", "world"], 1), (["Bye"], 2)]
+    expected = [([[[5], [5]], [["HELLO"], ["WORLD"]]], 1), ([[[3]], [["BYE"]]], 2)]
+    assert list(textutil.get_annotations(paragraphs)) == expected
+    assert nlp.calls == 2
+    assert textutil.get_annotation_cache(None) is None
+    assert not (tmp_path / "env.db").exists(), "Cache should only be used if given explicitly"
+    filename = str(tmp_path / "annotations.db")
+    for calls in 4, 4:  # Miss, then hit
+        cache = textutil.get_annotation_cache(filename)
+        assert list(textutil.get_annotations(paragraphs, cache=cache)) == expected
+        assert nlp.calls == calls
+        assert len(cache) == 2
@@ -1,7 +1,7 @@
 import pytest
 
 from ucca import layer1
-from ucca.validation import validate
+from ucca.validation import validate, ValidationIndex, NodeValidator
 from .conftest import loaded, loaded_valid, multi_sent, crossing, discontiguous, l1_passage, empty, \
     create_passage, attach_terminals
 
@@ -281,3 +281,14 @@ def test_evaluate_self(create, valid):
         assert not errors, p
     else:
         assert errors, p
+
+
+@pytest.mark.parametrize("create", (loaded, forbid_descendant_of_P_fn, forbid_sibling_of_A_T_fn, forbid_remote))
+def test_validation_index(create):
+    p = create()
+    index = ValidationIndex(p)
+    for node in p.layer(layer1.LAYER_ID).all:
+        assert index.validator(node) is index.validator(node)
+        assert list(index.validator(node).validate_non_terminal()) == list(NodeValidator(node).validate_non_terminal())
+    p = forbid_descendant_of_P_fn()
+    assert ValidationIndex(p).count_scene_descendants(p.by_id("1.3")) == 2
@@ -1,5 +1,8 @@
 """Utility functions for UCCA package."""
+import hashlib
+import json
 import os
+import sqlite3
 import sys
 import time
 from collections import OrderedDict
@@ -17,8 +20,11 @@ from ucca import layer0, layer1
 MODEL_ENV_VAR = "SPACY_MODEL"  # Determines the default spaCy model to load
 DEFAULT_MODEL = {"en": "en_core_web_md", "fr": "fr_core_news_md", "de": "de_core_news_md", "ru": "ru"}
 
-N_THREADS = 4
-BATCH_SIZE = 50
+ANNOTATION_CACHE_ENV_VAR = "UCCA_ANNOTATION_CACHE"  # Default annotation cache file for scripts (see AnnotationCache)
+
+N_PROCESS = 1  # Number of processes for spaCy to annotate in
+BATCH_SIZE = 50  # Number of paragraphs for spaCy to annotate at a time (in each process)
+CHUNK_BATCHES = 10  # Number of batches per process to read ahead, amortizing the cost of starting processes
 
 
 class Attr(Enum):
@@ -62,27 +68,143 @@ class Attr(Enum):
         return self.name.lower()
 
 
+SIGNED_ATTRS = (Attr.ENT_IOB, Attr.HEAD)  # Stored as signed integers, while the rest are unsigned vocabulary IDs
+DOC_DTYPE = np.dtype([(a.key, np.int64 if a in SIGNED_ATTRS else np.uint64) for a in Attr])  # Annotation per token
+
+
+def to_doc_array(rows):
+    """
+    Convert the annotation of a paragraph to the compact representation stored in layer0.extra["doc"] when possible
+    :param rows: list with a list of numeric IDs per token, ordered by Attr
+    :return: NumPy structured array of DOC_DTYPE with a record per token (whose fields can be accessed by index
+             just like the lists, or by Attr.key for a whole column), or `rows' as-is if not all values are integers
+    """
+    if isinstance(rows, np.ndarray):
+        return rows
+    if all(len(row) == len(Attr) and all(isinstance(v, (int, np.integer)) and (v >= 0 or a in SIGNED_ATTRS)
+                                         for a, v in zip(Attr, row)) for row in rows):
+        try:
+            return np.array([tuple(row) for row in rows], dtype=DOC_DTYPE)
+        except OverflowError:
+            pass
+    return rows
+
+
+def terminal_annotations(terminals, attr):
+    """
+    Get the distinct values of an attribute for the given terminals, from the annotation in layer0.extra["doc"]
+    :param terminals: Terminals of the same passage, which is annotated with as_array=True
+    :param attr: Attr to get the values of
+    :return: set of attribute values (strings, or ints for ENT_IOB and HEAD), each resolved from its ID just once
+    """
+    ids = set()
+    for paragraph, paragraph_terminals in groupby(terminals, attrgetter("paragraph")):
+        paragraph_terminals = list(paragraph_terminals)
+        doc = paragraph_terminals[0].layer.extra["doc"][paragraph - 1]
+        if isinstance(doc, np.ndarray):
+            ids.update(doc[attr.key][[t.para_pos - 1 for t in paragraph_terminals]].tolist())
+        else:
+            ids.update(t.tok[attr.value] for t in paragraph_terminals)
+    return {attr(i) for i in ids}
+
+
 def get_nlp(lang="en"):
-    """ Load spaCy model for a given language, determined by `models' dict or by MODEL_ENV_VAR """
+    """ Load full spaCy pipeline for a given language, determined by `models' dict or by MODEL_ENV_VAR """
     instance = nlp.get(lang)
     if instance is None:
-        model = models.get(lang)
-        if not model:
-            models[lang] = model = os.environ.get("_".join((MODEL_ENV_VAR, lang.upper()))) or \
-                                   os.environ.get(MODEL_ENV_VAR) or DEFAULT_MODEL.get(lang, "xx")
-        started = time.time()
-        with external_write_mode():
-            print("Loading spaCy model '%s'... " % model, end="", flush=True)
-        nlp[lang] = instance = load_spacy_model(model)
-        with external_write_mode():
-            print("Done (%.3fs)." % (time.time() - started))
+        model = get_model_name(lang)
+        nlp[lang] = instance = timed_load("model", model, load_spacy_model, model)
         tokenizer[lang] = instance.tokenizer
-        import spacy
-        instance.tokenizer = lambda words: spacy.tokens.Doc(instance.vocab, words=words)
+        instance.tokenizer = WordsTokenizer(instance.vocab)
+    return instance
+
+
+def get_sentencizer(lang="en"):
+    """ Load spaCy pipeline for a given language with only the components needed for sentence boundaries: the
+        dependency parser, or a rule-based sentencizer if the model has none. Uses the full pipeline if loaded. """
+    instance = nlp.get(lang)
+    if instance is None or not SENTENCE_PIPES.intersection(instance.pipe_names):
+        instance = sentencizer.get(lang)
+    if instance is None:
+        model = get_model_name(lang)
+        sentencizer[lang] = instance = timed_load("sentencizer", model, load_spacy_model, model,
+                                                  disable=SENTENCIZER_DISABLE)
+        if not SENTENCE_PIPES.intersection(instance.pipe_names):
+            instance.add_pipe(instance.create_pipe("sentencizer"))
+        tokenizer.setdefault(lang, instance.tokenizer)
+        instance.tokenizer = WordsTokenizer(instance.vocab)
+    return instance
+
+
+def get_tokenizer(tokenized=False, lang="en"):
+    """
+    Get spaCy tokenizer for a given language, without loading the model: only the language's tokenization rules are
+    loaded, unless a pipeline for the language has already been loaded, in which case its tokenizer is used
+    :param tokenized: return a tokenizer for lists of tokens rather than for strings
+    :param lang: two-letter language code
+    :return: callable returning a spaCy Doc
+    """
+    instance = tokenizer.get(lang)
+    if instance is None:
+        tokenizer[lang] = instance = timed_load("tokenizer", lang, load_blank, lang).tokenizer
+    return WordsTokenizer(instance.vocab) if tokenized else instance
+
+
+class WordsTokenizer:
+    """
+    Tokenizer for already tokenized text, creating a spaCy Doc from a list of tokens.
+    Replaces the tokenizer of loaded pipelines, since passages are already tokenized.
+    Unlike a lambda, it can be pickled when spaCy starts worker processes with n_process > 1.
+    """
+    def __init__(self, vocab):
+        self.vocab = vocab
+
+    def __call__(self, words):
+        from spacy.tokens import Doc
+        return Doc(self.vocab, words=words)
+
+
+def get_model_name(lang="en"):
+    """ Name of spaCy model for a given language, determined by `models' dict or by MODEL_ENV_VAR (without loading) """
+    model = models.get(lang)
+    if not model:
+        models[lang] = model = os.environ.get("_".join((MODEL_ENV_VAR, lang.upper()))) or \
+                               os.environ.get(MODEL_ENV_VAR) or DEFAULT_MODEL.get(lang, "xx")
+    return model
+
+
+def timed_load(kind, name, load, *args, **kwargs):
+    """ Call `load' with the given arguments, printing and recording in `load_times' how long it took """
+    started = time.time()
+    with external_write_mode():
+        print("Loading spaCy %s '%s'... " % (kind, name), end="", flush=True)
+    instance = load(*args, **kwargs)
+    load_times[kind, name] = duration = time.time() - started
+    with external_write_mode():
+        print("Done (%.3fs)." % duration)
     return instance
 
 
-def load_spacy_model(model):
+def print_load_times(file=None):
+    """ Print how long each spaCy pipeline loaded in this process took to load """
+    for (kind, name), duration in load_times.items():
+        print("Loaded spaCy %s '%s' in %.3fs" % (kind, name, duration), file=file)
+    if load_times:
+        print("Total spaCy loading time: %.3fs" % sum(load_times.values()), file=file)
+
+
+def load_blank(lang):
+    """ Create spaCy pipeline with no components, only with the language's vocabulary and tokenizer rules """
+    if get_model_name(lang) == "ru":
+        return load_spacy_model("ru")
+    import spacy
+    try:
+        return spacy.blank(lang)
+    except ImportError:  # Language not supported by spaCy
+        return spacy.blank("xx")
+
+
+def load_spacy_model(model, disable=()):
     if model == "ru":
         try:
             from spacy.lang.ru import Russian
@@ -92,7 +214,7 @@ def load_spacy_model(model):
                           "pip install git+https://github.com/aatimofeev/spacy_russian_tokenizer.git") from e
     import spacy
     try:
-        return spacy.load(model)
+        return spacy.load(model, disable=disable)
     except OSError:
         spacy.cli.download(model)
         # Workaround from https://github.com/explosion/spaCy/issues/3435#issuecomment-474580269
@@ -100,20 +222,21 @@ def load_spacy_model(model):
         from spacy.util import get_package_path
         link(model, model, force=True, model_path=get_package_path(model))
         try:
-            return spacy.load(model)
+            return spacy.load(model, disable=disable)
         except OSError as e:
             raise OSError("Failed to get spaCy model. Download it manually using "
                           "`python -m spacy download %s`." % model) from e
 
 
+SENTENCE_PIPES = {"parser", "sentencizer"}  # Components that set sentence boundaries
+SENTENCIZER_DISABLE = ("tagger", "ner", "entity_ruler", "entity_linker", "textcat")  # Not needed for sentences
+
+# Pipelines are loaded lazily, once per process; worker processes started by fork share the already loaded ones
 models = {}  # maps language two-letter code to name of spaCy model
 nlp = {}  # maps language two-letter code to actual loaded spaCy model
+sentencizer = {}  # maps language two-letter code to spaCy model loaded only with components for sentence boundaries
 tokenizer = {}  # maps language two-letter code to tokenizer of spaCy model
-
-
-def get_tokenizer(tokenized=False, lang="en"):
-    instance = get_nlp(lang)
-    return instance.tokenizer if tokenized else tokenizer[lang]
+load_times = OrderedDict()  # maps (kind, model name) of loaded spaCy pipelines to how many seconds loading took
 
 
 def get_vocab(vocab=None, lang=None):
@@ -202,19 +325,18 @@ def annotate(passage, *args, **kwargs):
     list(annotate_all([passage], *args, **kwargs))
 
 
-def annotate_as_tuples(passages, replace=False, as_array=False, as_extra=True, lang="en", vocab=None, verbose=False):
+def annotate_as_tuples(passages, replace=False, as_array=False, as_extra=True, lang="en", vocab=None, verbose=False,
+                       n_process=None, batch_size=None, cache=None):
     for passage_lang, passages_by_lang in groupby(passages, get_lang):
-        for need_annotation, stream in groupby(to_annotate(passages_by_lang, replace, as_array, as_extra),
-                                               lambda x: bool(x[0])):
-            annotated = get_nlp(passage_lang or lang).pipe(
-                stream, as_tuples=True, n_threads=N_THREADS, batch_size=BATCH_SIZE) if need_annotation else stream
-            annotated = set_docs(annotated, as_array, as_extra, passage_lang or lang, vocab, replace, verbose)
-            for passage, passages in groupby(annotated, itemgetter(0)):
-                yield deque(passages, maxlen=1).pop()  # Wait until all paragraphs have been annotated
+        annotated = get_annotations(to_annotate(passages_by_lang, replace, as_array, as_extra), passage_lang or lang,
+                                    vocab=vocab, n_process=n_process, batch_size=batch_size, cache=cache)
+        annotated = set_docs(annotated, as_array, as_extra, passage_lang or lang, vocab, replace, verbose)
+        for passage, passages in groupby(annotated, itemgetter(0)):
+            yield deque(passages, maxlen=1).pop()  # Wait until all paragraphs have been annotated
 
 
 def annotate_all(passages, replace=False, as_array=False, as_extra=True, as_tuples=False, lang="en", vocab=None,
-                 verbose=False):
+                 verbose=False, n_process=None, batch_size=None, cache=None):
     """
     Run spaCy pipeline on the given passages, unless already annotated
     :param passages: iterable of Passage objects, whose layer 0 nodes will be added entries in the `extra' dict
@@ -225,15 +347,134 @@ def annotate_all(passages, replace=False, as_array=False, as_extra=True, as_tupl
     :param lang: optional two-letter language code, will be overridden if passage has "lang" attrib
     :param vocab: optional dictionary of vocabulary IDs to string values, to avoid loading spaCy model
     :param verbose: whether to print annotated text
+    :param n_process: number of processes for spaCy to annotate in (default: N_PROCESS)
+    :param batch_size: number of paragraphs for spaCy to annotate at a time in each process (default: BATCH_SIZE)
+    :param cache: optional AnnotationCache to take annotations of previously seen paragraphs from, and add new ones to
+                  (see get_annotation_cache)
     :return: generator of annotated passages, which are actually modified in-place (same objects as input)
     """
     if not as_tuples:
         passages = ((p,) for p in passages)
     for t in annotate_as_tuples(passages, replace=replace, as_array=as_array, as_extra=as_extra, lang=lang, vocab=vocab,
-                                verbose=verbose):
+                                verbose=verbose, n_process=n_process, batch_size=batch_size, cache=cache):
         yield t if as_tuples else t[0]
 
 
+def get_annotations(tokens_contexts, lang="en", vocab=None, n_process=None, batch_size=None, cache=None):
+    """
+    Annotate paragraphs with spaCy, or take their annotation from the cache if it has them
+    :param tokens_contexts: iterable of (list of tokens, context) tuples, where the list may be empty to skip annotation
+    :param lang: two-letter language code
+    :param vocab: optional dictionary of vocabulary IDs to string values
+    :param n_process: number of processes for spaCy to annotate in (default: N_PROCESS)
+    :param batch_size: number of paragraphs for spaCy to annotate at a time in each process (default: BATCH_SIZE)
+    :param cache: optional AnnotationCache to look up and store annotations in
+    :return: generator of (annotation values as returned by get_doc_values or None if skipped, context) tuples,
+             in the same order as the input
+    """
+    n_process = n_process or N_PROCESS
+    batch_size = batch_size or BATCH_SIZE
+    tokens_contexts = iter(tokens_contexts)
+    while True:
+        chunk = list(islice(tokens_contexts, batch_size * n_process * CHUNK_BATCHES))
+        if not chunk:
+            break
+        values = [(cache.get(tokens, lang) if cache is not None else None) if tokens else () for tokens, _ in chunk]
+        missing = [j for j, v in enumerate(values) if v is None]
+        if missing:  # Only load spaCy if there is anything new to annotate
+            docs = get_nlp(lang).pipe([chunk[j][0] for j in missing], n_process=n_process, batch_size=batch_size)
+            for j, doc in zip(missing, docs):
+                values[j] = get_doc_values(doc, lang, vocab)
+            if cache is not None:
+                cache.update(((chunk[j][0], values[j]) for j in missing), lang)
+        for v, (_, context) in zip(values, chunk):
+            yield v or None, context
+
+
+def get_doc_values(doc, lang="en", vocab=None):
+    """
+    Extract attribute values for all tokens from a spaCy Doc
+    :return: pair of lists with a list of values per token, ordered by Attr: the first with numeric IDs
+             (as set in layer0.extra["doc"] when as_array=True), and the second with strings (as set in Terminal.extra)
+    """
+    from spacy import attrs
+    arr = doc.to_array([getattr(attrs, a.name) for a in Attr])
+    vocab = get_vocab(vocab, lang)
+    return ([[a(v, vocab, as_array=True) for a, v in zip(Attr, values)] for values in arr],
+            [[a(v, vocab) for a, v in zip(Attr, values)] for values in arr])
+
+
+class AnnotationCache:
+    """
+    Persistent store of spaCy annotations in an SQLite database file, so that text seen before is not annotated again.
+    Entries are keyed by a hash of the token sequence, the language and the name of the spaCy model, and contain the
+    values returned by get_doc_values, so that using them requires neither loading nor running spaCy.
+    """
+    def __init__(self, filename):
+        """
+        :param filename: database file to open, created if it does not exist
+        """
+        self.filename = filename
+        self._connection = sqlite3.connect(filename, timeout=60)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS annotations (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def key(tokens, lang="en"):
+        return hashlib.sha1(json.dumps([lang, get_model_name(lang), list(tokens)]).encode("utf-8")).hexdigest()
+
+    def get(self, tokens, lang="en"):
+        """
+        :param tokens: list of token strings
+        :param lang: two-letter language code
+        :return: annotation values for the tokens, or None if not in the cache
+        """
+        row = self._connection.execute("SELECT value FROM annotations WHERE key = ?",
+                                       (self.key(tokens, lang),)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def update(self, tokens_values, lang="en"):
+        """
+        :param tokens_values: iterable of (list of token strings, annotation values as returned by get_doc_values)
+        :param lang: two-letter language code
+        """
+        with self._connection:  # Commit once for all entries
+            self._connection.executemany("INSERT OR REPLACE INTO annotations VALUES (?, ?)",
+                                         ((self.key(tokens, lang), json.dumps(values))
+                                          for tokens, values in tokens_values))
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+annotation_caches = {}  # maps file name to (process ID, AnnotationCache), so that each process opens its own
+
+
+def get_annotation_cache(filename):
+    """
+    Get the AnnotationCache for a given file, opening it once per process.
+    The cache is only used where it is passed explicitly, e.g. by scripts that take ANNOTATION_CACHE_ENV_VAR as default.
+    :param filename: database file
+    :return: AnnotationCache object, or None if no file is given
+    """
+    if not filename:
+        return None
+    pid, cache = annotation_caches.get(filename, (None, None))
+    if pid != os.getpid():  # A connection must not be shared with forked processes
+        cache = AnnotationCache(filename)
+        annotation_caches[filename] = os.getpid(), cache
+    return cache
+
+
 def get_lang(passage_context):
     return passage_context[0].attrib.get("lang")
 
@@ -253,7 +494,8 @@ def is_annotated(passage, as_array=False, as_extra=True):
     if as_array:
         if not (not l0.all or docs is not None and len(docs) == max(t.paragraph for t in l0.all) and
                 sum(map(len, docs)) == len(l0.all) and
-                all(i is None or isinstance(i, int) for l in docs for t in l for i in t)):
+                all(isinstance(l, np.ndarray) or all(i is None or isinstance(i, int) for t in l for i in t)
+                    for l in docs)):
             return False
     if as_extra:
         if not all(a.key in t.extra for t in l0.all for a in Attr):
@@ -262,22 +504,22 @@ def is_annotated(passage, as_array=False, as_extra=True):
 
 
 def set_docs(annotated, as_array, as_extra, lang, vocab, replace, verbose):
-    """Given spaCy annotations, set values in layer0.extra per paragraph if as_array=True,
+    """Given annotation values (see get_doc_values), set values in layer0.extra per paragraph if as_array=True,
        and in Terminal.extra if as_extra=True"""
-    for doc, (i, terminals, passage, *context) in annotated:
-        if doc:  # Not empty, so copy values
-            from spacy import attrs
-            arr = doc.to_array([getattr(attrs, a.name) for a in Attr])
+    for values, (i, terminals, passage, *context) in annotated:
+        if values:  # Not empty, so copy values
+            array_values, extra_values = values
             if as_array:
                 docs = passage.layer(layer0.LAYER_ID).docs(i + 1)
-                existing = docs[i] + (len(arr) - len(docs[i])) * [len(Attr) * [None]]
-                docs[i] = [[a(v if e is None or replace else e, get_vocab(vocab, lang), as_array=True)
-                            for a, v, e in zip(Attr, values, es)] for values, es in zip(arr, existing)]
+                existing = (docs[i].tolist() if isinstance(docs[i], np.ndarray) else list(docs[i])) + \
+                    (len(array_values) - len(docs[i])) * [len(Attr) * [None]]
+                docs[i] = to_doc_array([[v if e is None or replace else a(e, get_vocab(vocab, lang), as_array=True)
+                                         for a, v, e in zip(Attr, vs, es)] for vs, es in zip(array_values, existing)])
             if as_extra:
-                for terminal, values in zip(terminals, arr):
-                    for attr, value in zip(Attr, values):
+                for terminal, vs in zip(terminals, extra_values):
+                    for attr, value in zip(Attr, vs):
                         if replace or not terminal.extra.get(attr.key):
-                            terminal.extra[attr.key] = attr(value, get_vocab(vocab, lang))
+                            terminal.extra[attr.key] = value
         if verbose:
             data = [[a.key for a in Attr]] + \
                    [[str(a(t.tok[a.value], get_vocab(vocab, lang)) if as_array else t.extra[a.key])
@@ -327,7 +569,7 @@ def break2sentences(passage, lang="en", *args, **kwargs):
                     (terminal.text in QUOTES and terminal.text == terminals[marks[-1] - 1].text):
                 marks.append(terminal.position)
     else:  # Not labeled, split using spaCy
-        annotated = get_nlp(lang=lang)([t.text for t in terminals])
+        annotated = get_sentencizer(lang=lang)([t.text for t in terminals])
         marks = [span.end for span in annotated.sents]
     marks = sorted(set(marks + break2paragraphs(passage)))
     # Avoid punctuation-only sentences by picking the last punctuation symbol in each consecutive sequence
@@ -10,49 +10,105 @@ LINKAGE = {ETags.LinkArgument, ETags.LinkRelation}
 NON_SCENE = {ETags.Center, ETags.Elaborator, ETags.Quantifier, ETags.Connector}
 SUPP_FUNC = {ETags.Relator, ETags.Function, ETags.Unanalyzable, ETags.Uncertain}
 SCENE = {ETags.Participant, ETags.State, ETags.Process, ETags.Adverbial, ETags.Time}
+# Tag sets used by NodeValidator, computed once rather than for every node
+TOP_LEVEL = (ETags.ParallelScene, ETags.Linker, ETags.Function, ETags.Ground, ETags.Punctuation, ETags.LinkRelation,
+             ETags.LinkArgument)
+MULTIPLE_PARENTS_FORBIDDEN = (ETags.Function, ETags.LinkRelation, ETags.Connector, ETags.Punctuation, ETags.Terminal)
+MULTIPLE_CHILDREN_FORBIDDEN = (ETags.LinkRelation, ETags.Process, ETags.State)
+NON_SCENE_CHILDREN = set.union({ETags.Terminal, ETags.Punctuation}, NON_SCENE, SUPP_FUNC)
+NO_SUB_NON_SCENE = (ETags.Process, ETags.Adverbial, ETags.Linker, ETags.Time, ETags.Quantifier, ETags.Connector,
+                    ETags.State)
+STATE_FORBIDDEN_SIBLINGS = {ETags.ParallelScene, ETags.Linker, ETags.Process, ETags.Center, ETags.Elaborator,
+                            ETags.Quantifier, ETags.Connector}
+CENTER_ALLOWED_SIBLINGS = set.union({ETags.Terminal, ETags.Punctuation}, {ETags.Adverbial}, NON_SCENE, SUPP_FUNC)
+PARTICIPANT_FORBIDDEN_SIBLINGS = set.union(NON_SCENE, ETags.ParallelScene, ETags.Linker)
+PARALLEL_SCENE_FORBIDDEN_SIBLINGS = set.union(NON_SCENE, SCENE)
+ELABORATOR_FORBIDDEN_SIBLINGS = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground, ETags.Connector)
+QUANTIFIER_FORBIDDEN_SIBLINGS = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground)
+CONNECTOR_FORBIDDEN_SIBLINGS = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground, ETags.Elaborator,
+                                         ETags.Quantifier)
+PROCESS_FORBIDDEN_SIBLINGS = set.union(NON_SCENE, ETags.State)
+MAIN_RELATION_FORBIDDEN_DESCENDANTS = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground)
+# Child categories of a unit that a main relation must not have as a descendant
+SCENE_CHILDREN = {ETags.ParallelScene, ETags.Linker, ETags.Ground, ETags.Participant, ETags.State, ETags.Process,
+                  ETags.Adverbial, ETags.Time}
+TOP_LEVEL_CHILDREN = set.union({ETags.ParallelScene, ETags.Linker, ETags.Function, ETags.Punctuation}, LINKAGE)
+
 
 def validate(passage, linkage=True, multigraph=False):
+    index = ValidationIndex(passage)
     for node in passage.layer(layer0.LAYER_ID).all:
-        yield from NodeValidator(node).validate_terminal()
+        yield from index.validator(node).validate_terminal()
     heads = list(passage.layer(layer1.LAYER_ID).heads)
     found_linkage = False
     for node in heads:
         if node.tag == L1Tags.Linkage:
             found_linkage = True
-        yield from NodeValidator(node).validate_top_level()
+        yield from index.validator(node).validate_top_level()
     stack = [heads]
-    visited = set()
+    visited = set()  # IDs of nodes, which are cheaper to hash than Terminals
     path = []
-    path_set = set(path)
+    path_set = set()
     while stack:
         for node in stack[-1]:
-            if node in path_set:
+            if id(node) in path_set:
                 yield "Detected cycle (%s)" % "->".join(n.ID for n in path)
-            elif node not in visited:
-                visited.add(node)
+            elif id(node) not in visited:
+                visited.add(id(node))
                 path.append(node)
-                path_set.add(node)
+                path_set.add(id(node))
                 stack.append(node.children)
-                yield from NodeValidator(node).validate_non_terminal(linkage=linkage and found_linkage,
-                                                                     multigraph=multigraph)
+                yield from index.validator(node).validate_non_terminal(linkage=linkage and found_linkage,
+                                                                       multigraph=multigraph)
                 break
         else:
             if path:
-                path_set.remove(path.pop())
+                path_set.remove(id(path.pop()))
             stack.pop()
 
 
+class ValidationIndex:
+    """
+    Per-passage index of the data NodeValidator needs about each node, computed once per node:
+    incoming and outgoing edges by tag, primary and remote parents, and whether it has scene-level children.
+    """
+    def __init__(self, passage):
+        self.passage = passage
+        self.heads = {id(node) for layer in passage.layers for node in layer.heads}
+        self._validators = {}
+
+    def validator(self, node):
+        validator = self._validators.get(id(node))
+        if validator is None:
+            validator = self._validators[id(node)] = NodeValidator(node, index=self)
+        return validator
+
+    def count_scene_descendants(self, node):
+        """Number of non-terminal nodes in the subtree of the node (including itself) with scene-level children."""
+        return sum(1 for descendant in node.iter() if not isinstance(descendant, layer0.Terminal) and
+                   self.validator(descendant).has_scene_children)
+
+
 class NodeValidator:
-    def __init__(self, node):
+    def __init__(self, node, index=None):
+        """
+        :param node: Node to validate
+        :param index: ValidationIndex of the node's passage, to share what is computed about other nodes
+        """
         self.node = node
+        self.index = index or ValidationIndex(node.root)
         self.node_id = self.node.ID
         tree_id = self.node.extra.get("tree_id")
         if tree_id:
             self.node_id += ", %s" % tree_id
-        self.incoming = tag_to_edge(node.incoming)
+        self.incoming = tag_to_edge(node.iter_incoming())
         self.outgoing = tag_to_edge(node)
         self.incoming_tags = set(self.incoming)
         self.outgoing_tags = set(self.outgoing)
+        self.primary_incoming = [e for e in node.iter_incoming() if not e.attrib.get("remote") and
+                                 not LINKAGE.intersection(e.tags)]
+        self.remote_incoming = [e for e in node.iter_incoming() if e.attrib.get("remote")]
+        self.has_scene_children = not SCENE_CHILDREN.isdisjoint(self.outgoing_tags)
 
     def validate_terminal(self):
         if not self.node.text:
@@ -65,13 +121,12 @@ class NodeValidator:
             yield "Reentrant %s terminal (%s) '%s'" % (self.node.tag, join(self.node.incoming), self.node)
 
     def validate_top_level(self):
-        if self.node not in self.node.layer.heads and self.node.tag != L1Tags.Linkage:
+        if id(self.node) not in self.index.heads and self.node.tag != L1Tags.Linkage:
             yield "Extra root (%s)" % self.node_id
-        terminals = [n for n in self.node.children if n.layer.ID == layer0.LAYER_ID]
+        terminals = [n for n in self.node.iter_children() if n.layer.ID == layer0.LAYER_ID]
         if terminals:
             yield "Terminal children (%s) of root (%s)" % (join(terminals), self.node_id)
-        s = self.outgoing_tags.difference((ETags.ParallelScene, ETags.Linker, ETags.Function, ETags.Ground,
-                                           ETags.Punctuation, ETags.LinkRelation, ETags.LinkArgument))
+        s = self.outgoing_tags.difference(TOP_LEVEL)
         if s:
             yield "Top-level unit (%s) with %s children: %s" %\
                   (self.node_id, join(s), join(e.child for e in self.node if s.intersection(e.tags)))
@@ -81,37 +136,33 @@ class NodeValidator:
             yield from self.validate_linkage()
         elif self.node.tag == L1Tags.Foundational:
             yield from self.validate_foundational()
-        primary_incoming = [e for e in self.node.incoming if not e.attrib.get("remote") and
-                            not LINKAGE.intersection(e.tags)]
-        if len(primary_incoming) > 1:
-            yield "Unit (%s) with multiple non-remote parents (%s)" % (self.node_id, join(primary_incoming))
-        remote_incoming = [e for e in self.node.incoming if e.attrib.get("remote")]
-        if remote_incoming and not primary_incoming:
+        if len(self.primary_incoming) > 1:
+            yield "Unit (%s) with multiple non-remote parents (%s)" % (self.node_id, join(self.primary_incoming))
+        if self.remote_incoming and not self.primary_incoming:
             yield "Unit (%s) with remote parents but no primary parents" % self.node_id
         for edge in self.node:
             if (ETags.Punctuation in edge.tags) != (edge.child.tag == L1Tags.Punctuation):
                 yield "%s edge (%s) with %s child" % (edge.tags, edge, edge.child.tag)
             # FN parent of Punctuation is disallowed unless the FN is unanalyzable
             if (self.node.tag == L1Tags.Foundational) and (edge.child.tag == L0Tags.Punct) and \
-                    not len(self.node.terminals) + len(self.node.punctuation) == len(self.node.children) > 1 or \
+                    not len(self.node.terminals) + len(self.node.punctuation) == len(self.node) > 1 or \
                     (self.node.tag == L1Tags.Punctuation) and not (edge.child.tag == L0Tags.Punct):
                 yield "%s unit (%s) with %s child (%s)" % (self.node.tag, self.node_id, edge.child.tag, edge.child.ID)
         if self.node.attrib.get("implicit"):
-            if self.node.outgoing:
+            if len(self.node):
                 yield "Implicit unit (%s) with children (%s)" % (self.node_id, join(self.node.children))
         elif self.node.tag in (L1Tags.Foundational, L1Tags.Linkage, L1Tags.Punctuation) and \
                 all(e.attrib.get("remote") for e in self.node):
             yield "Non-implicit unit (%s) with no primary children" % (self.node_id)
-        for tag in (ETags.Function, ETags.LinkRelation,
-                    ETags.Connector, ETags.Punctuation, ETags.Terminal):
+        for tag in MULTIPLE_PARENTS_FORBIDDEN:
             s = self.incoming.get(tag, ())
             if len(s) > 1:
                 yield "Unit (%s) with multiple %s parents (%s)" % (self.node_id, tag, join(e.parent for e in s))
-        for tag in (ETags.LinkRelation, ETags.Process, ETags.State):
+        for tag in MULTIPLE_CHILDREN_FORBIDDEN:
             s = self.outgoing.get(tag, ())
             if len(s) > 1:
                 yield "Unit (%s) with multiple %s children (%s)" % (self.node_id, tag, join(e.child for e in s))
-        s = self.outgoing_tags.difference(set.union({ETags.Terminal, ETags.Punctuation}, NON_SCENE, SUPP_FUNC))
+        s = self.outgoing_tags.difference(NON_SCENE_CHILDREN)
         if (ETags.Function in self.incoming) and s:
             yield "%s unit (%s) with %s children: %s" % (ETags.Function, self.node_id, join(s), self.node)
         if ETags.Linker in self.incoming_tags and linkage and ETags.LinkRelation not in self.incoming_tags:
@@ -123,11 +174,9 @@ class NodeValidator:
                 if len(edges) > 1:
                     yield "Multiple edges from %s to %s: %s" % (self.node_id, child_id, ", ".join(
                         "%d %s" % (len(e), t) for t, e in tag_to_edge(edges).items()))
-        no_sub_non_scene = (ETags.Process, ETags.Adverbial, ETags.Linker, ETags.Time, ETags.Quantifier,
-                            ETags.Connector, ETags.State)
-        s = self.outgoing_tags.difference((set.union({ETags.Terminal, ETags.Punctuation}, NON_SCENE, SUPP_FUNC)))
-        if any(self.incoming_tags.intersection(no_sub_non_scene)) and s:
-            edges_to_check =  self.incoming_tags.intersection(no_sub_non_scene)
+        s = self.outgoing_tags.difference(NON_SCENE_CHILDREN)
+        if any(self.incoming_tags.intersection(NO_SUB_NON_SCENE)) and s:
+            edges_to_check = self.incoming_tags.intersection(NO_SUB_NON_SCENE)
             yield "%s unit (%s) with %s children: %s" % (join(edges_to_check), self.node_id, join(s), self.node)
         if (ETags.Unanalyzable in self.incoming) and self.outgoing:
             yield "%s unit (%s) with children: %s" % (ETags.Unanalyzable, self.node_id, self.node) # FIXME: should include punctuation and terminal?
@@ -137,43 +186,33 @@ class NodeValidator:
         s = self.outgoing_tags.intersection({ETags.ParallelScene, ETags.Linker})
         if (ETags.ParallelScene in self.incoming) and s:
             yield "%s unit (%s) with %s children: %s" % (ETags.ParallelScene, self.node_id, join(s), self.node)
-        forbidden = {ETags.ParallelScene, ETags.Linker, ETags.Process, ETags.Center, ETags.Elaborator,
-                     ETags.Quantifier, ETags.Connector}
-        s = forbidden.intersection(self.outgoing_tags)
+        s = STATE_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (ETags.State in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.State, join(s), self.node)
         s = self.outgoing_tags.intersection({ETags.ParallelScene, ETags.Linker})
         if (ETags.Adverbial in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Adverbial, join(s), self.node)
-        s = self.outgoing_tags.difference((set.union({ETags.Terminal, ETags.Punctuation}, {ETags.Adverbial},
-                                                     NON_SCENE, SUPP_FUNC)))
+        s = self.outgoing_tags.difference(CENTER_ALLOWED_SIBLINGS)
         if (ETags.Center in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Center, join(s), self.node)
-        forbidden = set.union(NON_SCENE, ETags.ParallelScene, ETags.Linker)
-        s = forbidden.intersection(self.outgoing_tags)
+        s = PARTICIPANT_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (any(self.outgoing_tags.intersection({ETags.Time, ETags.Participant}))) and s:
             edges_to_check = [k for k in self.outgoing_tags if k in (ETags.Time, ETags.Participant)]
             yield "%s unit with %s siblings: under %s" % (join(edges_to_check), join(s), self.node)
-        forbidden = set.union(NON_SCENE, SCENE)
-        s = self.outgoing_tags.intersection(forbidden)
+        s = self.outgoing_tags.intersection(PARALLEL_SCENE_FORBIDDEN_SIBLINGS)
         if (any(self.outgoing_tags.intersection({ETags.ParallelScene, ETags.Linker}))) and s:
             edges_to_check = self.outgoing_tags.intersection({ETags.ParallelScene, ETags.Linker})
             yield "%s unit with %s siblings: under %s" % (join(edges_to_check), join(s), self.node)
-        forbidden = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground, ETags.Connector)
-        s = forbidden.intersection(self.outgoing_tags)
+        s = ELABORATOR_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (ETags.Elaborator in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Elaborator, join(s), self.node)
-        forbidden = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground)
-        s = forbidden.intersection(self.outgoing_tags)
+        s = QUANTIFIER_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (ETags.Quantifier in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Quantifier, join(s), self.node)
-        forbidden = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground, ETags.Elaborator,
-                              ETags.Quantifier)
-        s = forbidden.intersection(self.outgoing_tags)
+        s = CONNECTOR_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (ETags.Connector in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Connector, join(s), self.node)
-        forbidden = set.union(NON_SCENE, ETags.State)
-        s = forbidden.intersection(self.outgoing_tags)
+        s = PROCESS_FORBIDDEN_SIBLINGS.intersection(self.outgoing_tags)
         if (ETags.Process in self.outgoing_tags) and s:
             yield "%s unit with %s siblings: under %s" % (ETags.Process, join(s), self.node)
         if any(self.outgoing_tags.intersection({ETags.Elaborator, ETags.Quantifier, ETags.Connector})):
@@ -189,21 +228,17 @@ class NodeValidator:
             yield "%s unit without %s sibling: under %s" % (ETags.Linker, ETags.ParallelScene, self.node)
         if any(self.incoming_tags.intersection({ETags.State, ETags.Process})):
             edges_to_check = list(self.incoming_tags.intersection({ETags.State, ETags.Process}))
-            forbidden = set.union(SCENE, ETags.ParallelScene, ETags.Linker, ETags.Ground)
-            itr = self.node.iter()
-            for i in itr:
-                if not isinstance(i, layer0.Terminal):
-                    if i.parallel_scenes or i.linkers or i.grounds or i.participants or i.state or i.process or i.adverbials or i.times:
-                        yield "%s unit (%s) with at least one of the %s descendants: %s" % (join(edges_to_check), self.node_id, join(forbidden), self.node)
-        s = [e for e in self.node.incoming if
+            for _ in range(self.index.count_scene_descendants(self.node)):
+                yield "%s unit (%s) with at least one of the %s descendants: %s" % (
+                    join(edges_to_check), self.node_id, join(MAIN_RELATION_FORBIDDEN_DESCENDANTS), self.node)
+        s = [e for e in self.node.iter_incoming() if
              e.attrib.get('remote') and e.tag in {ETags.Relator, ETags.Function}]
         if (ETags.Relator in self.incoming_tags or ETags.Function in self.incoming_tags) and s:
             yield "%s remote edges (%s)" % (join({e.tag for e in s}), join(s))
-        s = self.outgoing_tags.difference(set.union({ETags.ParallelScene, ETags.Linker, ETags.Function,
-                                                     ETags.Punctuation}, LINKAGE))
+        s = self.outgoing_tags.difference(TOP_LEVEL_CHILDREN)
         if (not self.incoming) and s:
             yield "%s unit (%s) at top level" % (join(s), self.node_id)
-        s = [e for e in self.node.incoming if ETags.Unanalyzable in e.tags and len(set(e.tags)) == 1]
+        s = [e for e in self.node.iter_incoming() if ETags.Unanalyzable in e.tags and len(set(e.tags)) == 1]
         if (ETags.Unanalyzable in self.incoming_tags) and s:
             yield "%s unit (%s) without another label" % (ETags.Unanalyzable, self.node_id)
 
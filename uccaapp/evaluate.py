@@ -3,13 +3,13 @@ import sys
 
 from tqdm import tqdm
 
-from ucca.evaluation import evaluate, Scores, LABELED, UNLABELED
+from ucca.evaluation import evaluate_corpus, Scores, ScoresAccumulator, LABELED, UNLABELED
 from uccaapp.download_task import TaskDownloader
 
 desc = """Download tasks from UCCA-App and evaluate them"""
 
 
-def main(task_ids, by_filename=False, validate=None, log=None, **kwargs):
+def main(task_ids, by_filename=False, validate=None, log=None, workers=1, **kwargs):
     kwargs["write"] = False
     if by_filename:
         task_ids_from_file = []
@@ -21,22 +21,23 @@ def main(task_ids, by_filename=False, validate=None, log=None, **kwargs):
         task_ids = [[task_id] for task_id in task_ids]
     assert len(task_ids) == 2, "Got %d lists of task IDs instead of two" % len(task_ids)
     downloader = TaskDownloader(**kwargs)
-    scores = []
+    scores = ScoresAccumulator()
     validate_h = open(validate, "w", encoding="utf-8") if validate else None
     log_h = open(log, "w", encoding="utf-8") if log else None
     if log:
         fields = ["guessed", "ref"] + Scores.field_titles(eval_type=LABELED) + Scores.field_titles(eval_type=UNLABELED)
         print(*fields, file=log_h, sep="\t", flush=True)
-    for task_id_pair in tqdm(list(zip(*task_ids)), unit=" tasks", desc="Evaluating"):
-        passage_pair = []
-        for task_id in task_id_pair:
-            passage, *_ = downloader.download_task(task_id, validate=validate_h, **kwargs)
-            passage_pair.append(passage)
-        score = evaluate(*passage_pair, **kwargs)
+    task_id_pairs = list(zip(*task_ids))
+
+    def _download_pairs():
+        for task_id_pair in tqdm(task_id_pairs, unit=" tasks", desc="Evaluating"):
+            yield [downloader.download_task(task_id, validate=validate_h, **kwargs)[0] for task_id in task_id_pair]
+
+    for task_id_pair, score in zip(task_id_pairs, evaluate_corpus(_download_pairs(), workers=workers, **kwargs)):
         if log:
             fields = list(task_id_pair) + score.fields(eval_type=LABELED) + score.fields(eval_type=UNLABELED)
             print(*fields, file=log_h, sep="\t", flush=True)
-        scores.append(score)
+        scores.add(score)
     if validate:
         validate_h.close()
     if log:
@@ -44,7 +45,7 @@ def main(task_ids, by_filename=False, validate=None, log=None, **kwargs):
     print()
     if len(scores) > 1:
         print("Aggregated scores:")
-    Scores.aggregate(scores).print()
+    scores.summary().print()
 
 
 def check_args(p, args):
@@ -56,5 +57,6 @@ def check_args(p, args):
 if __name__ == "__main__":
     argument_parser = argparse.ArgumentParser(description=desc)
     TaskDownloader.add_arguments(argument_parser)
+    argument_parser.add_argument("--workers", type=int, default=1, help="number of processes to evaluate tasks in")
     main(**vars(check_args(argument_parser, argument_parser.parse_args())))
     sys.exit(0)